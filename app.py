@@ -1,45 +1,87 @@
+import logging
+
 from flask import Flask, render_template
-from flask_cors import CORS
-from database import db, init_db, get_db
+from werkzeug.utils import import_string
 from config import Config
 
-# Импорт всех routes
-from routes.products import products_bp
-from routes.workshops import workshops_bp
-from routes.material import material_bp
-from routes.product_types import product_types_bp
-from routes.product_workshops import product_workshops_bp
-from routes.material_types import material_types_bp
-app = Flask(__name__, template_folder='frontend', static_folder='frontend')
-app.config.from_object(Config)
-
-# ✅ Инициализировать БД (ВСЕ в database.py!)
-init_db(app)
-
-CORS(app)
-
-# Регистрация всех blueprints
-app.register_blueprint(products_bp)
-app.register_blueprint(workshops_bp)
-app.register_blueprint(material_bp)
-app.register_blueprint(product_types_bp)           # НОВАЯ
-app.register_blueprint(material_types_bp)          # НОВАЯ
-app.register_blueprint(product_workshops_bp)       # НОВАЯ
-
-@app.route('/')
-def index():
-    """Главная страница"""
-    return render_template('index.html')
-
-@app.teardown_appcontext
-def close_connection(exception):
-    """Закрытие подключения БД"""
-    db_session = getattr(app, '_database', None)
-    if db_session is not None:
-        db_session.close()
+# Все blueprints приложения (импортируются в create_app, а не при импорте модуля)
+BLUEPRINTS = [
+    'routes.products:products_bp',
+    'routes.workshops:workshops_bp',
+    'routes.material:material_bp',
+    'routes.product_types:product_types_bp',
+    'routes.material_types:material_types_bp',
+    'routes.product_workshops:product_workshops_bp',
+    'routes.schedule:schedule_bp',
+    'routes.system:system_bp',
+]
+
+
+def create_app(config_object=Config):
+    """
+    Фабрика приложения.
+    Режим работы с БД при старте задается DB_STARTUP_MODE (см. database.init_db):
+    по умолчанию вместо create_all сверяется только версия схемы.
+    """
+    from flask_cors import CORS
+    from database import init_db
+    from serialization import init_json
+    from compression import init_compression
+    from metrics import init_metrics
+    from profiling import init_profiling
+
+    app = Flask(__name__, template_folder='frontend', static_folder='frontend')
+    app.config.from_object(config_object)
+    init_json(app)
+
+    # ✅ Инициализировать БД (ВСЕ в database.py!)
+    init_db(app)
+
+    # Метрики до сжатия: after_request выполняются в обратном порядке,
+    # так что время запроса включает и сжатие ответа
+    init_metrics(app)
+    init_profiling(app)
+    CORS(app)
+    init_compression(app)
+
+    # Регистрация всех blueprints
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(import_string(blueprint))
+
+    @app.route('/')
+    def index():
+        """Главная страница"""
+        return render_template('index.html')
+
+    return app
+
+
+def warm_up(app):
+    """
+    Прогрев кэшей процесса (справочники, матрица маршрутов, индекс поиска) перед fork воркеров:
+    данные загружаются один раз в мастер-процессе и разделяются воркерами.
+    После прогрева подключения закрываются - открытые сокеты не должны
+    достаться дочерним процессам.
+    """
+    from database import db
+    from services.product_search import product_search_index
+    from services.reference_cache import reference_cache
+    from services.workshop_load import route_matrix_cache
 
-if __name__ == '__main__':
     with app.app_context():
-        print("🚀 Приложение запущено!")
-        print("📱 Перейди по адресу: http://localhost:5000")
+        try:
+            reference_cache.get(db.session)
+            route_matrix_cache.get(db.session)
+            product_search_index.get(db.session)
+        except Exception as e:
+            logging.getLogger(__name__).warning("Прогрев кэшей не выполнен: %s", e)
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    app = create_app()
+    logging.getLogger(__name__).info("🚀 Приложение запущено: http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
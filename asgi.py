@@ -0,0 +1,7 @@
+"""
+Точка входа ASGI-сервера (асинхронный режим эндпоинтов чтения):
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+from async_app import create_async_app
+
+app = create_async_app()
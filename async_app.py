@@ -0,0 +1,197 @@
+"""
+Асинхронный режим (ASGI) для нагруженных эндпоинтов чтения.
+
+Те же URL и ответы, что у Flask-приложения, но запросы обслуживаются
+в одном event loop: пока один запрос ждет PostgreSQL, loop обрабатывает другие,
+и параллельность не ограничена числом потоков/воркеров.
+
+Работает через асинхронный engine со своим пулом (asyncpg; проверен только
+на SQLite через aiosqlite, см. README); модели и сервисы
+используются без изменений - синхронный код сервиса выполняется
+в AsyncSession.run_sync поверх асинхронного подключения.
+
+Запуск:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.http import http_date
+
+from config import Config
+from serialization import dumps_bytes
+
+def json_response(data, status_code=200):
+    return Response(dumps_bytes(data) + b'\n', status_code=status_code, media_type='application/json')
+
+
+def create_async_app(config_object=Config):
+    """Фабрика ASGI-приложения (асинхронный engine создается при старте, закрывается при остановке)"""
+    from contextlib import asynccontextmanager
+
+    from database import create_async_session_factory, get_change_stamp
+    from models import MaterialType, ProductType
+    from routes.conditional import evaluate_conditional
+    from services.export_service import ExportService
+    from services.product_service import ProductService
+    from services.workshop_service import WorkshopService
+
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        state['engine'], state['sessions'] = create_async_session_factory(config_object)
+        yield
+        await state['engine'].dispose()
+
+    async def run(fn):
+        """Выполнить синхронную функцию сервиса с сессией поверх асинхронного подключения"""
+        async with state['sessions']() as session:
+            return await session.run_sync(fn)
+
+    async def get_products(request):
+        if 'ids' in request.query_params:
+            try:
+                ids = ProductService.lookup_keys(','.join(request.query_params.getlist('ids')).split(','), 'ids')
+                return json_response(await run(lambda s: ProductService(s).get_products_by_ids(ids)))
+            except ValueError as e:
+                return json_response({'error': str(e)}, 400)
+            except Exception as e:
+                return json_response({'error': str(e)}, 500)
+
+        try:
+            params = ProductService.listing_params(request.query_params)
+            products, next_cursor = await run(lambda s: ProductService(s).get_products_page(**params))
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        except Exception as e:
+            return json_response({'error': str(e)}, 500)
+
+        if params['limit'] is None:
+            return json_response(products)
+        return json_response({'items': products, 'next_cursor': next_cursor, 'limit': params['limit']})
+
+    async def lookup_products(request):
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return json_response({'error': 'Ожидается JSON-объект с полем article_numbers'}, 400)
+        try:
+            article_numbers = ProductService.lookup_keys(data.get('article_numbers'), 'article_numbers')
+            return json_response(await run(lambda s: ProductService(s).get_products_by_article_numbers(article_numbers)))
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+        except Exception as e:
+            return json_response({'error': str(e)}, 500)
+
+    async def get_product(request):
+        product_id = request.path_params['product_id']
+
+        try:
+            product = await run(lambda s: ProductService(s).get_product_by_id(product_id))
+        except Exception as e:
+            return json_response({'error': str(e)}, 500)
+        if not product:
+            return json_response({'error': 'Продукт не найден'}, 404)
+        return json_response(product)
+
+    async def get_product_workshops(request):
+        product_id = request.path_params['product_id']
+        try:
+            route = await run(lambda s: ProductService(s).get_product_route(product_id))
+        except Exception as e:
+            return json_response({'error': str(e)}, 500)
+        if route is None:
+            return json_response({'error': 'Продукт не найден'}, 404)
+        return json_response(route)
+
+    def read_endpoint(load):
+        """Эндпоинт списка: load(session) -> данные ответа"""
+        async def endpoint(request):
+            try:
+                return json_response(await run(load))
+            except Exception as e:
+                return json_response({'error': str(e)}, 500)
+        return endpoint
+
+    def conditional(tables, endpoint):
+        """Условный GET справочника: те же ETag / Last-Modified и 304, что у conditional_get во Flask"""
+        async def wrapper(request):
+            try:
+                stamp = await run(lambda s: get_change_stamp(s, tables))
+            except Exception:
+                # Отметку получить не удалось - отдаем обычный ответ
+                return await endpoint(request)
+
+            etag, last_modified, matched = evaluate_conditional(
+                request.url.path, stamp, request.headers.get('if-none-match'), request.headers.get('if-modified-since')
+            )
+            if matched:
+                response = Response(status_code=304, headers={'Vary': 'Accept-Encoding'})
+            else:
+                response = await endpoint(request)
+                if response.status_code != 200:
+                    return response
+            response.headers['ETag'] = f'"{matched or etag}"'
+            if last_modified:
+                response.headers['Last-Modified'] = http_date(last_modified)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+
+    def reference_list(table, model, order_by):
+        return conditional((table,), read_endpoint(
+            lambda s: [item.to_dict() for item in s.query(model).order_by(order_by)]
+        ))
+
+    async def get_product_workshops_list(request):
+        """
+        Все маршруты производства JSON-массивом, потоком: строки читаются
+        пачками по EXPORT_BATCH_SIZE и сразу отдаются клиенту
+        """
+        session = state['sessions']()
+        try:
+            result = await session.stream(ExportService.PRODUCT_WORKSHOPS_QUERY,
+                                          execution_options={'yield_per': config_object.EXPORT_BATCH_SIZE})
+        except Exception as e:
+            await session.close()
+            return json_response({'error': str(e)}, 500)
+
+        async def body():
+            try:
+                yield b'['
+                first = True
+                async for rows in result.partitions():
+                    chunk = b','.join(dumps_bytes(ExportService.product_workshop_row(row)) for row in rows)
+                    yield chunk if first else b',' + chunk
+                    first = False
+                yield b']\n'
+            finally:
+                await session.close()
+
+        return StreamingResponse(body(), media_type='application/json')
+
+    routes = [
+        Route('/api/products', get_products),
+        Route('/api/products/lookup', lookup_products, methods=['POST']),
+        Route('/api/products/{product_id:int}', get_product),
+        Route('/api/products/{product_id:int}/workshops', get_product_workshops),
+        Route('/api/product-workshops', get_product_workshops_list),
+        Route('/api/product-types', reference_list('product_types', ProductType, ProductType.product_type_id)),
+        Route('/api/material-types', reference_list('material_types', MaterialType, MaterialType.material_type_id)),
+        Route('/api/workshops', conditional(('workshops',), read_endpoint(
+            lambda s: WorkshopService(s).get_all_workshops()
+        ))),
+    ]
+
+    middleware = [Middleware(CORSMiddleware, allow_origins=['*'])]
+    if config_object.COMPRESS_ENABLED:
+        middleware.append(Middleware(GZipMiddleware, minimum_size=config_object.COMPRESS_MIN_SIZE,
+                                     compresslevel=config_object.COMPRESS_GZIP_LEVEL))
+
+    return Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
@@ -0,0 +1,66 @@
+"""
+Сжатие больших ответов (gzip / brotli) по заголовку Accept-Encoding
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli не установлен - используется только gzip
+    brotli = None
+
+ENCODINGS = ('br', 'gzip')  # в порядке предпочтения
+
+
+def encoded_etag(etag, encoding):
+    """ETag сжатого представления: отличается от ETag несжатого набора байт"""
+    return f'{etag}-{encoding}'
+
+
+def _encoders(app):
+    encoders = {'gzip': lambda data: gzip.compress(data, compresslevel=app.config['COMPRESS_GZIP_LEVEL'])}
+    if brotli is not None:
+        encoders['br'] = lambda data: brotli.compress(data, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+    return encoders
+
+
+def init_compression(app):
+    """
+    Подключить сжатие ответов.
+    Сжимаются только ответы 200 больше COMPRESS_MIN_SIZE байт с типом из COMPRESS_MIMETYPES;
+    потоковые ответы (выгрузки) не трогаются.
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    encoders = _encoders(app)
+    preference = [name for name in ENCODINGS if name in encoders]
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in app.config['COMPRESS_MIMETYPES']):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        accepted = request.accept_encodings
+        encoding = next((name for name in preference if accepted[name]), None)
+        if encoding is None:
+            return response
+
+        response.set_data(encoders[encoding](data))
+        response.headers['Content-Encoding'] = encoding
+        # Сжатое представление - другой набор байт, ETag должен отличаться
+        # (conditional_get принимает в If-None-Match оба варианта)
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(encoded_etag(etag, encoding), weak=weak)
+        return response
@@ -4,8 +4,86 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Config:
-    SQLALCHEMY_DATABASE_URI = "postgresql+psycopg2://postgres:1@localhost:5432/furniture_company"
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL', "postgresql+psycopg2://postgres:1@localhost:5432/furniture_company"
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JSON_AS_ASCII = False
     JSON_SORT_KEYS = False
+    # orjson (быстрее, Decimal/datetime без ручного приведения) или default (стандартный json)
+    JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'orjson')
 
+    # Сжатие ответов (gzip; brotli - если установлен пакет brotli)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))   # байт
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    COMPRESS_MIMETYPES = ('application/json', 'text/html', 'text/css', 'application/javascript', 'text/javascript')
+
+    # Пул подключений: один engine на процесс, настройки через переменные окружения
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))       # сек. ожидания свободного подключения
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))     # сек. жизни подключения
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+    DB_POOL_LOG_INTERVAL = int(os.getenv('DB_POOL_LOG_INTERVAL', 60))  # 0 - не логировать
+
+    # Метрики (GET /api/metrics) и журнал медленных SQL-запросов (логгер metrics.slow_query)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+
+    # Профилирование запросов по требованию (profiling.py): заголовок X-Profile с токеном (параметр URL не принимается)
+    # и/или случайная доля запросов. Без токена и с нулевой долей выключено полностью.
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN') or None
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', 100))
+
+    # Продакшен-сервер (gunicorn -c gunicorn.conf.py wsgi:app)
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 0))          # 0 - по числу ядер: 2 * CPU + 1
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 4))          # потоков на воркер
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 60))         # сек. на запрос до перезапуска воркера
+    WEB_GRACEFUL_TIMEOUT = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))  # сек. на завершение запросов по SIGTERM
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', 0))  # перезапуск воркера после N запросов (0 - нет)
+
+    # Асинхронный режим (asgi:app): свой engine и пул; URL по умолчанию выводится из DATABASE_URL
+    ASYNC_DATABASE_URL = os.getenv('ASYNC_DATABASE_URL')
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+    ASYNC_DB_MAX_OVERFLOW = int(os.getenv('ASYNC_DB_MAX_OVERFLOW', 20))
+
+    # Режим старта: check - сверить версию схемы (без DDL), create_all - создать таблицы,
+    # skip - ничего не проверять
+    DB_STARTUP_MODE = os.getenv('DB_STARTUP_MODE', 'check')
+    # Версия схемы БД, которую ожидает код (таблица schema_version в furniture_company.sql)
+    SCHEMA_VERSION = 6
+
+    # Размер пачки строк при потоковой выгрузке
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+    # Кэш справочников: как часто (сек.) сверять отметку изменений с БД
+    REFERENCE_CACHE_CHECK_INTERVAL = float(os.getenv('REFERENCE_CACHE_CHECK_INTERVAL', 5))
+    # Индекс поиска продукции (GET /api/products/search): как часто (сек.) сверять отметку изменений
+    PRODUCT_SEARCH_CHECK_INTERVAL = float(os.getenv('PRODUCT_SEARCH_CHECK_INTERVAL', 5))
+
+    # Календарь смен для загрузки цехов (GET /api/workshops/load): фонд времени
+    # одного сотрудника = дни * смены в день * часы смены
+    WORKSHOP_CALENDAR_DAYS = int(os.getenv('WORKSHOP_CALENDAR_DAYS', 22))        # рабочих дней в периоде
+    WORKSHOP_SHIFTS_PER_DAY = int(os.getenv('WORKSHOP_SHIFTS_PER_DAY', 1))
+    WORKSHOP_SHIFT_HOURS = float(os.getenv('WORKSHOP_SHIFT_HOURS', 8))
+
+    # Планирование производства (POST /api/schedule)
+    SCHEDULER_TIME_BUDGET_MS = int(os.getenv('SCHEDULER_TIME_BUDGET_MS', 5000))  # перебор эвристик
+    SCHEDULER_MAX_ORDERS = int(os.getenv('SCHEDULER_MAX_ORDERS', 100000))
+    SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', 1))              # процессов расчета
+    SCHEDULER_MAX_RESULTS = int(os.getenv('SCHEDULER_MAX_RESULTS', 20))     # хранимых результатов (schedule_tasks)
+    # Задача в queued / running дольше этого (сек.) считается потерянной (процесс веб-сервера убит) - failed
+    SCHEDULER_TASK_TIMEOUT = float(os.getenv('SCHEDULER_TASK_TIMEOUT', 3600))
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
@@ -1,20 +1,226 @@
+import logging
+import threading
+import time
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import functions
 
 db = SQLAlchemy()
 
+logger = logging.getLogger(__name__)
+
+# Счетчики пула подключений (общие для процесса)
+_pool_stats = {'checkouts': 0, 'checkins': 0, 'connects': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0,
+               'last_log': 0.0}
+_pool_lock = threading.Lock()
+
+
+@compiles(functions.now, 'sqlite')
+def _sqlite_now(element, compiler, **kw):
+    """
+    func.now() в SQLite: то же время UTC, что и CURRENT_TIMESTAMP, но с миллисекундами
+    (отметки updated_at различаются у записей в пределах одной секунды)
+    """
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool с учетом времени получения подключения из пула:
+    ожидание свободного подключения (при исчерпании pool_size + max_overflow)
+    и открытие нового подключения.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            with _pool_lock:
+                _pool_stats['wait_seconds'] += waited
+                if waited > _pool_stats['max_wait_seconds']:
+                    _pool_stats['max_wait_seconds'] = waited
+
+
 def init_db(app):
+    """
+    Подключение БД к приложению.
+    В зависимости от DB_STARTUP_MODE при старте:
+        check      - сверяется версия схемы (один SELECT, без DDL)
+        create_all - создаются недостающие таблицы (для пустой dev-БД)
+        skip       - БД при старте не трогается (ни одного подключения, см. tests/test_startup.py)
+    В режимах check и create_all при старте определяется и колонка потерь material_types.
+    """
+    options = app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {}
+    if 'pool_size' in options and 'poolclass' not in options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, 'poolclass': TimedQueuePool}
     db.init_app(app)
     with app.app_context():
-        db.create_all()
+        _register_pool_events(db.engine, app.config.get('DB_POOL_LOG_INTERVAL', 0))
+
+        mode = app.config.get('DB_STARTUP_MODE', 'check')
+        if mode == 'create_all':
+            import models  # noqa: F401 - регистрирует все модели в db.metadata
+            db.create_all()
+        elif mode == 'check':
+            check_schema_version(app.config['SCHEMA_VERSION'])
+        elif mode != 'skip':
+            raise ValueError(f"Неизвестный DB_STARTUP_MODE: {mode}")
+        if mode != 'skip':
+            _resolve_material_types_schema()
+
+
+def _resolve_material_types_schema():
+    """Колонка потерь material_types - один раз при старте (не удалось - при первом обращении)"""
+    from services.material_types_schema import material_types_schema
+
+    try:
+        material_types_schema.get(db.session)
+    except Exception as e:
+        material_types_schema.invalidate()
+        logger.warning("Колонка потерь material_types не определена при старте: %s", e)
+    finally:
+        db.session.remove()
+
+
+def check_schema_version(expected):
+    """
+    Сверить версию схемы в таблице schema_version с ожидаемой кодом.
+    Несовпадение версии и БД без таблицы schema_version (созданная
+    исходным скриптом, см. migrations/001_schema_version.sql) - ошибка старта.
+    """
+    try:
+        with db.engine.connect() as connection:
+            version = connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    except DBAPIError as e:
+        if e.connection_invalidated or 'schema_version' not in str(e.orig):
+            raise
+        raise RuntimeError(
+            f"Таблица schema_version не найдена, ожидается версия схемы {expected}. "
+            f"Примените миграции migrations/00N_*.sql начиная с 001."
+        ) from e
+
+    if version != expected:
+        raise RuntimeError(
+            f"Версия схемы БД {version} не совпадает с ожидаемой {expected}. "
+            f"Примените furniture_company.sql / миграции."
+        )
+    return version
+
+
+def get_change_stamp(session, tables):
+    """
+    Дешевая отметка изменений таблиц: (COUNT(*), MAX(updated_at)) по каждой таблице,
+    одним запросом. Меняется при вставке, удалении и обновлении строк
+    (если UPDATE выставляет updated_at).
+
+    Args:
+        session: сессия БД
+        tables: имена таблиц (константы из кода, не пользовательский ввод)
+
+    Returns:
+        tuple: (count1, max_updated_at1, count2, max_updated_at2, ...)
+    """
+    columns = ', '.join(
+        f"(SELECT COUNT(*) FROM {table}), (SELECT MAX(updated_at) FROM {table})" for table in tables
+    )
+    return tuple(session.execute(text(f"SELECT {columns}")).first())
+
+
+def async_database_url(url: str) -> str:
+    """URL синхронного драйвера -> URL асинхронного (asyncpg / aiosqlite)"""
+    for prefix, async_prefix in (('postgresql+psycopg2://', 'postgresql+asyncpg://'),
+                                 ('postgresql://', 'postgresql+asyncpg://'),
+                                 ('postgres://', 'postgresql+asyncpg://'),
+                                 ('sqlite://', 'sqlite+aiosqlite://')):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix):]
+    return url
+
+
+def create_async_session_factory(config):
+    """
+    Асинхронный engine со своим пулом (для асинхронного режима, см. async_app.py)
+    и фабрика сессий к нему.
+
+    Размер пула - ASYNC_DB_POOL_SIZE / ASYNC_DB_MAX_OVERFLOW; остальные настройки
+    общие с синхронным engine.
+
+    Returns:
+        (AsyncEngine, async_sessionmaker)
+    """
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    options = dict(config.SQLALCHEMY_ENGINE_OPTIONS)
+    options.update(pool_size=config.ASYNC_DB_POOL_SIZE, max_overflow=config.ASYNC_DB_MAX_OVERFLOW)
+    url = config.ASYNC_DATABASE_URL or async_database_url(config.SQLALCHEMY_DATABASE_URI)
+    engine = create_async_engine(url, **options)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
 
 def get_db():
-    from flask import g
-    if 'db' not in g:
-        from config import Config
-        from sqlalchemy import create_engine
-        from sqlalchemy.orm import sessionmaker
-        engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-        Session = sessionmaker(bind=engine)
-        g.db = Session()
-    return g.db
+    """
+    Сессия БД текущего запроса.
+    Engine и пул создаются один раз на процесс (Flask-SQLAlchemy),
+    сессия удаляется расширением в teardown_appcontext.
+    """
+    return db.session
+
+
+def _register_pool_events(engine, log_interval):
+    """Подписка на события пула для подсчета выдачи подключений"""
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        with _pool_lock:
+            _pool_stats['connects'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _pool_lock:
+            _pool_stats['checkouts'] += 1
+            now = time.monotonic()
+            should_log = log_interval and now - _pool_stats['last_log'] >= log_interval
+            if should_log:
+                _pool_stats['last_log'] = now
+        if should_log:
+            status = get_pool_status(engine)
+            logger.info(
+                "DB pool: size=%s checked_out=%s overflow=%s checkouts=%s connects=%s",
+                status['size'], status['checked_out'], status['overflow'],
+                status['checkouts'], status['connects']
+            )
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        with _pool_lock:
+            _pool_stats['checkins'] += 1
+
+
+def get_pool_status(engine=None):
+    """Текущее состояние пула подключений"""
+    pool = (engine or db.engine).pool
+    with _pool_lock:
+        stats = dict(_pool_stats)
+
+    def _call(name):
+        method = getattr(pool, name, None)
+        return method() if callable(method) else None
 
+    return {
+        'pool_class': type(pool).__name__,
+        'size': _call('size'),
+        'checked_in': _call('checkedin'),
+        'checked_out': _call('checkedout'),
+        'overflow': _call('overflow'),
+        'checkouts': stats['checkouts'],
+        'checkins': stats['checkins'],
+        'connects': stats['connects'],
+        'wait_ms_total': round(stats['wait_seconds'] * 1000, 1),
+        'max_wait_ms': round(stats['max_wait_seconds'] * 1000, 1),
+    }
@@ -1,4 +1,8 @@
 -- Удаление существующих таблиц (если нужна переустановка)
+DROP TABLE IF EXISTS schema_version CASCADE;
+DROP TABLE IF EXISTS schedule_tasks CASCADE;
+DROP TABLE IF EXISTS product_manufacturing_summary CASCADE;
+DROP TABLE IF EXISTS product_parameters CASCADE;
 DROP TABLE IF EXISTS product_workshops CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
 DROP TABLE IF EXISTS product_types CASCADE;
@@ -102,14 +106,103 @@ CREATE TABLE product_workshops (
         ON UPDATE CASCADE
 );
 
+-- ============================================================================
+-- ТАБЛИЦА: product_manufacturing_summary (Сводка маршрута продукта)
+-- Описание: суммарное время, число цехов и цех - «узкое место»;
+-- обновляется приложением вместе с product_workshops
+-- (пересборка: flask products rebuild-summary)
+-- ============================================================================
+CREATE TABLE product_manufacturing_summary (
+    product_id INT PRIMARY KEY,
+    total_hours DECIMAL(10, 2) NOT NULL,
+    workshop_count INT NOT NULL,
+    bottleneck_workshop_id INT NOT NULL,
+    bottleneck_hours DECIMAL(8, 2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_manufacturing_summary_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
+    CONSTRAINT fk_manufacturing_summary_workshop
+        FOREIGN KEY (bottleneck_workshop_id)
+        REFERENCES workshops(workshop_id)
+        ON DELETE RESTRICT
+        ON UPDATE CASCADE
+);
+
+-- ============================================================================
+-- ТАБЛИЦА: product_parameters (Параметры продукции)
+-- Описание: размеры изделия (см) для расчета сырья; один набор на продукт
+-- Связи: FK на products, FK на product_types
+-- ============================================================================
+CREATE TABLE product_parameters (
+    product_parameter_id SERIAL PRIMARY KEY,
+    product_id INT NOT NULL UNIQUE,
+    product_type_id INT NOT NULL,
+    parameter1_name VARCHAR(100) DEFAULT 'Длина',
+    parameter1_value DOUBLE PRECISION NOT NULL CHECK (parameter1_value > 0),
+    parameter2_name VARCHAR(100) DEFAULT 'Ширина',
+    parameter2_value DOUBLE PRECISION NOT NULL CHECK (parameter2_value > 0),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_product_parameters_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
+    CONSTRAINT fk_product_parameters_product_type
+        FOREIGN KEY (product_type_id)
+        REFERENCES product_types(product_type_id)
+        ON DELETE RESTRICT
+        ON UPDATE CASCADE
+);
+
+-- ============================================================================
+-- ТАБЛИЦА: schedule_tasks (Задачи планирования)
+-- Описание: состояние и результат фоновых расчетов расписания, общие для всех
+-- процессов веб-сервера; время - секунды Unix, результат - JSON
+-- ============================================================================
+CREATE TABLE schedule_tasks (
+    task_id VARCHAR(32) PRIMARY KEY,
+    status VARCHAR(16) NOT NULL,
+    submitted_at DOUBLE PRECISION NOT NULL,
+    started_at DOUBLE PRECISION,
+    finished_at DOUBLE PRECISION,
+    error TEXT,
+    result TEXT
+);
+
+-- ============================================================================
+-- ТАБЛИЦА: schema_version (Версия схемы)
+-- Описание: проверяется приложением при старте вместо создания таблиц
+-- ============================================================================
+CREATE TABLE schema_version (
+    version INT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (version) VALUES (6);
+
 -- ============================================================================
 -- ИНДЕКСЫ для оптимизации запросов
 -- ============================================================================
 CREATE INDEX idx_products_product_type_id ON products(product_type_id);
 CREATE INDEX idx_products_material_type_id ON products(material_type_id);
 CREATE INDEX idx_products_article_number ON products(article_number);
+-- Keyset-пагинация списка продукции: сортировка по цене с product_id для однозначности
+CREATE INDEX idx_products_price_id ON products(minimum_partner_price, product_id);
+-- Индекс поиска продукции дочитывает изменения по updated_at
+CREATE INDEX idx_products_updated_at ON products(updated_at);
 CREATE INDEX idx_product_workshops_product_id ON product_workshops(product_id);
 CREATE INDEX idx_product_workshops_workshop_id ON product_workshops(workshop_id);
+-- Фильтр и keyset-сортировка списка продукции по времени производства
+CREATE INDEX idx_manufacturing_summary_hours_id ON product_manufacturing_summary(total_hours, product_id);
+-- Очистка старых результатов планирования
+CREATE INDEX idx_schedule_tasks_finished_at ON schedule_tasks(finished_at);
 
 -- ============================================================================
 -- КОММЕНТАРИИ К ТАБЛИЦАМ И ПОЛЯМ
@@ -326,6 +419,20 @@ INSERT INTO product_workshops (product_id, workshop_id, manufacturing_time_hours
 ((SELECT product_id FROM products WHERE article_number = 4033136), (SELECT workshop_id FROM workshops WHERE workshop_name = 'Упаковки'), 0.2),
 ((SELECT product_id FROM products WHERE article_number = 4028048), (SELECT workshop_id FROM workshops WHERE workshop_name = 'Упаковки'), 0.3);
 
+-- Сводка маршрутов по загруженным данным
+INSERT INTO product_manufacturing_summary
+    (product_id, total_hours, workshop_count, bottleneck_workshop_id, bottleneck_hours)
+SELECT pw.product_id,
+       SUM(pw.manufacturing_time_hours),
+       COUNT(*),
+       (SELECT b.workshop_id FROM product_workshops b
+        WHERE b.product_id = pw.product_id
+        ORDER BY b.manufacturing_time_hours DESC, b.workshop_id
+        LIMIT 1),
+       MAX(pw.manufacturing_time_hours)
+FROM product_workshops pw
+GROUP BY pw.product_id;
+
 -- ============================================================================
 -- ПРОВЕРКА ИМПОРТА ДАННЫХ
 -- ============================================================================
@@ -0,0 +1,48 @@
+"""
+Конфигурация gunicorn для продакшена:
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Приложение и кэши загружаются в мастер-процессе до fork (preload_app),
+после fork каждый воркер сбрасывает унаследованный пул подключений,
+по SIGTERM воркеры перестают принимать запросы и дожидаются текущих
+(не дольше WEB_GRACEFUL_TIMEOUT).
+Параметры - переменные окружения WEB_* (см. config.py).
+"""
+import multiprocessing
+
+from config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS or multiprocessing.cpu_count() * 2 + 1
+threads = Config.WEB_THREADS
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+max_requests = Config.WEB_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+preload_app = True
+accesslog = '-'
+
+
+def _engine():
+    """Engine приложения, загруженного в мастер-процессе (preload_app)"""
+    from database import db
+    from wsgi import app
+
+    with app.app_context():
+        return db.engine
+
+
+def post_fork(server, worker):
+    # Подключения из пула мастера не закрываем (они общие с родителем),
+    # а только забываем - воркер откроет свои
+    _engine().dispose(close=False)
+    server.log.info("Воркер %s: пул подключений сброшен после fork", worker.pid)
+
+
+def worker_exit(server, worker):
+    from services.schedule_worker import schedule_worker
+
+    # Текущие расчеты расписания дожидаются, очередь отменяется
+    schedule_worker.shutdown(wait=True)
+    _engine().dispose()
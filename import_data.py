@@ -0,0 +1,60 @@
+"""
+Массовая загрузка данных в БД furniture_company из CSV/XLSX
+
+Примеры:
+    python import_data.py --material-types materials.xlsx --product-types product_types.xlsx \
+        --workshops workshops.xlsx --products products.xlsx --product-workshops routes.csv
+    python import_data.py --product-workshops routes.csv --chunk-size 100000
+    python import_data.py --product-parameters parameters.csv
+
+Файлы загружаются в порядке зависимостей (справочники -> продукция -> маршруты).
+Существующие строки обновляются по естественному ключу
+(название, артикул, пара продукт+цех). Внешние ключи в файлах указываются
+названиями (product_type, material_type, workshop_name) или артикулом (article_number).
+Параметры продукции (размеры для расчета сырья): article_number, parameter1_value,
+parameter2_value (см), необязательно parameter1_name / parameter2_name.
+"""
+import argparse
+import json
+import logging
+import sys
+
+from app import create_app
+from database import db
+from services.import_service import BulkImportService
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Массовая загрузка данных из CSV/XLSX')
+    for entity in BulkImportService.ENTITIES:
+        parser.add_argument('--' + entity.replace('_', '-'), dest=entity, metavar='FILE')
+    parser.add_argument('--chunk-size', type=int, default=50000, help='Строк в одной пачке')
+    parser.add_argument('--method', choices=['auto', 'insert', 'copy'], default='auto',
+                        help='Способ записи маршрутов: COPY (PostgreSQL) или INSERT ... ON CONFLICT')
+    args = parser.parse_args()
+
+    files = [(entity, getattr(args, entity)) for entity in BulkImportService.ENTITIES if getattr(args, entity)]
+    if not files:
+        parser.error('Укажите хотя бы один файл для загрузки')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+
+    app = create_app()
+    failed = False
+    with app.app_context():
+        service = BulkImportService(db.session, chunk_size=args.chunk_size, method=args.method)
+        for entity, path in files:
+            try:
+                stats = service.load(entity, path)
+            except Exception as e:
+                db.session.rollback()
+                print(json.dumps({'entity': entity, 'file': path, 'error': str(e)}, ensure_ascii=False))
+                failed = True
+                break
+            print(json.dumps(stats, ensure_ascii=False))
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Метрики приложения в формате Prometheus (GET /api/metrics):
+задержки по эндпоинтам, SQL-запросы на запрос, медленные запросы, пул подключений
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+from flask import Response, g, request
+from sqlalchemy import event
+
+slow_query_logger = logging.getLogger('metrics.slow_query')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Гистограмма Prometheus: накопительные бакеты, сумма и количество"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # последний - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels, lines):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(labels)} {self.sum}')
+        lines.append(f'{name}_count{_labels(labels)} {self.count}')
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
+
+
+class Metrics:
+    """
+    Метрики процесса. Обновляются под одной блокировкой короткими операциями;
+    SQL внутри запроса считается в потоковом контексте без блокировки.
+    При нескольких воркерах gunicorn каждый процесс отдает свои метрики.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.latency = {}       # (endpoint, method) -> Histogram
+        self.requests = {}      # (endpoint, method, status) -> count
+        self.statements = {}    # endpoint -> Histogram (SQL-запросов на HTTP-запрос)
+        self.db_time = {}       # endpoint -> Histogram (время SQL на HTTP-запрос)
+        self.sql_statements_total = 0
+        self.sql_seconds_total = 0.0
+        self.slow_queries_total = 0
+        self.slow_query_seconds = 0.5
+
+    # ===== SQL (события engine) =====
+
+    def register_engine(self, engine, slow_query_seconds):
+        self.slow_query_seconds = slow_query_seconds
+
+        # Одно время старта на подключение: запросы на подключении идут по одному,
+        # после запроса с ошибкой (after_cursor_execute не вызывается) его перезапишет следующий
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info['metrics_query_start'] = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop('metrics_query_start', None)
+            if started is not None:
+                self._record_statement(statement, parameters, time.perf_counter() - started)
+
+    def _record_statement(self, statement, parameters, elapsed):
+        current = getattr(self._local, 'request', None)
+        if current is not None:
+            current[0] += 1
+            current[1] += elapsed
+        with self._lock:
+            self.sql_statements_total += 1
+            self.sql_seconds_total += elapsed
+            slow = elapsed >= self.slow_query_seconds
+            if slow:
+                self.slow_queries_total += 1
+        if slow:
+            slow_query_logger.warning(
+                "Медленный запрос %.1f мс: %s | параметры: %.1000r",
+                elapsed * 1000, ' '.join(statement.split()), parameters
+            )
+
+    # ===== HTTP-запросы =====
+
+    def start_request(self):
+        self._local.request = [0, 0.0]
+        g.metrics_started = time.perf_counter()
+
+    def finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        current = getattr(self._local, 'request', None)
+        self._local.request = None
+        if started is None:
+            return response
+
+        elapsed = time.perf_counter() - started
+        endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        method = request.method
+        statements, db_seconds = current or (0, 0.0)
+
+        with self._lock:
+            key = (endpoint, method)
+            histogram = self.latency.get(key)
+            if histogram is None:
+                histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.statements[key] = Histogram(STATEMENT_BUCKETS)
+                self.db_time[key] = Histogram(DB_TIME_BUCKETS)
+            histogram.observe(elapsed)
+            self.statements[key].observe(statements)
+            self.db_time[key].observe(db_seconds)
+            status_key = (endpoint, method, response.status_code)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        return response
+
+    # ===== Экспорт =====
+
+    def render(self) -> str:
+        from database import get_pool_status
+        from services.reference_cache import reference_cache
+
+        lines = []
+        with self._lock:
+            lines.append('# HELP http_request_duration_seconds Время обработки запроса')
+            lines.append('# TYPE http_request_duration_seconds histogram')
+            for (endpoint, method), histogram in sorted(self.latency.items()):
+                histogram.render('http_request_duration_seconds', {'endpoint': endpoint, 'method': method}, lines)
+
+            lines.append('# HELP http_requests_total Запросы по статусу ответа')
+            lines.append('# TYPE http_requests_total counter')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels({"endpoint": endpoint, "method": method, "status": status})} {count}')
+
+            lines.append('# HELP http_request_sql_statements SQL-запросов на один HTTP-запрос')
+            lines.append('# TYPE http_request_sql_statements histogram')
+            for (endpoint, method), histogram in sorted(self.statements.items()):
+                histogram.render('http_request_sql_statements', {'endpoint': endpoint, 'method': method}, lines)
+
+            lines.append('# HELP http_request_db_seconds Время SQL за один HTTP-запрос')
+            lines.append('# TYPE http_request_db_seconds histogram')
+            for (endpoint, method), histogram in sorted(self.db_time.items()):
+                histogram.render('http_request_db_seconds', {'endpoint': endpoint, 'method': method}, lines)
+
+            lines.append('# TYPE db_statements_total counter')
+            lines.append(f'db_statements_total {self.sql_statements_total}')
+            lines.append('# TYPE db_statement_seconds_total counter')
+            lines.append(f'db_statement_seconds_total {self.sql_seconds_total}')
+            lines.append('# HELP db_slow_queries_total Запросы дольше SLOW_QUERY_MS')
+            lines.append('# TYPE db_slow_queries_total counter')
+            lines.append(f'db_slow_queries_total {self.slow_queries_total}')
+
+        pool = get_pool_status()
+        for name in ('size', 'checked_in', 'checked_out', 'overflow'):
+            if pool[name] is not None:
+                lines.append(f'# TYPE db_pool_{name} gauge')
+                lines.append(f'db_pool_{name} {pool[name]}')
+        for name in ('checkouts', 'connects'):
+            lines.append(f'# TYPE db_pool_{name}_total counter')
+            lines.append(f'db_pool_{name}_total {pool[name]}')
+        lines.append('# HELP db_pool_wait_seconds_total Время получения подключений из пула')
+        lines.append('# TYPE db_pool_wait_seconds_total counter')
+        lines.append(f"db_pool_wait_seconds_total {pool['wait_ms_total'] / 1000}")
+
+        cache = reference_cache.stats()
+        for name in ('hits', 'misses', 'stamp_checks'):
+            lines.append(f'# TYPE reference_cache_{name}_total counter')
+            lines.append(f'reference_cache_{name}_total {cache[name]}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def init_metrics(app):
+    """
+    Подключить метрики: хуки запроса, события engine и GET /api/metrics.
+    Вызывается после init_db (нужен engine).
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    from database import db
+
+    with app.app_context():
+        metrics.register_engine(db.engine, app.config['SLOW_QUERY_MS'] / 1000)
+
+    app.before_request(metrics.start_request)
+    app.after_request(metrics.finish_request)
+
+    def metrics_endpoint():
+        """GET /api/metrics - метрики в текстовом формате Prometheus"""
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    app.add_url_rule('/api/metrics', 'metrics', metrics_endpoint, methods=['GET'])
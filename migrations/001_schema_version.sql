@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Миграция схемы: таблица schema_version для БД, созданных исходным
+-- furniture_company.sql (без таблицы версии) - такая схема считается версией 1.
+-- Выполняется первой; на БД, где таблица уже есть, ничего не меняет.
+-- (для новой БД достаточно furniture_company.sql)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (version)
+SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM schema_version);
@@ -0,0 +1,42 @@
+-- ============================================================================
+-- Миграция схемы 1 -> 2: сводка маршрутов продукции
+-- (для новой БД достаточно furniture_company.sql)
+-- ============================================================================
+CREATE TABLE product_manufacturing_summary (
+    product_id INT PRIMARY KEY,
+    total_hours DECIMAL(10, 2) NOT NULL,
+    workshop_count INT NOT NULL,
+    bottleneck_workshop_id INT NOT NULL,
+    bottleneck_hours DECIMAL(8, 2) NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_manufacturing_summary_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
+    CONSTRAINT fk_manufacturing_summary_workshop
+        FOREIGN KEY (bottleneck_workshop_id)
+        REFERENCES workshops(workshop_id)
+        ON DELETE RESTRICT
+        ON UPDATE CASCADE
+);
+
+CREATE INDEX idx_manufacturing_summary_total_hours ON product_manufacturing_summary(total_hours);
+
+-- Начальное заполнение (то же, что flask products rebuild-summary)
+INSERT INTO product_manufacturing_summary
+    (product_id, total_hours, workshop_count, bottleneck_workshop_id, bottleneck_hours)
+SELECT pw.product_id,
+       SUM(pw.manufacturing_time_hours),
+       COUNT(*),
+       (SELECT b.workshop_id FROM product_workshops b
+        WHERE b.product_id = pw.product_id
+        ORDER BY b.manufacturing_time_hours DESC, b.workshop_id
+        LIMIT 1),
+       MAX(pw.manufacturing_time_hours)
+FROM product_workshops pw
+GROUP BY pw.product_id;
+
+INSERT INTO schema_version (version) VALUES (2);
@@ -0,0 +1,28 @@
+-- ============================================================================
+-- Миграция схемы 2 -> 3: параметры продукции для расчета сырья
+-- (для новой БД достаточно furniture_company.sql)
+-- ============================================================================
+CREATE TABLE product_parameters (
+    product_parameter_id SERIAL PRIMARY KEY,
+    product_id INT NOT NULL UNIQUE,
+    product_type_id INT NOT NULL,
+    parameter1_name VARCHAR(100) DEFAULT 'Длина',
+    parameter1_value DOUBLE PRECISION NOT NULL CHECK (parameter1_value > 0),
+    parameter2_name VARCHAR(100) DEFAULT 'Ширина',
+    parameter2_value DOUBLE PRECISION NOT NULL CHECK (parameter2_value > 0),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT fk_product_parameters_product
+        FOREIGN KEY (product_id)
+        REFERENCES products(product_id)
+        ON DELETE CASCADE
+        ON UPDATE CASCADE,
+
+    CONSTRAINT fk_product_parameters_product_type
+        FOREIGN KEY (product_type_id)
+        REFERENCES product_types(product_type_id)
+        ON DELETE RESTRICT
+        ON UPDATE CASCADE
+);
+
+INSERT INTO schema_version (version) VALUES (3);
@@ -0,0 +1,8 @@
+-- ============================================================================
+-- Миграция схемы 3 -> 4: индекс по products.updated_at
+-- (для новой БД достаточно furniture_company.sql)
+-- Индекс поиска продукции дочитывает изменения по updated_at
+-- ============================================================================
+CREATE INDEX idx_products_updated_at ON products(updated_at);
+
+INSERT INTO schema_version (version) VALUES (4);
@@ -0,0 +1,13 @@
+-- ============================================================================
+-- Миграция схемы 4 -> 5: индексы keyset-пагинации списка продукции
+-- (для новой БД достаточно furniture_company.sql)
+-- ============================================================================
+-- Сортировка по цене: в БД, созданных до появления индекса, его нет
+CREATE INDEX IF NOT EXISTS idx_products_price_id ON products(minimum_partner_price, product_id);
+
+-- Сортировка по времени производства: (total_hours, product_id) вместо одной колонки,
+-- порядок NULL (продукты без маршрута) задается в запросе явно
+DROP INDEX IF EXISTS idx_manufacturing_summary_total_hours;
+CREATE INDEX idx_manufacturing_summary_hours_id ON product_manufacturing_summary(total_hours, product_id);
+
+INSERT INTO schema_version (version) VALUES (5);
@@ -0,0 +1,17 @@
+-- ============================================================================
+-- Миграция схемы 5 -> 6: задачи планирования в БД
+-- (для новой БД достаточно furniture_company.sql)
+-- Состояние расчетов расписания видно из любого процесса веб-сервера
+-- ============================================================================
+CREATE TABLE schedule_tasks (
+    task_id VARCHAR(32) PRIMARY KEY,
+    status VARCHAR(16) NOT NULL,
+    submitted_at DOUBLE PRECISION NOT NULL,
+    started_at DOUBLE PRECISION,
+    finished_at DOUBLE PRECISION,
+    error TEXT,
+    result TEXT
+);
+CREATE INDEX idx_schedule_tasks_finished_at ON schedule_tasks(finished_at);
+
+INSERT INTO schema_version (version) VALUES (6);
@@ -1,6 +1,8 @@
-from .product import db as product_db, Product, ProductType, MaterialType
-from .workshop import Workshop, ProductWorkshop
-from .material import ProductType, MaterialType, ProductParameter
+from database import db
+from .product import Product, ProductType, MaterialType
+from .workshop import Workshop, ProductWorkshop, ProductManufacturingSummary
+from .material import ProductParameter
+from .schedule import ScheduleTask
 
 
-__all__ = ['Product', 'ProductType', 'MaterialType', 'Workshop', 'ProductWorkshop', 'product_db']
+__all__ = ['Product', 'ProductType', 'MaterialType', 'Workshop', 'ProductWorkshop', 'ProductManufacturingSummary', 'ProductParameter', 'ScheduleTask', 'db']
@@ -1,7 +1,8 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
-db = SQLAlchemy()
+from sqlalchemy import func
+
+from database import db
 
 
 class ProductType(db.Model):
@@ -11,7 +12,14 @@ class ProductType(db.Model):
     product_type_name = db.Column(db.String(255), nullable=False, unique=True)
     product_type_coefficient = db.Column(db.Numeric(10, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
+    def to_dict(self):
+        return {
+            'product_type_id': self.product_type_id,
+            'product_type_name': self.product_type_name,
+            'coefficient': float(self.product_type_coefficient)
+        }
 
 
 class MaterialType(db.Model):
@@ -21,11 +29,26 @@ class MaterialType(db.Model):
     material_type_name = db.Column(db.String(255), nullable=False, unique=True)
     raw_material_loss_percent = db.Column(db.Numeric(5, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
+    def to_dict(self):
+        return {
+            'material_type_id': self.material_type_id,
+            'material_type_name': self.material_type_name,
+            'loss_percentage': float(self.raw_material_loss_percent)
+        }
 
 
 class Product(db.Model):
     __tablename__ = 'products'
+    # Индексы - как в furniture_company.sql (для БД, созданной через create_all)
+    __table_args__ = (
+        db.Index('idx_products_product_type_id', 'product_type_id'),
+        db.Index('idx_products_material_type_id', 'material_type_id'),
+        db.Index('idx_products_article_number', 'article_number'),
+        db.Index('idx_products_price_id', 'minimum_partner_price', 'product_id'),
+        db.Index('idx_products_updated_at', 'updated_at'),
+    )
 
     product_id = db.Column(db.Integer, primary_key=True)
     product_type_id = db.Column(db.Integer, db.ForeignKey('product_types.product_type_id'), nullable=False)
@@ -34,7 +57,7 @@ class Product(db.Model):
     minimum_partner_price = db.Column(db.Numeric(12, 2), nullable=False)
     material_type_id = db.Column(db.Integer, db.ForeignKey('material_types.material_type_id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
 
     product_type = db.relationship("ProductType")
     material_type = db.relationship("MaterialType")
@@ -0,0 +1,17 @@
+from database import db
+
+
+class ScheduleTask(db.Model):
+    """Задача расчета расписания (см. services/schedule_worker.py)"""
+    __tablename__ = 'schedule_tasks'
+    __table_args__ = (
+        db.Index('idx_schedule_tasks_finished_at', 'finished_at'),
+    )
+
+    task_id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.String(16), nullable=False)  # queued / running / done / failed
+    submitted_at = db.Column(db.Float, nullable=False)  # секунды Unix
+    started_at = db.Column(db.Float)
+    finished_at = db.Column(db.Float)
+    error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON результата
@@ -1,7 +1,8 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
 
-db = SQLAlchemy()
+from sqlalchemy import func
+
+from database import db
 
 
 class Workshop(db.Model):
@@ -12,22 +13,46 @@ class Workshop(db.Model):
     workshop_type = db.Column(db.String(100), nullable=False)
     staff_count = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
 
     # ✅ ДОБАВЛЕНО: обратное relationship
-    product_workshops = db.relationship('ProductWorkshop', back_populates='workshop', lazy='joined')
+    # lazy='select': список цехов не должен тянуть JOIN-ом все строки маршрутов
+    product_workshops = db.relationship('ProductWorkshop', back_populates='workshop', lazy='select')
 
 
 class ProductWorkshop(db.Model):
     __tablename__ = 'product_workshops'
+    __table_args__ = (
+        db.Index('idx_product_workshops_product_id', 'product_id'),
+        db.Index('idx_product_workshops_workshop_id', 'workshop_id'),
+    )
 
     product_workshop_id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.product_id'), nullable=False)
     workshop_id = db.Column(db.Integer, db.ForeignKey('workshops.workshop_id'), nullable=False)
     manufacturing_time_hours = db.Column(db.Numeric(8, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
 
     # ✅ ИСПРАВЛЕНО: добавлены back_populates и lazy
     workshop = db.relationship('Workshop', back_populates='product_workshops', lazy='joined')
 
+
+
+class ProductManufacturingSummary(db.Model):
+    """
+    Сводка маршрута продукта: суммарное время, число цехов и «узкое место»
+    (цех с наибольшим временем). Поддерживается ManufacturingSummaryService
+    при каждой записи в product_workshops, в той же транзакции.
+    """
+    __tablename__ = 'product_manufacturing_summary'
+    __table_args__ = (
+        db.Index('idx_manufacturing_summary_hours_id', 'total_hours', 'product_id'),
+    )
+
+    product_id = db.Column(db.Integer, db.ForeignKey('products.product_id', ondelete='CASCADE'), primary_key=True)
+    total_hours = db.Column(db.Numeric(10, 2), nullable=False)
+    workshop_count = db.Column(db.Integer, nullable=False)
+    bottleneck_workshop_id = db.Column(db.Integer, db.ForeignKey('workshops.workshop_id'), nullable=False)
+    bottleneck_hours = db.Column(db.Numeric(8, 2), nullable=False)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
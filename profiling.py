@@ -0,0 +1,197 @@
+"""
+Профилирование отдельных запросов по требованию (cProfile + SQL-запросы с временем).
+
+Запрос профилируется, если:
+    - передан заголовок X-Profile: <PROFILE_TOKEN> (только заголовок: параметр URL
+      попадал бы в логи прокси и истории браузера);
+    - или он попал в случайную выборку PROFILE_SAMPLE_RATE (доля запросов, 0..1).
+
+Потоковые ответы (выгрузки /export) профилируются только до возврата генератора
+из view: профиль закрывается в after_request, до отдачи тела, поэтому чтение БД
+и сериализация при отдаче в него не попадают.
+
+Результат сохраняется в PROFILE_DIR: <id>.prof (pstats, открывается snakeviz / pstats)
+и <id>.json (запрос, время, SQL с параметрами и временем, топ функций).
+Хранятся последние PROFILE_MAX_FILES профилей. Имя профиля возвращается
+в заголовке ответа X-Profile-Id.
+
+Без PROFILE_TOKEN и с PROFILE_SAMPLE_RATE = 0 хуки не подключаются вовсе.
+"""
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+# Прежний параметр включения профиля; больше не принимается и вырезается из сохраняемого пути
+PROFILE_ARG = '_profile'
+TOP_FUNCTIONS = 40
+
+
+class RequestProfiler:
+    """
+    Профилировщик запросов процесса. Одновременно профилируется один запрос:
+    cProfile (sys.monitoring в Python 3.12+) допускает только один активный профилировщик,
+    остальные запросы в это время выполняются без профиля.
+    """
+
+    def __init__(self, directory, max_files, token=None, sample_rate=0.0):
+        self.directory = directory
+        self.max_files = max_files
+        self.token = token
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+        self._local = threading.local()
+
+    # ===== SQL (события engine) =====
+
+    def register_engine(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if getattr(self._local, 'statements', None) is not None:
+                conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements = getattr(self._local, 'statements', None)
+            starts = conn.info.get('profile_query_start')
+            if statements is None or not starts:
+                return
+            statements.append({
+                'ms': round((time.perf_counter() - starts.pop()) * 1000, 3),
+                'statement': ' '.join(statement.split()),
+                'parameters': f'{parameters!r:.1000}',
+                'executemany': executemany,
+            })
+
+    # ===== HTTP-запросы =====
+
+    def wanted(self) -> bool:
+        """Профилировать ли текущий запрос"""
+        if self.token:
+            supplied = request.headers.get(PROFILE_HEADER)
+            if supplied and hmac.compare_digest(supplied, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def start(self):
+        if not self.wanted() or not self._busy.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:  # профилировщик уже активен (отладчик, другой инструмент)
+            self._busy.release()
+            logger.warning("Профилирование запроса пропущено: %s", e)
+            return
+        self._local.statements = []
+        g.profile = (profile, time.perf_counter())
+
+    def finish(self, response):
+        started = g.pop('profile', None)
+        if started is None:
+            return response
+        profile, started_at = started
+        profile.disable()
+        elapsed = time.perf_counter() - started_at
+        statements, self._local.statements = self._local.statements, None
+        self._busy.release()
+
+        try:
+            profile_id = self._save(profile, elapsed, statements, response.status_code)
+            response.headers['X-Profile-Id'] = profile_id
+        except OSError as e:
+            logger.error("Не удалось сохранить профиль запроса: %s", e)
+        return response
+
+    def abort(self, exc=None):
+        """teardown: запрос завершился исключением до after_request"""
+        started = g.pop('profile', None)
+        if started is not None:
+            started[0].disable()
+            self._local.statements = None
+            self._busy.release()
+
+    # ===== Сохранение =====
+
+    def _save(self, profile, elapsed, statements, status) -> str:
+        endpoint = re.sub(r'[^A-Za-z0-9]+', '_', request.url_rule.rule if request.url_rule else 'unmatched').strip('_')
+        profile_id = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{request.method}_{endpoint or 'root'}"
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, profile_id)
+
+        profile.dump_stats(base + '.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump({
+                'id': profile_id,
+                'method': request.method,
+                'path': _stored_path(),
+                'endpoint': request.url_rule.rule if request.url_rule else None,
+                'status': status,
+                'duration_ms': round(elapsed * 1000, 3),
+                'sql_count': len(statements),
+                'sql_ms': round(sum(item['ms'] for item in statements), 3),
+                'sql': statements,
+                'top_functions': summary.getvalue(),
+            }, f, ensure_ascii=False, indent=2)
+
+        self._rotate()
+        logger.info("Профиль запроса %s %s: %.1f мс, SQL %d -> %s",
+                    request.method, request.path, elapsed * 1000, len(statements), base)
+        return profile_id
+
+    def _rotate(self):
+        """Оставить последние max_files профилей"""
+        names = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
+        for name in names[:max(0, len(names) - self.max_files)]:
+            for extension in ('.json', '.prof'):
+                try:
+                    os.remove(os.path.join(self.directory, name + extension))
+                except FileNotFoundError:
+                    pass
+
+
+def _stored_path():
+    """Путь запроса с параметрами для профиля, без PROFILE_ARG (в нем мог быть токен)"""
+    args = [(key, value) for key, value in request.args.items(multi=True) if key != PROFILE_ARG]
+    return request.path + ('?' + urlencode(args) if args else '')
+
+
+def init_profiling(app):
+    """
+    Подключить профилирование запросов (если задан PROFILE_TOKEN или PROFILE_SAMPLE_RATE > 0).
+    Вызывается после init_db (нужен engine).
+    """
+    token = app.config.get('PROFILE_TOKEN')
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+    if not token and sample_rate <= 0:
+        return None
+
+    from database import db
+
+    profiler = RequestProfiler(app.config['PROFILE_DIR'], app.config['PROFILE_MAX_FILES'], token, sample_rate)
+    with app.app_context():
+        profiler.register_engine(db.engine)
+
+    app.before_request(profiler.start)
+    app.after_request(profiler.finish)
+    app.teardown_request(profiler.abort)
+    app.extensions['request_profiler'] = profiler
+    return profiler
@@ -0,0 +1,93 @@
+"""
+Условные GET-запросы (ETag / Last-Modified) для справочников
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, make_response, request
+from werkzeug.http import parse_date, parse_etags
+from compression import ENCODINGS, encoded_etag
+from database import get_db, get_change_stamp
+
+
+def _to_datetime(value):
+    """MAX(updated_at) -> datetime в UTC (SQLite возвращает строку)"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def evaluate_conditional(path, stamp, if_none_match=None, if_modified_since=None):
+    """
+    Валидаторы ответа справочника по отметке изменений таблиц и проверка условного запроса
+    (общая для Flask-приложения и async_app).
+
+    If-None-Match совпадает со строгим ETag или с ETag его сжатого представления
+    ("<etag>-gzip", см. compression.py); If-Modified-Since учитывается только без If-None-Match.
+
+    Args:
+        path: путь запроса (входит в ETag)
+        stamp: результат get_change_stamp
+        if_none_match, if_modified_since: значения заголовков запроса (None - нет заголовка)
+
+    Returns:
+        (etag, last_modified, matched): matched - ETag для ответа 304 или None, если нужен полный ответ
+    """
+    etag = hashlib.sha1(repr((path, stamp)).encode('utf-8')).hexdigest()
+    modified = [_to_datetime(value) for value in stamp[1::2] if value is not None]
+    last_modified = max(modified) if modified else None
+
+    etags = parse_etags(if_none_match)
+    if etags:
+        matched = next((candidate for candidate in [etag, *(encoded_etag(etag, e) for e in ENCODINGS)]
+                        if candidate in etags), None)
+        return etag, last_modified, matched
+
+    since = parse_date(if_modified_since)
+    if since and last_modified and last_modified <= since:
+        return etag, last_modified, etag
+    return etag, last_modified, None
+
+
+def conditional_get(*tables):
+    """
+    Декоратор GET-эндпоинта справочника.
+
+    Перед выполнением view считается отметка изменений таблиц (COUNT + MAX(updated_at),
+    один легкий запрос). Если запрос условный и данные не изменились (evaluate_conditional) -
+    сразу 304 без чтения таблицы и сериализации. Иначе ответ view дополняется ETag и Last-Modified.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                stamp = get_change_stamp(get_db(), tables)
+            except Exception:
+                # Отметку получить не удалось - отдаем обычный ответ
+                return view(*args, **kwargs)
+
+            etag, last_modified, matched = evaluate_conditional(
+                request.path, stamp, request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')
+            )
+
+            if matched:
+                # 304 повторяет ETag того представления, которое есть у клиента
+                response = Response(status=304)
+                response.set_etag(matched)
+                response.vary.add('Accept-Encoding')
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                response.set_etag(etag)
+
+            if last_modified:
+                response.last_modified = last_modified
+            # Кэшировать можно, но перед использованием браузер обязан перепроверить
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
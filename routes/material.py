@@ -2,9 +2,12 @@
 """
 API эндпоинты для расчета необходимого сырья (ЗАДАНИЕ 4)
 """
+import json
 from flask import Blueprint, request, jsonify
 from services.material_service import MaterialCalculationService
+from services.production_plan import parse_plan
 from database import get_db
+from routes.conditional import conditional_get
 
 material_bp = Blueprint('material', __name__, url_prefix='/api/material')
 
@@ -91,7 +94,123 @@ def calculate_raw_material():
         }), 500
 
 
+@material_bp.route('/calculate-raw-material/batch', methods=['POST'])
+def calculate_raw_material_batch():
+    """
+    POST /api/material/calculate-raw-material/batch
+    
+    Пакетный расчет сырья для множества строк плана за один запрос.
+    Справочники читаются один раз, расчет выполняется векторно.
+    
+    Request Body (JSON): массив строк или {"items": [...]}
+    [
+        {"product_type_id": 1, "material_type_id": 2, "quantity": 10,
+         "parameter1": 2.5, "parameter2": 3.0},
+        ...
+    ]
+    Либо NDJSON (Content-Type: application/x-ndjson) - одна строка JSON на строку плана.
+    
+    Response (200):
+    {
+        "success": true,
+        "count": 2,
+        "error_count": 1,
+        "results": [
+            {"index": 0, "raw_material_quantity": 104},
+            {"index": 1, "raw_material_quantity": -1, "error": "unknown_material_type"}
+        ]
+    }
+    
+    Коды ошибок строк: invalid_input, unknown_product_type, unknown_material_type
+    """
+    try:
+        lines = _read_batch_lines()
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    if len(lines) > MaterialCalculationService.MAX_BATCH_SIZE:
+        return jsonify({
+            'success': False,
+            'error': f'Too many lines, max {MaterialCalculationService.MAX_BATCH_SIZE}'
+        }), 400
+
+    try:
+        db_session = get_db()
+        results = MaterialCalculationService.calculate_raw_material_batch(lines, db_session)
+
+        return jsonify({
+            'success': True,
+            'count': len(results),
+            'error_count': sum(1 for r in results if 'error' in r),
+            'results': results
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@material_bp.route('/plan-requirements', methods=['POST'])
+def plan_requirements():
+    """
+    POST /api/material/plan-requirements
+
+    Потребность в сырье по всему плану производства (с учетом потерь),
+    сгруппированная по типам материалов
+
+    Request Body (JSON):
+    {
+        "plan": [{"product_id": 1, "quantity": 100}, ...]   // или {"1": 100, ...}
+    }
+
+    Response (Success - 200):
+    {
+        "success": true,
+        "materials": [
+            {"material_type_id": 1, "material_type_name": "...", "loss_percent": 0.55, "lines": 12,
+             "raw_material_base": 1000.0, "raw_material_loss": 5.5, "raw_material_quantity": 1005.5},
+            ...
+        ],
+        "lines": 2, "lines_calculated": 2,
+        "products_not_found": [], "products_without_parameters": [], "products_unknown_coefficients": []
+    }
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Request body must be JSON object with "plan"'}), 400
+
+    try:
+        plan = parse_plan(data.get('plan'))
+        result = MaterialCalculationService.calculate_plan_requirements(plan, get_db())
+        return jsonify({'success': True, **result}), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+def _read_batch_lines():
+    """Строки пакетного расчета из тела запроса (JSON или NDJSON)"""
+    if request.mimetype == 'application/x-ndjson':
+        lines = []
+        for number, raw in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if not raw.strip():
+                continue
+            try:
+                lines.append(json.loads(raw))
+            except json.JSONDecodeError:
+                raise ValueError(f'Invalid NDJSON at line {number}')
+        return lines
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError('Request body must be a JSON array of lines or {"items": [...]}')
+    return data
+
+
 @material_bp.route('/product-types', methods=['GET'])
+@conditional_get('product_types')
 def get_product_types():
     """
     GET /api/material/product-types
@@ -122,6 +241,7 @@ def get_product_types():
 
 
 @material_bp.route('/material-types', methods=['GET'])
+@conditional_get('material_types')
 def get_material_types():
     """
     GET /api/material/material-types
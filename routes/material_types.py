@@ -1,63 +1,55 @@
 """
 API эндпоинты для работы с типами материалов
-Автоматически определяет имя колонки для потерь
+Колонка потерь определяется один раз при старте (services/material_types_schema.py),
+эндпоинты выполняют готовые запросы без интроспекции
 """
 
+import logging
+
+import click
 from flask import Blueprint, request, jsonify
 from database import get_db
-from sqlalchemy import text, inspect
+from sqlalchemy import text
+from services.material_types_schema import material_types_schema
+from services.reference_cache import reference_cache
+from routes.conditional import conditional_get
 
 material_types_bp = Blueprint('material_types', __name__, url_prefix='/api')
 
-def get_loss_column_name(db):
-    """
-    🔍 Автоматически определяет название колонки потерь
-    """
-    inspector = inspect(db.connection())
-    columns = inspector.get_columns('material_types')
+logger = logging.getLogger(__name__)
 
-    column_names = [col['name'] for col in columns]
-    print(f"📊 Колонки в material_types: {column_names}")
 
-    # Пробуем разные варианты названий
-    possible_names = [
-        'raw_material_loss_percent',
-        'loss_percentage',
-        'loss_percent',
-        'material_loss_percent',
-        'losses',
-        'raw_material_losses'
-    ]
-
-    for name in possible_names:
-        if name in column_names:
-            print(f"✅ Найдена колонка потерь: {name}")
-            return name
+def _statements():
+    """
+    Готовые запросы для material_types (колонка потерь определена при старте,
+    после refresh-schema - заново при перезагрузке кэша справочников)
+    """
+    return material_types_schema.get(get_db())
 
-    # Если ничего не найдено - ищем любую колонку которая может быть потерями
-    for col in column_names:
-        if 'loss' in col.lower() or 'percent' in col.lower():
-            print(f"✅ Найдена похожая колонка: {col}")
-            return col
 
-    raise Exception(f"❌ Не найдена колонка потерь. Доступные: {column_names}")
+@material_types_bp.cli.command('refresh-schema')
+def refresh_schema_command():
+    """
+    После миграции material_types: определить колонку потерь заново во всех процессах.
+    Сдвигает отметку изменений material_types (updated_at) - каждый процесс при следующей
+    сверке кэша справочников (не позже REFERENCE_CACHE_CHECK_INTERVAL секунд) перечитывает
+    справочники и колонки.
+    """
+    db = get_db()
+    loss_column = material_types_schema.refresh(db)['loss_column']
+    db.execute(text("UPDATE material_types SET updated_at = CURRENT_TIMESTAMP"))
+    db.commit()
+    click.echo(f"Колонка потерь: {loss_column}; отметка изменений material_types обновлена")
 
 
 @material_types_bp.route('/material-types', methods=['GET'])
+@conditional_get('material_types')
 def get_material_types():
     """GET /api/material-types - Получить все типы материалов"""
     try:
         db = get_db()
-        loss_col = get_loss_column_name(db)
-
-        # Динамический SQL запрос
-        query = f"""
-        SELECT material_type_id, material_type_name, {loss_col} as loss_percentage
-        FROM material_types 
-        ORDER BY material_type_id
-        """
 
-        result = db.execute(text(query)).fetchall()
+        result = db.execute(_statements()['select']).fetchall()
 
         materials = [{
             'material_type_id': row[0],
@@ -65,25 +57,24 @@ def get_material_types():
             'loss_percentage': float(row[2]) if row[2] else 0
         } for row in result]
 
-        print(f"✅ Возвращаем {len(materials)} типов материалов")
         return jsonify(materials), 200
 
     except Exception as e:
-        print(f"❌ Ошибка GET material-types: {str(e)}")
+        logger.error("Ошибка GET material-types: %s", e)
         return jsonify({'error': str(e)}), 500
 
 
 @material_types_bp.route('/material-types', methods=['POST'])
 def create_material_type():
     """POST /api/material-types - Добавить новый тип материала"""
+    db = get_db()
     try:
         data = request.get_json()
 
         if not data.get('material_type_name') or data.get('loss_percentage') is None:
             return jsonify({'error': 'Заполни все поля'}), 400
 
-        db = get_db()
-        loss_col = get_loss_column_name(db)
+        statements = _statements()
 
         # Проверяем дублирование
         existing = db.execute(
@@ -95,18 +86,12 @@ def create_material_type():
             return jsonify({'error': 'Такой тип материала уже существует'}), 400
 
         # Вставляем в БД
-        insert_query = f"""
-        INSERT INTO material_types (material_type_name, {loss_col})
-        VALUES (:name, :loss)
-        """
-
-        db.execute(text(insert_query), {
+        db.execute(statements['insert'], {
             "name": data['material_type_name'],
             "loss": float(data['loss_percentage'])
         })
         db.commit()
-
-        print(f"✅ Добавлен новый материал: {data['material_type_name']}")
+        reference_cache.invalidate()
 
         return jsonify({
             'success': True,
@@ -114,7 +99,7 @@ def create_material_type():
         }), 201
 
     except Exception as e:
-        print(f"❌ Ошибка POST material-types: {str(e)}")
+        logger.error("Ошибка POST material-types: %s", e)
         db.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -122,10 +107,10 @@ def create_material_type():
 @material_types_bp.route('/material-types/<int:material_type_id>', methods=['PUT'])
 def update_material_type(material_type_id):
     """PUT /api/material-types/{id} - Обновить тип материала"""
+    db = get_db()
     try:
         data = request.get_json()
-        db = get_db()
-        loss_col = get_loss_column_name(db)
+        statements = _statements()
 
         # Проверяем существование
         existing = db.execute(
@@ -145,23 +130,24 @@ def update_material_type(material_type_id):
             params['name'] = data['material_type_name']
 
         if 'loss_percentage' in data:
-            updates.append(f"{loss_col} = :loss")
+            updates.append(statements['update_loss'])
             params['loss'] = float(data['loss_percentage'])
 
         if not updates:
             return jsonify({'error': 'Нечего обновлять'}), 400
 
+        updates.append("updated_at = CURRENT_TIMESTAMP")
+
         update_query = "UPDATE material_types SET " + ", ".join(updates) + " WHERE material_type_id = :id"
 
         db.execute(text(update_query), params)
         db.commit()
-
-        print(f"✅ Обновлён материал ID={material_type_id}")
+        reference_cache.invalidate()
 
         return jsonify({'success': True, 'message': 'Тип материала обновлен'}), 200
 
     except Exception as e:
-        print(f"❌ Ошибка PUT material-types: {str(e)}")
+        logger.error("Ошибка PUT material-types: %s", e)
         db.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -169,9 +155,8 @@ def update_material_type(material_type_id):
 @material_types_bp.route('/material-types/<int:material_type_id>', methods=['DELETE'])
 def delete_material_type(material_type_id):
     """DELETE /api/material-types/{id} - Удалить тип материала"""
+    db = get_db()
     try:
-        db = get_db()
-
         # Проверяем существование
         existing = db.execute(
             text("SELECT * FROM material_types WHERE material_type_id = :id"),
@@ -187,12 +172,11 @@ def delete_material_type(material_type_id):
             {"id": material_type_id}
         )
         db.commit()
-
-        print(f"✅ Удалён материал ID={material_type_id}")
+        reference_cache.invalidate()
 
         return jsonify({'success': True, 'message': 'Тип материала удален'}), 200
 
     except Exception as e:
-        print(f"❌ Ошибка DELETE material-types: {str(e)}")
+        logger.error("Ошибка DELETE material-types: %s", e)
         db.rollback()
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify
 from sqlalchemy import text
 from database import get_db
+from services.reference_cache import reference_cache
+from routes.conditional import conditional_get
 
 product_types_bp = Blueprint('product_types', __name__, url_prefix='/api')
 
 
 @product_types_bp.route('/product-types', methods=['GET'])
+@conditional_get('product_types')
 def get_product_types():
     """GET /api/product-types - Получить все типы продукции"""
     try:
@@ -35,6 +38,7 @@ def create_product_type():
             {"name": data['product_type_name'], "coeff": data['product_type_coefficient']}
         )
         db.commit()
+        reference_cache.invalidate()
         return jsonify({'success': True, 'message': 'Тип продукции добавлен'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -48,10 +52,12 @@ def update_product_type(id):
         db = get_db()
         db.execute(
             text(
-                "UPDATE product_types SET product_type_name = :name, product_type_coefficient = :coeff WHERE product_type_id = :id"),
+                "UPDATE product_types SET product_type_name = :name, product_type_coefficient = :coeff, "
+                "updated_at = CURRENT_TIMESTAMP WHERE product_type_id = :id"),
             {"name": data['product_type_name'], "coeff": data['product_type_coefficient'], "id": id}
         )
         db.commit()
+        reference_cache.invalidate()
         return jsonify({'success': True, 'message': 'Тип продукции обновлен'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -64,6 +70,7 @@ def delete_product_type(id):
         db = get_db()
         db.execute(text("DELETE FROM product_types WHERE product_type_id = :id"), {"id": id})
         db.commit()
+        reference_cache.invalidate()
         return jsonify({'success': True, 'message': 'Тип продукции удален'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
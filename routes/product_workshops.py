@@ -1,9 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
 from sqlalchemy import text
 from database import get_db
+from services.export_service import ExportService
+from services.manufacturing_summary import ManufacturingSummaryService
+from services.route_service import RouteService
 
 product_workshops_bp = Blueprint('product_workshops', __name__, url_prefix='/api')
 
+_ROUTE_PRODUCT = text("SELECT product_id FROM product_workshops WHERE product_workshop_id = :id")
+
+
+def _lock_route_products(db, route_id, product_ids=()):
+    """
+    Заблокировать продукт строки маршрута route_id и продукты product_ids до конца транзакции
+    (RouteService.lock_products) - параллельные изменения маршрута одного продукта идут по очереди,
+    и сводка пересчитывается по всем его строкам.
+
+    Returns:
+        (product_id строки или None, если строки нет; False - строку перенес параллельный запрос)
+    """
+    product_id = db.execute(_ROUTE_PRODUCT, {"id": route_id}).scalar()
+    RouteService(db).lock_products(list(product_ids) + ([product_id] if product_id is not None else []))
+    if db.execute(_ROUTE_PRODUCT, {"id": route_id}).scalar() != product_id:
+        return False
+    return product_id
+
+
+def _conflict():
+    return jsonify({'error': 'Конфликт с параллельным изменением: маршрут перенесен к другому продукту'}), 409
+
 
 @product_workshops_bp.route('/product-workshops', methods=['GET'])
 def get_product_workshops():
@@ -35,19 +60,44 @@ def get_product_workshops():
         return jsonify({'error': str(e)}), 500
 
 
+@product_workshops_bp.route('/product-workshops/export', methods=['GET'])
+def export_product_workshops():
+    """GET /api/product-workshops/export?format=ndjson|csv - Потоковая выгрузка маршрутов"""
+    try:
+        service = ExportService(get_db(), current_app.config['EXPORT_BATCH_SIZE'])
+        body, mimetype = service.stream(
+            service.iter_product_workshops(), ExportService.PRODUCT_WORKSHOP_FIELDS,
+            request.args.get('format', 'ndjson')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    extension = 'csv' if mimetype == 'text/csv' else 'ndjson'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=product_workshops.{extension}'}
+    )
+
+
 @product_workshops_bp.route('/product-workshops', methods=['POST'])
 def create_product_workshop():
     """POST /api/product-workshops - Добавить новый маршрут"""
     try:
         data = request.get_json()
         db = get_db()
+        # Блокировка продукта до пересчета сводки (как в RouteService)
+        RouteService(db).lock_products([data['product_id']])
         db.execute(
             text("""INSERT INTO product_workshops (product_id, workshop_id, manufacturing_time_hours)
                     VALUES (:p_id, :w_id, :time)"""),
             {"p_id": data['product_id'], "w_id": data['workshop_id'], "time": data['manufacturing_time_hours']}
         )
+        ManufacturingSummaryService(db).refresh([data['product_id']])
         db.commit()
         return jsonify({'success': True, 'message': 'Маршрут добавлен'}), 201
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -58,6 +108,11 @@ def update_product_workshop(id):
     try:
         data = request.get_json()
         db = get_db()
+        # Маршрут может перейти к другому продукту - блокируются и пересчитываются оба
+        old_product_id = _lock_route_products(db, id, [data['product_id']])
+        if old_product_id is False:
+            db.rollback()
+            return _conflict()
         db.execute(
             text("""UPDATE product_workshops
                     SET product_id               = :p_id,
@@ -67,8 +122,13 @@ def update_product_workshop(id):
             {"p_id": data['product_id'], "w_id": data['workshop_id'], "time": data['manufacturing_time_hours'],
              "id": id}
         )
+        ManufacturingSummaryService(db).refresh(
+            [data['product_id']] + ([old_product_id] if old_product_id is not None else [])
+        )
         db.commit()
         return jsonify({'success': True, 'message': 'Маршрут обновлен'}), 200
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -78,7 +138,13 @@ def delete_product_workshop(id):
     """DELETE /api/product-workshops/{id} - Удалить маршрут"""
     try:
         db = get_db()
+        product_id = _lock_route_products(db, id)
+        if product_id is False:
+            db.rollback()
+            return _conflict()
         db.execute(text("DELETE FROM product_workshops WHERE product_workshop_id = :id"), {"id": id})
+        if product_id is not None:
+            ManufacturingSummaryService(db).refresh([product_id])
         db.commit()
         return jsonify({'success': True, 'message': 'Маршрут удален'}), 200
     except Exception as e:
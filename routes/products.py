@@ -2,11 +2,15 @@
 API эндпоинты для работы с продукцией
 """
 
-from flask import Blueprint, request, jsonify
+import click
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from sqlalchemy.exc import IntegrityError
 from services.product_service import ProductService
-from services.manufacturing import ManufacturingService
+from services.product_search import product_search_index
+from services.export_service import ExportService
+from services.route_service import RouteService
+from services.manufacturing_summary import ManufacturingSummaryService
 from database import get_db
-from models import Product, ProductWorkshop
 
 products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 
@@ -14,23 +18,131 @@ products_bp = Blueprint('products', __name__, url_prefix='/api/products')
 def get_products():
     """
     GET /api/products
-    Получить список всех продуктов
+    Получить список продуктов
+
+    Query-параметры (все необязательные):
+        product_type_id, material_type_id - фильтр по типам
+        min_price, max_price               - диапазон минимальной цены
+        min_time, max_time                 - диапазон времени производства (ч)
+        sort=name|article|price|time, order=asc|desc
+        limit, after                       - keyset-пагинация
+        ids=1,2,3                          - продукты по списку id (остальные параметры не учитываются)
+
+    Без limit возвращается массив продуктов (как раньше).
+    С limit: {"items": [...], "next_cursor": "..." | null}
+    С ids: {"items": [...], "missing": [id, ...]}
     """
+    if 'ids' in request.args:
+        try:
+            ids = ProductService.lookup_keys(','.join(request.args.getlist('ids')).split(','), 'ids')
+            return jsonify(ProductService(get_db()).get_products_by_ids(ids)), 200
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    try:
+        params = ProductService.listing_params(request.args)
+        limit = params['limit']
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     try:
         db_session = get_db()
         service = ProductService(db_session)
-        products = service.get_all_products()
-
-        # Добавляем время производства для каждого продукта
-        for product in products:
-            product['manufacturing_time_hours'] = ManufacturingService.calculate_manufacturing_time(
-                product['product_id'], db_session
-            )
+        # Продукты, типы и время производства - одним запросом
+        products, next_cursor = service.get_products_page(**params)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+    if limit is None:
         return jsonify(products), 200
+
+    return jsonify({
+        'items': products,
+        'next_cursor': next_cursor,
+        'limit': limit
+    }), 200
+
+@products_bp.route('/search', methods=['GET'])
+def search_products():
+    """
+    GET /api/products/search?q=...&limit=20&offset=0
+    Поиск продукции по части названия (без учета регистра, ё = е) и префиксу артикула
+
+    Порядок: точное совпадение, начало названия / артикула, начало слова, подстрока;
+    внутри класса - более короткие названия. Ответ: {"items", "total", "limit", "offset"}
+    """
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit и offset должны быть целыми числами'}), 400
+    if not 1 <= limit <= 100 or offset < 0:
+        return jsonify({'error': 'limit - от 1 до 100, offset - не меньше 0'}), 400
+
+    try:
+        result = product_search_index.search(get_db(), request.args.get('q', ''), limit, offset)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify(result), 200
+
+@products_bp.route('/lookup', methods=['POST'])
+def lookup_products():
+    """
+    POST /api/products/lookup
+    Продукты по списку артикулов (до ProductService.MAX_LOOKUP_SIZE за запрос) - одним запросом к БД
+
+    JSON: {"article_numbers": [1549922, 2259474, ...]}
+    Ответ: {"items": [...], "missing": [артикул, ...]}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Ожидается JSON-объект с полем article_numbers'}), 400
+
+    try:
+        article_numbers = ProductService.lookup_keys(data.get('article_numbers'), 'article_numbers')
+        return jsonify(ProductService(get_db()).get_products_by_article_numbers(article_numbers)), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@products_bp.cli.command('rebuild-summary')
+def rebuild_summary_command():
+    """Пересобрать сводку маршрутов (product_manufacturing_summary) по product_workshops"""
+    db_session = get_db()
+    result = ManufacturingSummaryService(db_session).rebuild()
+    db_session.commit()
+    click.echo(f"Сводка пересобрана: продуктов {result['products']}, исправлено расхождений {result['drifted']}")
+
+
+@products_bp.route('/export', methods=['GET'])
+def export_products():
+    """
+    GET /api/products/export?format=ndjson|csv
+    Потоковая выгрузка всех продуктов с временем производства.
+    Строки читаются из БД пачками и сразу отправляются клиенту.
+    """
+    try:
+        service = ExportService(get_db(), current_app.config['EXPORT_BATCH_SIZE'])
+        body, mimetype = service.stream(
+            service.iter_products(), ExportService.PRODUCT_FIELDS, request.args.get('format', 'ndjson')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    extension = 'csv' if mimetype == 'text/csv' else 'ndjson'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=products.{extension}'}
+    )
+
 @products_bp.route('/<int:product_id>', methods=['GET'])  # ✅ ИСПРАВЛЕНО: добавлен <int:product_id>
 def get_product(product_id):
     """
@@ -38,18 +150,11 @@ def get_product(product_id):
     Получить продукт по ID
     """
     try:
-        db_session = get_db()
-        service = ProductService(db_session)
-        product = service.get_product_by_id(product_id)
+        product = ProductService(get_db()).get_product_by_id(product_id)
 
         if not product:
             return jsonify({'error': 'Продукт не найден'}), 404
 
-        # Добавляем время производства
-        product['manufacturing_time_hours'] = ManufacturingService.calculate_manufacturing_time(
-            product_id, db_session
-        )
-
         return jsonify(product), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -61,40 +166,81 @@ def get_product_workshops(product_id):
     Получить все цехи для производства продукта с временем
     """
     try:
-        db_session = get_db()
-
-        # Проверяем существование продукта
-        product = db_session.query(Product).filter(Product.product_id == product_id).first()
-        if not product:
+        route = ProductService(get_db()).get_product_route(product_id)
+        if route is None:
             return jsonify({'error': 'Продукт не найден'}), 404
+        return jsonify(route), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@products_bp.route('/<int:product_id>/route', methods=['PUT'])
+def replace_product_route(product_id):
+    """
+    PUT /api/products/{id}/route
+    Заменить маршрут производства продукта целиком (одна транзакция)
+
+    JSON:
+    [
+        {"workshop_id": 1, "manufacturing_time_hours": 1.5},
+        {"workshop_id": 4, "manufacturing_time_hours": 0.5}
+    ]
+    Цехи, которых нет в списке, удаляются из маршрута.
+    """
+    try:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('workshops')
+
+        service = RouteService(get_db())
+        result = service.replace_route(product_id, data)
+        return jsonify({'success': True, **result}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except IntegrityError as e:
+        return jsonify({'error': f'Конфликт с параллельным изменением: {e.orig}'}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@products_bp.route('/routes', methods=['PUT'])
+def replace_product_routes():
+    """
+    PUT /api/products/routes
+    Заменить маршруты нескольких продуктов в одной транзакции
+    (массовый перенос работ, например при закрытии цеха)
+
+    JSON:
+    [
+        {"product_id": 1, "workshops": [{"workshop_id": 2, "manufacturing_time_hours": 1.0}]},
+        {"product_id": 5, "workshops": [...]}
+    ]
+    """
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, list):
+            return jsonify({'error': 'Ожидается массив маршрутов'}), 400
 
-        # Получаем все производственные маршруты для этого продукта
-        workshops = db_session.query(ProductWorkshop).filter(
-            ProductWorkshop.product_id == product_id
-        ).all()
-
-        result = []
-        total_time = 0
-
-        for pw in workshops:
-            workshop_time = float(pw.manufacturing_time_hours)
-            total_time += workshop_time
-
-            result.append({
-                'product_workshop_id': pw.product_workshop_id,
-                'workshop_id': pw.workshop_id,
-                'workshop_name': pw.workshop.workshop_name,
-                'staff_count': pw.workshop.staff_count,
-                'manufacturing_time_hours': workshop_time
-            })
-
-        return jsonify({
-            'product_id': product_id,
-            'product_name': product.product_name,
-            'workshops': result,
-            'total_manufacturing_time_hours': int(round(total_time))
-        }), 200
+        routes = {}
+        for item in data:
+            if not isinstance(item, dict) or 'product_id' not in item:
+                return jsonify({'error': f'Некорректный элемент: {item}'}), 400
+            if not isinstance(item['product_id'], int) or isinstance(item['product_id'], bool):
+                return jsonify({'error': f"Некорректный product_id: {item['product_id']}"}), 400
+            if item['product_id'] in routes:
+                return jsonify({'error': f"Продукт {item['product_id']} указан дважды"}), 400
+            routes[item['product_id']] = item.get('workshops')
 
+        service = RouteService(get_db())
+        result = service.replace_routes(routes)
+        return jsonify({'success': True, **result}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except IntegrityError as e:
+        return jsonify({'error': f'Конфликт с параллельным изменением: {e.orig}'}), 409
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -130,6 +276,7 @@ def create_product():
 
         if 'error' in result:
             return jsonify(result), 400
+        product_search_index.mark_stale()
 
         return jsonify(result), 201
     except Exception as e:
@@ -149,6 +296,7 @@ def update_product(product_id):
 
         if 'error' in result:
             return jsonify(result), 400
+        product_search_index.mark_stale()
 
         return jsonify(result), 200
     except Exception as e:
@@ -167,6 +315,7 @@ def delete_product(product_id):
 
         if 'error' in result:
             return jsonify(result), 404
+        product_search_index.mark_stale()
 
         return jsonify(result), 200
     except Exception as e:
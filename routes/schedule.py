@@ -0,0 +1,79 @@
+"""
+API эндпоинты планирования производства
+"""
+from datetime import date
+
+from flask import Blueprint, current_app, request, jsonify, url_for
+from database import get_db
+from services.schedule_service import ScheduleService
+from services.scheduler import FlowShopScheduler
+from services.schedule_worker import schedule_worker
+
+schedule_bp = Blueprint('schedule', __name__, url_prefix='/api/schedule')
+
+
+@schedule_bp.route('', methods=['POST'])
+def create_schedule():
+    """
+    POST /api/schedule
+    Поставить расчет расписания в очередь
+
+    Body:
+        {
+            "orders": [{"product_id": 1, "quantity": 10, "due_date": "2025-06-30"}, ...],
+            "start_date": "2025-06-01",        - необязательно, по умолчанию сегодня
+            "rules": ["edd", "spt"],           - необязательно, по умолчанию все
+            "objective": "makespan",           - или "tardiness"
+            "time_budget_ms": 2000,            - необязательно
+            "include_operations": false        - операции по сотрудникам в результате
+        }
+
+    Returns:
+        202 {"task_id": ..., "status_url": ...}
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be JSON object'}), 400
+
+    config = current_app.config
+    try:
+        start_date = date.fromisoformat(data['start_date']) if data.get('start_date') else date.today()
+        time_budget_ms = int(data.get('time_budget_ms', config['SCHEDULER_TIME_BUDGET_MS']))
+        if time_budget_ms <= 0:
+            raise ValueError('time_budget_ms должен быть > 0')
+        rules = FlowShopScheduler.check_options(data.get('rules'), data.get('objective', 'makespan'))
+        hours_per_day = config['WORKSHOP_SHIFTS_PER_DAY'] * config['WORKSHOP_SHIFT_HOURS']
+        plan = ScheduleService(get_db()).prepare(
+            data.get('orders'), start_date, hours_per_day, config['SCHEDULER_MAX_ORDERS']
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    try:
+        task_id = schedule_worker.submit(
+            get_db(), ScheduleService.run, plan, time_budget_ms / 1000,
+            rules=rules, objective=data.get('objective', 'makespan'),
+            include_operations=bool(data.get('include_operations'))
+        )
+    except Exception as e:
+        get_db().rollback()
+        return jsonify({'error': str(e)}), 500
+    return jsonify({
+        'task_id': task_id,
+        'status': 'queued',
+        'status_url': url_for('schedule.get_schedule', task_id=task_id)
+    }), 202
+
+
+@schedule_bp.route('/<task_id>', methods=['GET'])
+def get_schedule(task_id):
+    """
+    GET /api/schedule/{task_id}
+    Состояние расчета: queued / running / done (с результатом) / failed (с ошибкой)
+    """
+    task = schedule_worker.get(get_db(), task_id)
+    if task is None:
+        return jsonify({'error': 'Задача планирования не найдена'}), 404
+    return jsonify(task), 200
@@ -0,0 +1,29 @@
+"""
+Служебные эндпоинты (состояние приложения)
+"""
+from flask import Blueprint, jsonify
+from database import get_pool_status
+from services.reference_cache import reference_cache
+
+system_bp = Blueprint('system', __name__, url_prefix='/api/system')
+
+
+@system_bp.route('/db-pool', methods=['GET'])
+def db_pool_status():
+    """
+    GET /api/system/db-pool
+    Состояние пула подключений к БД (выдано, переполнение, всего выдач)
+    """
+    try:
+        return jsonify(get_pool_status()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@system_bp.route('/reference-cache', methods=['GET'])
+def reference_cache_status():
+    """
+    GET /api/system/reference-cache
+    Счетчики кэша справочников (попадания, промахи, версия)
+    """
+    return jsonify(reference_cache.stats()), 200
@@ -1,14 +1,18 @@
 """
 API эндпоинты для работы с цехами
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from services.workshop_service import WorkshopService
+from services.workshop_load import WorkshopLoadService
+from services.production_plan import parse_plan
 from database import get_db
+from routes.conditional import conditional_get
 
 workshops_bp = Blueprint('workshops', __name__, url_prefix='/api/workshops')
 
 
 @workshops_bp.route('', methods=['GET'])
+@conditional_get('workshops')
 def get_workshops():
     """
     GET /api/workshops
@@ -23,6 +27,35 @@ def get_workshops():
         return jsonify({'error': str(e)}), 500
 
 
+@workshops_bp.route('/load', methods=['GET', 'POST'])
+def get_workshops_load():
+    """
+    GET  /api/workshops/load?plan=1:100,2:50&days=22&shifts_per_day=2&shift_hours=8
+    POST /api/workshops/load  {"plan": {"1": 100, "2": 50}, "days": 22}  - для больших планов
+
+    Загрузка цехов по плану: часы, часы на сотрудника и загрузка
+    относительно фонда времени (календарь по умолчанию - из конфигурации).
+    Без плана считается по одной единице каждого продукта.
+    """
+    try:
+        params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+        config = current_app.config
+        plan = parse_plan(params.get('plan'))
+        days = int(params.get('days', config['WORKSHOP_CALENDAR_DAYS']))
+        shifts_per_day = int(params.get('shifts_per_day', config['WORKSHOP_SHIFTS_PER_DAY']))
+        shift_hours = float(params.get('shift_hours', config['WORKSHOP_SHIFT_HOURS']))
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e) or 'Некорректные параметры'}), 400
+
+    try:
+        result = WorkshopLoadService(get_db()).calculate(plan, days, shifts_per_day, shift_hours)
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @workshops_bp.route('/product/<int:product_id>', methods=['GET'])
 def get_workshops_for_product(product_id):
     """
@@ -0,0 +1,244 @@
+"""
+Бенчмарк эндпоинтов на синтетическом каталоге (по умолчанию 100k продуктов, 1M маршрутов).
+
+Данные генерируются scripts/synthetic_data.py в локальную SQLite-БД
+(файл переиспользуется между запусками при тех же параметрах).
+Каждый эндпоинт вызывается через Flask test client: первый вызов (холодный,
+с загрузкой кэшей) замеряется отдельно, затем --iterations вызовов.
+
+Результат - JSON для сравнения между коммитами: p50/p95/p99 (мс), SQL-запросов
+на вызов, пиковый RSS процесса после эндпоинта и его прирост.
+
+Запуск (из корня проекта):
+    python scripts/bench_endpoints.py --output bench.json
+    python scripts/bench_endpoints.py --products 10000 --routes-per-product 5 --only products_list
+    python scripts/bench_endpoints.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# (имя, метод, builder(ctx) -> (path, json), доля итераций: тяжелые эндпоинты вызываются реже)
+BENCHMARKS = [
+    ('products_list', 'GET', lambda ctx: ('/api/products', None), 0.1),
+    ('products_page', 'GET', lambda ctx: ('/api/products?limit=50&sort=price', None), 1),
+    ('products_page_filtered', 'GET',
+     lambda ctx: ('/api/products?limit=50&product_type_id=2&min_time=10&sort=time&order=desc', None), 1),
+    ('products_ids_5k', 'GET',
+     lambda ctx: ('/api/products?ids=' + ','.join(map(str, ctx['plan_products'][:5000])), None), 0.5),
+    ('product_detail', 'GET', lambda ctx: (f"/api/products/{ctx['product_id']}", None), 1),
+    ('product_search', 'GET', lambda ctx: ('/api/products/search?q=шкаф&limit=20', None), 1),
+    ('product_workshops', 'GET', lambda ctx: (f"/api/products/{ctx['product_id']}/workshops", None), 1),
+    ('product_workshops_all', 'GET', lambda ctx: ('/api/product-workshops', None), 0.1),
+    ('raw_material', 'POST', lambda ctx: ('/api/material/calculate-raw-material', {
+        'product_type_id': 1, 'material_type_id': 2, 'quantity': 10, 'parameter1': 2.5, 'parameter2': 3.0}), 1),
+    ('raw_material_batch_1k', 'POST', lambda ctx: ('/api/material/calculate-raw-material/batch', [
+        {'product_type_id': 1 + index % 6, 'material_type_id': 1 + index % 4, 'quantity': 1 + index % 50,
+         'parameter1': 1.5, 'parameter2': 0.8} for index in range(1000)]), 0.5),
+    ('plan_requirements_10k', 'POST', lambda ctx: ('/api/material/plan-requirements', {
+        'plan': {str(product_id): 5 for product_id in ctx['plan_products']}}), 0.2),
+    ('workshops_load_10k', 'POST', lambda ctx: ('/api/workshops/load', {
+        'plan': {str(product_id): 5 for product_id in ctx['plan_products']}}), 0.2),
+]
+
+
+def peak_rss_mb() -> float:
+    """Пиковый RSS процесса, МБ (ru_maxrss: КБ на Linux, байты на macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def prepare_database(path, products, routes_per_product, seed, regenerate):
+    """Сгенерировать БД (или переиспользовать готовую с теми же параметрами)"""
+    from sqlalchemy import create_engine, text
+
+    if os.path.exists(path) and not regenerate:
+        engine = create_engine(f'sqlite:///{path}')
+        with engine.connect() as conn:
+            counts = conn.execute(text(
+                "SELECT (SELECT COUNT(*) FROM products), (SELECT COUNT(*) FROM product_workshops)"
+            )).first()
+        engine.dispose()
+        if tuple(counts) == (products, products * routes_per_product):
+            return 0.0
+
+    if os.path.exists(path):
+        os.remove(path)
+    from app import create_app
+    from config import Config
+    from database import db
+    from synthetic_data import generate
+
+    class GenerateConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{path}.tmp'
+        DB_STARTUP_MODE = 'create_all'
+        METRICS_ENABLED = False
+
+    if os.path.exists(path + '.tmp'):
+        os.remove(path + '.tmp')
+    started = time.perf_counter()
+    app = create_app(GenerateConfig)
+    with app.app_context():
+        generate(db.session, products, routes_per_product, seed=seed)
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+    os.replace(path + '.tmp', path)
+    return time.perf_counter() - started
+
+
+def run(args) -> dict:
+    from app import create_app
+    from config import Config
+    from database import db
+    from check_query_budgets import StatementCounter
+
+    generate_seconds = prepare_database(args.database, args.products, args.routes_per_product,
+                                        args.seed, args.regenerate)
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{args.database}'
+        DB_STARTUP_MODE = 'skip'
+        METRICS_ENABLED = False
+        COMPRESS_ENABLED = False
+
+    app = create_app(BenchConfig)
+    client = app.test_client()
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+    # Фиксированные (детерминированные) продукты для запросов
+    ctx = {
+        'product_id': args.products // 2 or 1,
+        'plan_products': list(range(1, args.products + 1, max(1, args.products // 10000)))[:10000],
+    }
+
+    results = {}
+    for name, method, builder, share in BENCHMARKS:
+        if args.only and name not in args.only:
+            continue
+        path, body = builder(ctx)
+        rss_before = peak_rss_mb()
+
+        started = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        size = len(response.get_data())
+        cold_ms = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise RuntimeError(f"{name}: ответ {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+        iterations = max(3, int(args.iterations * share))
+        timings, statements = [], []
+        for _ in range(iterations):
+            counter.start()
+            started = time.perf_counter()
+            client.open(path, method=method, json=body).get_data()
+            timings.append((time.perf_counter() - started) * 1000)
+            statements.append(len(counter.stop()))
+
+        results[name] = {
+            'method': method,
+            'path': path,
+            'iterations': iterations,
+            'cold_ms': round(cold_ms, 2),
+            'p50_ms': round(percentile(timings, 0.50), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'statements_per_call': round(statistics.fmean(statements), 2),
+            'response_bytes': size,
+            'peak_rss_mb': peak_rss_mb(),
+            'peak_rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+        }
+        if not args.quiet:
+            r = results[name]
+            print(f"{name:24} p50 {r['p50_ms']:9.2f}  p95 {r['p95_ms']:9.2f}  p99 {r['p99_ms']:9.2f} мс  "
+                  f"SQL {r['statements_per_call']:5}  RSS {r['peak_rss_mb']:7.1f} МБ", file=sys.stderr)
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'products': args.products,
+            'product_workshops': args.products * args.routes_per_product,
+            'seed': args.seed,
+            'database': 'sqlite',
+            'generate_seconds': round(generate_seconds, 1),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline_path, out=sys.stdout):
+    """Изменение p50/p95 и числа запросов относительно сохраненного результата"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"{'эндпоинт':24} {'p50, мс':>22} {'p95, мс':>22} {'SQL':>10}", file=out)
+    for name, result in current['results'].items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:24} (нет в {baseline_path})", file=out)
+            continue
+
+        def change(key):
+            delta = (result[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            return f"{old[key]:.2f} -> {result[key]:.2f} ({delta:+.0f}%)"
+
+        statements = f"{old['statements_per_call']:g} -> {result['statements_per_call']:g}"
+        print(f"{name:24} {change('p50_ms'):>22} {change('p95_ms'):>22} {statements:>10}", file=out)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк эндпоинтов на синтетическом каталоге')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--routes-per-product', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=50, help='вызовов легкого эндпоинта (тяжелые - меньше)')
+    parser.add_argument('--database', help='файл SQLite (по умолчанию во временном каталоге, переиспользуется)')
+    parser.add_argument('--regenerate', action='store_true', help='сгенерировать данные заново')
+    parser.add_argument('--only', nargs='+', choices=[name for name, *_ in BENCHMARKS], help='только эти эндпоинты')
+    parser.add_argument('--output', help='файл JSON с результатами (по умолчанию - stdout)')
+    parser.add_argument('--compare', help='JSON предыдущего запуска для сравнения')
+    parser.add_argument('--quiet', action='store_true')
+    args = parser.parse_args()
+    if args.database is None:
+        args.database = os.path.join(
+            tempfile.gettempdir(), f'mebelcorp_bench_{args.products}x{args.routes_per_product}_s{args.seed}.db'
+        )
+
+    result = run(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        compare(result, args.compare, sys.stdout if args.output else sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Бенчмарк планировщика производства на синтетических планах
+(БД не нужна - маршруты и заказы генерируются детерминированно).
+
+Запуск (из корня проекта):
+    python scripts/bench_scheduler.py
+    python scripts/bench_scheduler.py --jobs 1000 10000 100000 --workshops 12 --budget-ms 5000
+
+Для каждого размера плана выводятся время подготовки и расчета,
+выбранное правило, makespan, суммарная просрочка и перебранные правила.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.scheduler import FlowShopScheduler, Job
+
+HOURS_PER_DAY = 8
+
+
+def make_plan(jobs, workshops, products, seed=42):
+    """Синтетические маршруты (3..workshops цехов на продукт) и книга заказов"""
+    rnd = random.Random(seed)
+    capacities = [rnd.randint(2, 20) for _ in range(workshops)]
+    routes = {}
+    for product_id in range(1, products + 1):
+        stages = sorted(rnd.sample(range(workshops), rnd.randint(min(3, workshops), workshops)))
+        routes[product_id] = [(stage, round(rnd.uniform(0.1, 3.0), 2)) for stage in stages]
+
+    horizon_days = max(5, jobs * 4 // (sum(capacities) * HOURS_PER_DAY) + 1)
+    result = []
+    for index in range(jobs):
+        product_id = rnd.randint(1, products)
+        quantity = rnd.randint(1, 10)
+        due_hours = rnd.randint(1, horizon_days) * HOURS_PER_DAY
+        result.append(Job(index, product_id, quantity, due_hours,
+                          [(stage, hours * quantity) for stage, hours in routes[product_id]]))
+    return result, capacities
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк планировщика производства')
+    parser.add_argument('--jobs', type=int, nargs='+', default=[1000, 10000, 100000], help='Размеры планов')
+    parser.add_argument('--workshops', type=int, default=12, help='Цехов (этапов)')
+    parser.add_argument('--products', type=int, default=500, help='Продуктов с маршрутами')
+    parser.add_argument('--budget-ms', type=int, default=5000, help='Бюджет времени на перебор правил')
+    parser.add_argument('--objective', default='makespan', choices=FlowShopScheduler.OBJECTIVES)
+    args = parser.parse_args()
+
+    results = []
+    for size in args.jobs:
+        t0 = time.perf_counter()
+        jobs, capacities = make_plan(size, args.workshops, args.products)
+        t1 = time.perf_counter()
+        result = FlowShopScheduler(capacities, args.budget_ms / 1000).schedule(jobs, objective=args.objective)
+        t2 = time.perf_counter()
+        results.append({
+            'jobs': size,
+            'operations': sum(len(job.operations) for job in jobs),
+            'generate_ms': round((t1 - t0) * 1000, 1),
+            'schedule_ms': round((t2 - t1) * 1000, 1),
+            'rule': result['rule'],
+            'makespan_hours': round(result['makespan'], 2),
+            'total_tardiness_hours': round(result['total_tardiness'], 2),
+            'timed_out': result['timed_out'],
+            'rules_tried': result['rules_tried'],
+        })
+
+    print(json.dumps({'date': date.today().isoformat(), 'workshops': args.workshops,
+                      'budget_ms': args.budget_ms, 'results': results}, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Сравнение сериализации и сжатия ответов со списком продукции:
+стандартный json vs orjson, без сжатия / gzip / brotli.
+
+Запуск (из корня проекта, БД не нужна - данные синтетические):
+    python scripts/bench_serialization.py
+    python scripts/bench_serialization.py --rows 20000 --repeat 50
+
+Для каждой комбинации выводится размер тела ответа (байт на проводе)
+и задержка запроса через test client: p50 / p99, мс.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from compression import brotli, init_compression
+from config import Config
+from serialization import init_json, orjson
+
+PRODUCT_NAMES = ['Стол', 'Шкаф', 'Стул', 'Кровать', 'Комод', 'Полка', 'Диван', 'Тумба']
+MATERIALS = ['Ламинат', 'Массив дерева', 'МДФ', 'Пластик', 'Мебельный щит']
+
+
+def make_payload(rows, seed=42):
+    """Синтетический список продукции той же формы, что GET /api/products"""
+    rnd = random.Random(seed)
+    return [
+        {
+            'product_id': i,
+            'article_number': 1000000 + i,
+            'product_name': f'{rnd.choice(PRODUCT_NAMES)} {rnd.choice(MATERIALS).lower()} №{i}',
+            'product_type': rnd.choice(PRODUCT_NAMES),
+            'material_type': rnd.choice(MATERIALS),
+            'minimum_partner_price': Decimal(rnd.randint(100000, 9999999)) / 100,
+            'manufacturing_time_hours': rnd.randint(1, 40),
+        }
+        for i in range(1, rows + 1)
+    ]
+
+
+def make_app(serializer, payload):
+    class BenchConfig(Config):
+        JSON_SERIALIZER = serializer
+        COMPRESS_ENABLED = True
+
+    app = Flask(__name__)
+    app.debug = False  # компактный JSON, как в продакшене
+    app.config.from_object(BenchConfig)
+    init_json(app)
+    init_compression(app)
+
+    @app.route('/products')
+    def products():
+        return jsonify(payload)
+
+    return app
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк сериализации и сжатия ответов')
+    parser.add_argument('--rows', type=int, default=5000, help='Строк в ответе')
+    parser.add_argument('--repeat', type=int, default=30, help='Запросов на комбинацию')
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    serializers = ['default'] + (['orjson'] if orjson is not None else [])
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+
+    results = []
+    for serializer in serializers:
+        client = make_app(serializer, payload).test_client()
+        for encoding in encodings:
+            headers = {'Accept-Encoding': encoding}
+            client.get('/products', headers=headers)  # прогрев
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                response = client.get('/products', headers=headers)
+                timings.append((time.perf_counter() - t0) * 1000)
+            results.append({
+                'serializer': serializer,
+                'encoding': encoding,
+                'bytes': len(response.data),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p99_ms': round(percentile(timings, 99), 2),
+            })
+
+    print(json.dumps({'rows': args.rows, 'repeat': args.repeat, 'results': results},
+                     ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""
+Проверка бюджетов SQL-запросов по эндпоинтам.
+
+Каждый эндпоинт приложения вызывается через test client на локальной
+SQLite-БД с синтетическими данными (scripts/synthetic_data.py) при двух
+размерах данных. Считаются SQL-запросы и строки, прочитанные из БД за вызов.
+Проверка не проходит, если:
+    - эндпоинт превысил объявленный бюджет (READ_ENDPOINTS, WRITE_ENDPOINTS);
+    - число запросов растет вместе с числом строк (N+1, ленивые загрузки);
+    - число прочитанных строк растет с данными у эндпоинта, ответ которого от
+      размера каталога не зависит (лишний JOIN, eager-загрузка связей) -
+      все эндпоинты, кроме SCALING_ENDPOINTS;
+    - эндпоинт ответил ошибкой (4xx/5xx);
+    - у эндпоинта приложения нет объявленного бюджета.
+
+Запуск (из корня проекта):
+    python scripts/check_query_budgets.py
+    python scripts/check_query_budgets.py --sizes 20 300 --verbose
+    python scripts/check_query_budgets.py --compress
+    python -m pytest tests/test_query_budgets.py
+
+Код возврата 1 при нарушениях.
+
+Кэши процесса (справочники, матрица маршрутов) прогреваются до замера:
+бюджет - число запросов в установившемся режиме. Сверка отметки
+справочников (раз в REFERENCE_CACHE_CHECK_INTERVAL) в подсчет не попадает.
+"""
+import argparse
+import gzip
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SIZES = (20, 200)
+ROUTES_PER_PRODUCT = 4
+
+# Эндпоинты (имена endpoint Flask), которые не проверяются: статика фронтенда
+SKIPPED_ENDPOINTS = {'static'}
+
+
+# ===== Запросы к эндпоинтам =====
+# Каждый builder получает контекст (данные БД) и возвращает (path, json).
+# Объем входных данных пакетных эндпоинтов растет вместе с размером БД,
+# поэтому рост числа запросов проверяется и для них.
+
+def _plan(ctx):
+    return {str(product_id): 10 for product_id in ctx['product_ids']}
+
+
+def _batch_lines(ctx):
+    return [{'product_type_id': 1 + index % 6, 'material_type_id': 1 + index % 4, 'quantity': 5,
+             'parameter1': 2.5, 'parameter2': 1.5} for index in range(len(ctx['product_ids']))]
+
+
+def _route_steps(ctx, product_id):
+    return [{'workshop_id': workshop_id, 'manufacturing_time_hours': 1.5}
+            for workshop_id in ctx['workshop_ids'][:ROUTES_PER_PRODUCT + product_id % 2]]
+
+
+def _schedule_orders(ctx):
+    return [{'product_id': product_id, 'quantity': 2, 'due_date': '2030-01-31'} for product_id in ctx['product_ids']]
+
+
+# Чтение: (метод, правило URL, бюджет, builder)
+READ_ENDPOINTS = [
+    ('GET', '/', 0, lambda ctx: ('/', None)),
+    ('GET', '/api/products', 1, lambda ctx: ('/api/products', None)),
+    ('GET', '/api/products', 1, lambda ctx: ('/api/products?limit=50&sort=price&min_time=1', None)),
+    ('GET', '/api/products', 1, lambda ctx: ('/api/products?ids=' + ','.join(map(str, ctx['product_ids'] + [2 ** 63 - 1])), None)),
+    ('POST', '/api/products/lookup', 1, lambda ctx: ('/api/products/lookup', {
+        'article_numbers': ctx['article_numbers'] + [1]})),
+    ('GET', '/api/products/search', 0, lambda ctx: ('/api/products/search?q=шкаф&limit=20', None)),
+    ('GET', '/api/products/export', 1, lambda ctx: ('/api/products/export?format=csv', None)),
+    ('GET', '/api/products/<int:product_id>', 1, lambda ctx: (f"/api/products/{ctx['product_ids'][0]}", None)),
+    ('GET', '/api/products/<int:product_id>/workshops', 3,
+     lambda ctx: (f"/api/products/{ctx['product_ids'][0]}/workshops", None)),
+    ('GET', '/api/workshops', 2, lambda ctx: ('/api/workshops', None)),
+    ('GET', '/api/workshops/<int:workshop_id>', 1, lambda ctx: (f"/api/workshops/{ctx['workshop_ids'][0]}", None)),
+    ('GET', '/api/workshops/product/<int:product_id>', 1,
+     lambda ctx: (f"/api/workshops/product/{ctx['product_ids'][0]}", None)),
+    ('GET', '/api/workshops/load', 2,
+     lambda ctx: ('/api/workshops/load?plan=' + ','.join(f'{p}:5' for p in ctx['product_ids']), None)),
+    ('POST', '/api/workshops/load', 2, lambda ctx: ('/api/workshops/load', {'plan': _plan(ctx)})),
+    ('GET', '/api/product-workshops', 1, lambda ctx: ('/api/product-workshops', None)),
+    ('GET', '/api/product-workshops/export', 1, lambda ctx: ('/api/product-workshops/export', None)),
+    ('GET', '/api/product-types', 2, lambda ctx: ('/api/product-types', None)),
+    ('GET', '/api/material-types', 2, lambda ctx: ('/api/material-types', None)),
+    ('GET', '/api/material/product-types', 2, lambda ctx: ('/api/material/product-types', None)),
+    ('GET', '/api/material/material-types', 2, lambda ctx: ('/api/material/material-types', None)),
+    ('GET', '/api/material/product-parameters/<int:product_id>', 1,
+     lambda ctx: (f"/api/material/product-parameters/{ctx['product_ids'][0]}", None)),
+    ('POST', '/api/material/calculate-raw-material', 0, lambda ctx: ('/api/material/calculate-raw-material', {
+        'product_type_id': 1, 'material_type_id': 1, 'quantity': 10, 'parameter1': 2.5, 'parameter2': 3.0})),
+    ('POST', '/api/material/calculate-raw-material/batch', 0,
+     lambda ctx: ('/api/material/calculate-raw-material/batch', _batch_lines(ctx))),
+    ('POST', '/api/material/plan-requirements', 2,
+     lambda ctx: ('/api/material/plan-requirements', {'plan': _plan(ctx)})),
+    ('GET', '/api/system/db-pool', 0, lambda ctx: ('/api/system/db-pool', None)),
+    ('GET', '/api/system/reference-cache', 0, lambda ctx: ('/api/system/reference-cache', None)),
+    ('GET', '/api/metrics', 0, lambda ctx: ('/api/metrics', None)),
+]
+
+# Эндпоинты, которые читают тем больше строк, чем больше каталог (списки, выгрузки,
+# пакетные запросы с растущим входом). У остальных строк должно читаться одинаково при любом размере.
+SCALING_ENDPOINTS = {
+    ('GET', '/api/products'),
+    ('POST', '/api/products/lookup'),
+    ('GET', '/api/products/export'),
+    ('GET', '/api/product-workshops'),
+    ('GET', '/api/product-workshops/export'),
+    ('GET', '/api/workshops/load'),
+    ('POST', '/api/workshops/load'),
+    ('POST', '/api/material/plan-requirements'),
+    ('PUT', '/api/products/routes'),
+    ('POST', '/api/schedule'),
+}
+
+# Запись: выполняются по порядку после чтения, builder может использовать результаты предыдущих шагов
+WRITE_ENDPOINTS = [
+    ('POST', '/api/products', 3, lambda ctx: ('/api/products', {
+        'product_type_id': 1, 'product_name': 'Проверочный стол', 'article_number': 999,
+        'minimum_partner_price': 1000.0, 'material_type_id': 1})),
+    ('PUT', '/api/products/<int:product_id>', 3,
+     lambda ctx: (f"/api/products/{ctx['new_product_id']}", {'minimum_partner_price': 1500.0})),
+    ('PUT', '/api/products/<int:product_id>/route', 6,
+     lambda ctx: (f"/api/products/{ctx['new_product_id']}/route", _route_steps(ctx, ctx['new_product_id']))),
+    ('PUT', '/api/products/routes', 8, lambda ctx: ('/api/products/routes', [
+        {'product_id': product_id, 'workshops': _route_steps(ctx, product_id)} for product_id in ctx['product_ids']])),
+    ('POST', '/api/product-workshops', 4, lambda ctx: ('/api/product-workshops', {
+        'product_id': ctx['new_product_id'], 'workshop_id': ctx['workshop_ids'][-1], 'manufacturing_time_hours': 2})),
+    ('PUT', '/api/product-workshops/<int:id>', 6, lambda ctx: (f"/api/product-workshops/{ctx['new_route_id']}", {
+        'product_id': ctx['new_product_id'], 'workshop_id': ctx['workshop_ids'][-1], 'manufacturing_time_hours': 3})),
+    ('DELETE', '/api/product-workshops/<int:id>', 6,
+     lambda ctx: (f"/api/product-workshops/{ctx['new_route_id']}", None)),
+    ('DELETE', '/api/products/<int:product_id>', 2, lambda ctx: (f"/api/products/{ctx['new_product_id']}", None)),
+    ('POST', '/api/product-types', 1, lambda ctx: ('/api/product-types', {
+        'product_type_name': 'Проверочный тип', 'product_type_coefficient': 1.1})),
+    ('PUT', '/api/product-types/<int:id>', 1, lambda ctx: (f"/api/product-types/{ctx['new_product_type_id']}", {
+        'product_type_name': 'Проверочный тип 2', 'product_type_coefficient': 1.2})),
+    ('DELETE', '/api/product-types/<int:id>', 1,
+     lambda ctx: (f"/api/product-types/{ctx['new_product_type_id']}", None)),
+    ('POST', '/api/material-types', 2, lambda ctx: ('/api/material-types', {
+        'material_type_name': 'Проверочный материал', 'loss_percentage': 0.5})),
+    ('PUT', '/api/material-types/<int:material_type_id>', 2,
+     lambda ctx: (f"/api/material-types/{ctx['new_material_type_id']}", {'loss_percentage': 0.6})),
+    ('DELETE', '/api/material-types/<int:material_type_id>', 2,
+     lambda ctx: (f"/api/material-types/{ctx['new_material_type_id']}", None)),
+    ('POST', '/api/schedule', 6,
+     lambda ctx: ('/api/schedule', {'orders': _schedule_orders(ctx), 'start_date': '2030-01-01'})),
+    ('GET', '/api/schedule/<task_id>', 1, lambda ctx: (f"/api/schedule/{ctx['task_id']}", None)),
+]
+
+
+class _CountingCursor(sqlite3.Cursor):
+    """Курсор SQLite, считающий строки, выбранные fetch*"""
+    fetched = 0
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            _CountingCursor.fetched += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        _CountingCursor.fetched += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        _CountingCursor.fetched += len(rows)
+        return rows
+
+
+class _CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=_CountingCursor):
+        return super().cursor(factory)
+
+
+class StatementCounter:
+    """SQL-запросы engine и прочитанные строки между start() и stop()"""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.statements = None
+        self._fetched = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.statements is not None:
+            self.statements.append(' '.join(statement.split()))
+
+    def start(self):
+        self.statements = []
+        self._fetched = _CountingCursor.fetched
+
+    def stop(self) -> tuple:
+        """(запросы, число прочитанных строк)"""
+        statements, self.statements = self.statements, None
+        return statements, _CountingCursor.fetched - self._fetched
+
+
+def build_app(database_url, compress=False):
+    from config import Config
+    from app import create_app
+
+    class BudgetConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        DB_STARTUP_MODE = 'create_all'
+        COMPRESS_ENABLED = compress
+        # Подключения SQLite со счетчиком прочитанных строк
+        SQLALCHEMY_ENGINE_OPTIONS = {**Config.SQLALCHEMY_ENGINE_OPTIONS,
+                                     'connect_args': {'factory': _CountingConnection}}
+        # Выгрузка читает пачками по EXPORT_BATCH_SIZE строк - здесь пачка больше данных
+        EXPORT_BATCH_SIZE = 100000
+
+    return create_app(BudgetConfig)
+
+
+def measure(size, verbose=False, compress=False) -> list:
+    """
+    Вызвать все эндпоинты на БД из size продуктов,
+    вернуть [(метод, правило, запросов, строк, статус, path)].
+    compress=True - со сжатием ответов (клиент присылает Accept-Encoding: gzip)
+    """
+    from services.material_types_schema import material_types_schema
+    from services.product_search import product_search_index
+    from services.reference_cache import reference_cache
+    from services.schedule_worker import schedule_worker
+    from services.workshop_load import route_matrix_cache
+
+    caches = (reference_cache, route_matrix_cache, product_search_index, material_types_schema)
+    intervals = {cache: cache.check_interval for cache in caches if hasattr(cache, 'check_interval')}
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            return _measure(directory, size, verbose, compress, caches, intervals)
+        finally:
+            # Расчет расписания пишет в БД из своего процесса - дождаться до удаления каталога
+            schedule_worker.shutdown(wait=True)
+            for cache in caches:
+                cache.invalidate()
+            for cache, interval in intervals.items():
+                cache.check_interval = interval
+
+
+def _measure(directory, size, verbose, compress, caches, intervals):
+    from sqlalchemy import text
+    from database import db
+    from synthetic_data import generate
+
+    app = build_app(f"sqlite:///{os.path.join(directory, 'budget.db')}", compress)
+    client = app.test_client()
+    headers = {'Accept-Encoding': 'gzip'} if compress else {}
+    for cache in caches:
+        cache.invalidate()
+    for cache in intervals:
+        cache.check_interval = float('inf')
+
+    with app.app_context():
+        generate(db.session, size, ROUTES_PER_PRODUCT)
+        db.session.commit()
+        ctx = {
+            'product_ids': [row[0] for row in db.session.execute(
+                text("SELECT product_id FROM products ORDER BY product_id"))],
+            'workshop_ids': [row[0] for row in db.session.execute(
+                text("SELECT workshop_id FROM workshops ORDER BY workshop_id"))],
+            'article_numbers': [row[0] for row in db.session.execute(
+                text("SELECT article_number FROM products ORDER BY product_id"))],
+        }
+        counter = StatementCounter(db.engine)
+        db.session.remove()
+
+    def call(method, path, body):
+        counter.start()
+        response = client.open(path, method=method, json=body, headers=headers)
+        response.get_data()  # потоковые ответы читают БД при отдаче
+        statements, rows = counter.stop()
+        if verbose:
+            print(f"  {method} {path[:80]} -> {response.status_code}, запросов: {len(statements)}, строк: {rows}")
+            for statement in statements:
+                print(f"      {statement[:160]}")
+        return response, statements, rows
+
+    # Прогрев кэшей процесса
+    for method, _, _, builder in READ_ENDPOINTS:
+        path, body = builder(ctx)
+        client.open(path, method=method, json=body, headers=headers).get_data()
+
+    results = []
+    for method, rule, _, builder in READ_ENDPOINTS:
+        path, body = builder(ctx)
+        response, statements, rows = call(method, path, body)
+        results.append((method, rule, len(statements), rows, response.status_code, path))
+
+    for method, rule, _, builder in WRITE_ENDPOINTS:
+        path, body = builder(ctx)
+        response, statements, rows = call(method, path, body)
+        results.append((method, rule, len(statements), rows, response.status_code, path))
+        _remember_created(ctx, app, rule, method, response)
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    return results
+
+
+def _json(response):
+    """JSON ответа test client (сжатый ответ при --compress распаковывается)"""
+    data = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        data = gzip.decompress(data)
+    return json.loads(data)
+
+
+def _remember_created(ctx, app, rule, method, response):
+    """Запомнить id созданных записей для следующих шагов"""
+    from sqlalchemy import text
+    from database import db
+
+    if method == 'POST' and rule == '/api/products':
+        ctx['new_product_id'] = _json(response)['product_id']
+    elif method == 'POST' and rule == '/api/schedule':
+        ctx['task_id'] = _json(response)['task_id']
+    elif method == 'POST':
+        column = {
+            '/api/product-workshops': ('product_workshop_id', 'product_workshops', 'new_route_id'),
+            '/api/product-types': ('product_type_id', 'product_types', 'new_product_type_id'),
+            '/api/material-types': ('material_type_id', 'material_types', 'new_material_type_id'),
+        }.get(rule)
+        if column:
+            with app.app_context():
+                ctx[column[2]] = db.session.execute(text(f"SELECT MAX({column[0]}) FROM {column[1]}")).scalar()
+                db.session.remove()
+
+
+def check(sizes, verbose=False, compress=False) -> dict:
+    """
+    Замер при каждом размере из sizes (один или два), сверка с бюджетами.
+    Рост числа запросов (и строк, кроме SCALING_ENDPOINTS) проверяется между первым и последним размером.
+    """
+    budgets = {}
+    for method, rule, budget, _ in READ_ENDPOINTS + WRITE_ENDPOINTS:
+        budgets[(method, rule)] = max(budget, budgets.get((method, rule), 0))
+
+    runs = {}
+    for size in sizes:
+        if verbose:
+            print(f"Размер данных: {size} продуктов")
+        runs[size] = measure(size, verbose, compress)
+
+    violations, report = [], []
+    small, large = runs[sizes[0]], runs[sizes[-1]]
+    for (method, rule, small_count, small_rows, small_status, path), \
+            (_, _, large_count, large_rows, large_status, _) in zip(small, large):
+        budget = budgets[(method, rule)]
+        report.append({'method': method, 'rule': rule, 'path': path[:100], 'budget': budget,
+                       'statements': {str(size): count for size, count in zip(sizes, (small_count, large_count))},
+                       'rows': {str(size): rows for size, rows in zip(sizes, (small_rows, large_rows))}})
+        measured = ((sizes[0], small_count, small_status), (sizes[-1], large_count, large_status))
+        for size, count, status in measured[:len(set(sizes))]:
+            if status >= 400:
+                violations.append(f"{method} {rule}: ответ {status} (размер {size})")
+            if count > budget:
+                violations.append(f"{method} {rule}: {count} запросов при бюджете {budget} (размер {size})")
+        if large_count > small_count:
+            violations.append(
+                f"{method} {rule}: число запросов растет с данными ({small_count} -> {large_count})"
+            )
+        if large_rows > small_rows and (method, rule) not in SCALING_ENDPOINTS:
+            violations.append(
+                f"{method} {rule}: число прочитанных строк растет с данными ({small_rows} -> {large_rows})"
+            )
+
+    violations.extend(_missing_budgets(budgets))
+    return {'sizes': list(sizes), 'compress': compress, 'endpoints': report, 'violations': violations}
+
+
+def _missing_budgets(budgets) -> list:
+    """Эндпоинты приложения без объявленного бюджета"""
+    with tempfile.TemporaryDirectory() as directory:
+        app = build_app(f"sqlite:///{os.path.join(directory, 'rules.db')}")
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint in SKIPPED_ENDPOINTS:
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (method, rule.rule) not in budgets:
+                missing.append(f"{method} {rule.rule}: нет бюджета запросов (добавьте в scripts/check_query_budgets.py)")
+    return missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бюджеты SQL-запросов по эндпоинтам')
+    parser.add_argument('--sizes', type=int, nargs=2, default=DEFAULT_SIZES, metavar=('SMALL', 'LARGE'),
+                        help='Два размера данных (число продуктов)')
+    parser.add_argument('--compress', action='store_true', help='Со сжатием ответов (Accept-Encoding: gzip)')
+    parser.add_argument('--json', action='store_true', help='Отчет в JSON')
+    parser.add_argument('--verbose', action='store_true', help='Печатать SQL каждого вызова')
+    args = parser.parse_args()
+    if args.sizes[0] >= args.sizes[1]:
+        parser.error('--sizes: второй размер должен быть больше первого')
+
+    result = check(tuple(args.sizes), args.verbose, args.compress)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        for entry in result['endpoints']:
+            counts = ' / '.join(str(count) for count in entry['statements'].values())
+            rows = ' / '.join(str(count) for count in entry['rows'].values())
+            print(f"{entry['method']:6} {entry['path'][:60]:60} запросов {counts:>7}  бюджет {entry['budget']}"
+                  f"  строк {rows:>11}")
+        print()
+        for violation in result['violations']:
+            print(f"НАРУШЕНИЕ: {violation}")
+        print('OK' if not result['violations'] else f"Нарушений: {len(result['violations'])}")
+
+    sys.exit(1 if result['violations'] else 0)
+
+
+if __name__ == '__main__':
+    main()
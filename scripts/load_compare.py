@@ -0,0 +1,88 @@
+"""
+Нагрузочное сравнение синхронного (Flask/WSGI) и асинхронного (ASGI) режимов.
+
+Оба сервера запускаются заранее, например:
+    gunicorn -w 4 --threads 4 -b 127.0.0.1:5000 wsgi:app
+    uvicorn asgi:app --host 127.0.0.1 --port 5001
+
+Запуск (из корня проекта):
+    python scripts/load_compare.py --sync http://127.0.0.1:5000 --async http://127.0.0.1:5001
+    python scripts/load_compare.py --path /api/products/1/workshops --concurrency 10 50 200 --requests 2000
+
+Для каждого режима и уровня параллельности выводится пропускная способность
+(запросов/с), задержка p50/p95/p99 и число ошибок.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_PATHS = ['/api/products?limit=50', '/api/products/1', '/api/products/1/workshops', '/api/product-types']
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] if values else None
+
+
+def fetch(url, timeout):
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            ok = response.status == 200
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return ok, (time.perf_counter() - started) * 1000
+
+
+def run(base_url, paths, concurrency, requests, timeout):
+    urls = [base_url.rstrip('/') + paths[i % len(paths)] for i in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda url: fetch(url, timeout), urls))
+    elapsed = time.perf_counter() - started
+
+    latencies = [ms for ok, ms in results if ok]
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': sum(1 for ok, _ in results if not ok),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50), 1) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95), 1) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение синхронного и асинхронного режимов под нагрузкой')
+    parser.add_argument('--sync', dest='sync_url', help='Базовый URL Flask (WSGI)')
+    parser.add_argument('--async', dest='async_url', help='Базовый URL ASGI (uvicorn asgi:app)')
+    parser.add_argument('--path', action='append', dest='paths', help='URL для нагрузки (можно несколько)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--requests', type=int, default=1000, help='Запросов на каждый уровень параллельности')
+    parser.add_argument('--timeout', type=float, default=30)
+    args = parser.parse_args()
+
+    targets = {name: url for name, url in (('sync', args.sync_url), ('async', args.async_url)) if url}
+    if not targets:
+        parser.error('Нужен хотя бы один из --sync / --async')
+    paths = args.paths or DEFAULT_PATHS
+
+    report = {'paths': paths, 'results': {}}
+    for name, url in targets.items():
+        fetch(url.rstrip('/') + paths[0], args.timeout)  # прогрев
+        report['results'][name] = [run(url, paths, c, args.requests, args.timeout) for c in args.concurrency]
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    failed = any(r['errors'] for results in report['results'].values() for r in results)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""
+Нагрузочный тест смешанным трафиком: N параллельных клиентов выполняют
+сценарии реального API в заданной пропорции.
+
+Сценарии (--mix, веса):
+    list     - страница списка продукции (GET /api/products?limit=50, случайная сортировка)
+    detail   - карточка продукта и его цеха (GET /api/products/{id} + /workshops)
+    material - расчет сырья (POST /api/material/calculate-raw-material)
+    routes   - CRUD маршрута: добавить цех в маршрут, изменить время, удалить
+               (маршрут продукта после сценария прежний)
+
+Приложение запускается заранее или самим скриптом (--start: gunicorn -c gunicorn.conf.py wsgi:app
+с переменными окружения из --env). Раз в --interval секунд опрашивается
+GET /api/system/db-pool - занятые подключения и время ожидания пула.
+
+Запуск (из корня проекта):
+    python scripts/load_test.py --url http://127.0.0.1:5000 --clients 50 --duration 60
+    python scripts/load_test.py --start --env WEB_WORKERS=1 WEB_THREADS=16 DB_POOL_SIZE=4 DB_MAX_OVERFLOW=0 \\
+        --clients 32 --mix list=40 detail=30 material=20 routes=10 --output load.json
+
+Отчет (JSON): по интервалам - запросов/с, p50/p95/p99, доля ошибок, состояние пула;
+итог - по сценариям. Код возврата 1, если доля ошибок выше --max-error-rate.
+
+Состояние пула - процесса, ответившего на опрос: при нескольких воркерах
+для подбора пула запускайте один воркер (WEB_WORKERS=1) и меняйте WEB_THREADS.
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = {'list': 40, 'detail': 30, 'material': 20, 'routes': 10}
+LIST_SORTS = ('name', 'article', 'price', 'time')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] if values else None
+
+
+class Client:
+    """HTTP-клиент с постоянным соединением (один на поток)"""
+
+    def __init__(self, base_url, timeout):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        """(статус, JSON ответа или None); статус 0 - сетевая ошибка"""
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+        for attempt in range(2):  # повтор, если сервер закрыл keep-alive соединение
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                try:
+                    return response.status, json.loads(data) if data else None
+                except ValueError:
+                    return response.status, None
+            except (OSError, http.client.HTTPException):
+                self.close()
+                if attempt:
+                    return 0, None
+        return 0, None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+# ===== Сценарии =====
+# Сценарий - генератор шагов: yield (метод, path, body) получает обратно (статус, json).
+# Ошибка - статус 0 или >= 400 на любом шаге.
+
+def scenario_list(rng, data):
+    sort = rng.choice(LIST_SORTS)
+    order = rng.choice(('asc', 'desc'))
+    yield 'GET', f'/api/products?limit=50&sort={sort}&order={order}', None
+
+
+def scenario_detail(rng, data):
+    product_id = rng.choice(data['product_ids'])
+    yield 'GET', f'/api/products/{product_id}', None
+    yield 'GET', f'/api/products/{product_id}/workshops', None
+
+
+def scenario_material(rng, data):
+    yield 'POST', '/api/material/calculate-raw-material', {
+        'product_type_id': rng.choice(data['product_type_ids']),
+        'material_type_id': rng.choice(data['material_type_ids']),
+        'quantity': rng.randint(1, 500),
+        'parameter1': round(rng.uniform(0.5, 3.0), 2),
+        'parameter2': round(rng.uniform(0.3, 2.0), 2),
+    }
+
+
+def scenario_routes(rng, data):
+    product_id = rng.choice(data['route_product_ids'])
+    status, route = yield 'GET', f'/api/products/{product_id}/workshops', None
+    used = {step['workshop_id'] for step in (route or {}).get('workshops', [])}
+    free = [workshop_id for workshop_id in data['workshop_ids'] if workshop_id not in used]
+    if not free:
+        return
+    workshop_id = rng.choice(free)
+    yield 'POST', '/api/product-workshops', {
+        'product_id': product_id, 'workshop_id': workshop_id, 'manufacturing_time_hours': 1.5}
+    status, route = yield 'GET', f'/api/products/{product_id}/workshops', None
+    added = [step['product_workshop_id'] for step in (route or {}).get('workshops', [])
+             if step['workshop_id'] == workshop_id]
+    if not added:
+        return
+    yield 'PUT', f'/api/product-workshops/{added[0]}', {
+        'product_id': product_id, 'workshop_id': workshop_id, 'manufacturing_time_hours': 2.5}
+    yield 'DELETE', f'/api/product-workshops/{added[0]}', None
+
+
+SCENARIOS = {
+    'list': scenario_list,
+    'detail': scenario_detail,
+    'material': scenario_material,
+    'routes': scenario_routes,
+}
+
+
+def run_scenario(client, scenario, rng, data):
+    """Выполнить сценарий, вернуть (успех, число HTTP-запросов)"""
+    steps = scenario(rng, data)
+    requests = 0
+    try:
+        method, path, body = next(steps)
+        while True:
+            status, payload = client.request(method, path, body)
+            requests += 1
+            if status == 0 or status >= 400:
+                return False, requests
+            method, path, body = steps.send((status, payload))
+    except StopIteration:
+        return True, requests
+
+
+def load_reference_data(base_url, timeout):
+    """ID продуктов, цехов и типов для сценариев"""
+    client = Client(base_url, timeout)
+    try:
+        _, page = client.request('GET', '/api/products?limit=500')
+        _, workshops = client.request('GET', '/api/workshops')
+        _, product_types = client.request('GET', '/api/product-types')
+        _, material_types = client.request('GET', '/api/material-types')
+    finally:
+        client.close()
+    data = {
+        'product_ids': [item['product_id'] for item in (page or {}).get('items', [])],
+        'workshop_ids': [item['workshop_id'] for item in workshops or []],
+        'product_type_ids': [item['product_type_id'] for item in product_types or []],
+        'material_type_ids': [item['material_type_id'] for item in material_types or []],
+    }
+    empty = [name for name, values in data.items() if not values]
+    if empty:
+        raise RuntimeError(f"Нет данных для сценариев: {', '.join(empty)} (БД пуста или приложение недоступно)")
+    return data
+
+
+class LoadTest:
+    def __init__(self, base_url, clients, duration, mix, interval, timeout, seed):
+        self.base_url = base_url
+        self.clients = clients
+        self.duration = duration
+        self.mix = mix
+        self.interval = interval
+        self.timeout = timeout
+        self.seed = seed
+        self.records = []      # (время от старта, сценарий, мс, успех, HTTP-запросов)
+        self.pool_samples = []  # (время от старта, /api/system/db-pool)
+        self._stop = threading.Event()
+
+    def run(self, data) -> dict:
+        self.started = time.perf_counter()
+        threads = [threading.Thread(target=self._client, args=(number, data), daemon=True)
+                   for number in range(self.clients)]
+        monitor = threading.Thread(target=self._monitor, daemon=True)
+        for thread in threads + [monitor]:
+            thread.start()
+        self._stop.wait(self.duration)
+        self._stop.set()
+        for thread in threads + [monitor]:
+            thread.join(self.timeout + 1)
+        return self.report()
+
+    def _client(self, number, data):
+        rng = random.Random(self.seed * 1000 + number)
+        names, weights = list(self.mix), list(self.mix.values())
+        # Маршруты правит каждый клиент у своих продуктов: ошибки - от сервера, а не от гонки клиентов
+        data = dict(data, route_product_ids=data['product_ids'][number::self.clients] or data['product_ids'])
+        client = Client(self.base_url, self.timeout)
+        try:
+            while not self._stop.is_set():
+                name = rng.choices(names, weights)[0]
+                started = time.perf_counter()
+                ok, requests = run_scenario(client, SCENARIOS[name], rng, data)
+                finished = time.perf_counter()
+                self.records.append((finished - self.started, name, (finished - started) * 1000, ok, requests))
+        finally:
+            client.close()
+
+    def _monitor(self):
+        client = Client(self.base_url, self.timeout)
+        try:
+            while not self._stop.wait(self.interval):
+                status, pool = client.request('GET', '/api/system/db-pool')
+                if status == 200:
+                    self.pool_samples.append((time.perf_counter() - self.started, pool))
+        finally:
+            client.close()
+
+    def report(self) -> dict:
+        intervals = []
+        previous_pool = None
+        pool_by_window = {}
+        for at, pool in self.pool_samples:
+            pool_by_window[int(at // self.interval)] = pool
+
+        windows = max(1, math.ceil(self.duration / self.interval))
+        for window in range(windows):
+            start, end = window * self.interval, (window + 1) * self.interval
+            # Сценарии, завершившиеся после остановки, относятся к последнему интервалу
+            records = [r for r in self.records
+                       if start <= r[0] < end or (window == windows - 1 and r[0] >= end)]
+            if not records:
+                continue
+            pool = pool_by_window.get(window)
+            entry = self._summary(records, end - start)
+            entry['t'] = round(end, 1)
+            if pool:
+                entry['pool_checked_out'] = pool['checked_out']
+                entry['pool_overflow'] = pool['overflow']
+                if previous_pool is not None:
+                    checkouts = pool['checkouts'] - previous_pool['checkouts']
+                    waited = pool['wait_ms_total'] - previous_pool['wait_ms_total']
+                    entry['pool_wait_ms_per_checkout'] = round(waited / checkouts, 3) if checkouts > 0 else None
+                entry['pool_max_wait_ms'] = pool['max_wait_ms']
+                previous_pool = pool
+            intervals.append(entry)
+
+        elapsed = max(r[0] for r in self.records) if self.records else self.duration
+        scenarios = {
+            name: self._summary([r for r in self.records if r[1] == name], elapsed)
+            for name in self.mix if any(r[1] == name for r in self.records)
+        }
+        return {
+            'clients': self.clients,
+            'duration_s': self.duration,
+            'mix': self.mix,
+            'total': self._summary(self.records, elapsed),
+            'scenarios': scenarios,
+            'intervals': intervals,
+        }
+
+    @staticmethod
+    def _summary(records, seconds) -> dict:
+        latencies = [r[2] for r in records if r[3]]
+        errors = sum(1 for r in records if not r[3])
+        return {
+            'scenarios': len(records),
+            'requests': sum(r[4] for r in records),
+            'scenarios_per_s': round(len(records) / seconds, 1) if seconds else None,
+            'requests_per_s': round(sum(r[4] for r in records) / seconds, 1) if seconds else None,
+            'error_rate': round(errors / len(records), 4) if records else 0.0,
+            'p50_ms': round(percentile(latencies, 50), 1) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 1) if latencies else None,
+            'p99_ms': round(percentile(latencies, 99), 1) if latencies else None,
+        }
+
+
+def start_app(port, env_overrides, timeout=60):
+    """Запустить gunicorn с конфигурацией проекта и дождаться готовности"""
+    env = dict(os.environ, WEB_BIND=f'127.0.0.1:{port}', **env_overrides)
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    client = Client(f'http://127.0.0.1:{port}', 2)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Приложение не запустилось:\n{process.stderr.read().decode(errors='replace')[-2000:]}")
+        status, _ = client.request('GET', '/api/system/db-pool')
+        if status == 200:
+            client.close()
+            return process
+        time.sleep(0.2)
+    stop_app(process)
+    raise RuntimeError('Приложение не ответило за отведенное время')
+
+
+def stop_app(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def print_report(report, out):
+    print(f"{'t, с':>6} {'сцен/с':>8} {'запр/с':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ошибки':>7} "
+          f"{'пул':>5} {'ожид. мс':>9}", file=out)
+    for entry in report['intervals']:
+        wait = entry.get('pool_wait_ms_per_checkout')
+        print(f"{entry['t']:6.1f} {entry['scenarios_per_s']:8.1f} {entry['requests_per_s']:8.1f} "
+              f"{entry['p50_ms'] or 0:8.1f} {entry['p95_ms'] or 0:8.1f} {entry['p99_ms'] or 0:8.1f} "
+              f"{entry['error_rate']:7.2%} {entry.get('pool_checked_out', ''):>5} "
+              f"{'' if wait is None else f'{wait:.3f}':>9}", file=out)
+    print(file=out)
+    for name, summary in list(report['scenarios'].items()) + [('ИТОГО', report['total'])]:
+        print(f"{name:10} {summary['scenarios_per_s']:8.1f} сцен/с  p50 {summary['p50_ms']} мс  "
+              f"p95 {summary['p95_ms']} мс  p99 {summary['p99_ms']} мс  ошибки {summary['error_rate']:.2%}", file=out)
+
+
+def parse_pairs(pairs, convert, option):
+    result = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition('=')
+        if not sep:
+            raise SystemExit(f"{option}: ожидается KEY=VALUE, получено {pair!r}")
+        result[key] = convert(value)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест смешанным трафиком')
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help='Базовый URL приложения')
+    parser.add_argument('--start', action='store_true', help='Запустить приложение (gunicorn) на порту из --url')
+    parser.add_argument('--env', nargs='+', metavar='KEY=VALUE', help='Переменные окружения для --start')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='сек.')
+    parser.add_argument('--interval', type=float, default=5, help='Шаг отчета и опроса пула, сек.')
+    parser.add_argument('--mix', nargs='+', metavar='NAME=WEIGHT', help=f"Веса сценариев: {', '.join(SCENARIOS)}")
+    parser.add_argument('--timeout', type=float, default=30, help='Таймаут HTTP-запроса, сек.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--max-error-rate', type=float, default=0.0)
+    parser.add_argument('--output', help='Файл JSON с отчетом')
+    args = parser.parse_args()
+
+    mix = parse_pairs(args.mix, float, '--mix') or DEFAULT_MIX
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Неизвестные сценарии: {', '.join(sorted(unknown))}")
+
+    process = None
+    if args.start:
+        process = start_app(urllib.parse.urlsplit(args.url).port or 80, parse_pairs(args.env, str, '--env'))
+    try:
+        data = load_reference_data(args.url, args.timeout)
+        report = LoadTest(args.url, args.clients, args.duration, mix, args.interval, args.timeout, args.seed).run(data)
+    finally:
+        if process is not None:
+            stop_app(process)
+
+    print_report(report, sys.stderr if not args.output else sys.stdout)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if report['total']['error_rate'] > args.max_error_rate else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Замер времени старта приложения:
+импорт модулей, create_app() и первый запрос.
+
+Запуск (из корня проекта):
+    python scripts/startup_time.py
+    python scripts/startup_time.py --path /api/products --target-ms 800
+
+Цель по умолчанию: старт воркера до готовности к первому ответу
+(импорт + create_app + первый запрос) не дольше 1000 мс.
+Код возврата 1, если цель не выполнена.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_TARGET_MS = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер времени старта приложения')
+    parser.add_argument('--path', default='/api/product-types', help='URL первого запроса')
+    parser.add_argument('--target-ms', type=float, default=DEFAULT_TARGET_MS,
+                        help='Цель: импорт + create_app + первый запрос, мс')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    from app import create_app
+    t1 = time.perf_counter()
+    app = create_app()
+    t2 = time.perf_counter()
+    response = app.test_client().get(args.path)
+    t3 = time.perf_counter()
+
+    report = {
+        'import_ms': round((t1 - t0) * 1000, 1),
+        'create_app_ms': round((t2 - t1) * 1000, 1),
+        'first_request_ms': round((t3 - t2) * 1000, 1),
+        'first_request_status': response.status_code,
+        'total_ms': round((t3 - t0) * 1000, 1),
+        'target_ms': args.target_ms,
+        'startup_mode': app.config.get('DB_STARTUP_MODE'),
+        'loaded_modules': len(sys.modules),
+        'numpy_loaded': 'numpy' in sys.modules,
+    }
+    report['target_met'] = report['total_ms'] <= args.target_ms
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report['target_met'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Детерминированный генератор синтетических данных каталога
+для проверок и бенчмарков (пустая БД, схема - как в models).
+
+Справочники - те же, что в furniture_company.sql; продукты, маршруты
+и параметры генерируются из seed: при одинаковых аргументах данные
+совпадают (кроме отметок времени created_at/updated_at). Ограничения схемы соблюдаются: названия и
+артикулы уникальны, цены, время и размеры положительные, цеха в
+маршруте продукта не повторяются.
+
+Запуск (из корня проекта, БД должна быть пустой):
+    python scripts/synthetic_data.py --database-url sqlite:///bench.db --products 100000 --routes-per-product 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MATERIAL_TYPES = [
+    ('Мебельный щит из массива дерева', Decimal('0.80')),
+    ('Ламинированное ДСП', Decimal('0.70')),
+    ('Фанера', Decimal('0.55')),
+    ('МДФ', Decimal('0.30')),
+]
+
+PRODUCT_TYPES = [
+    ('Гостиные', Decimal('3.5'), ('Стенка для гостиной', 'Комплект мебели для гостиной', 'Тумба под ТВ')),
+    ('Прихожие', Decimal('5.6'), ('Прихожая', 'Шкаф для прихожей', 'Обувница')),
+    ('Мягкая мебель', Decimal('3.0'), ('Диван', 'Кресло', 'Пуф')),
+    ('Кровати', Decimal('4.7'), ('Кровать', 'Кровать двуспальная', 'Кровать детская')),
+    ('Шкафы', Decimal('1.5'), ('Шкаф-купе', 'Шкаф распашной', 'Стеллаж')),
+    ('Комоды', Decimal('2.3'), ('Комод', 'Тумба прикроватная', 'Комод с зеркалом')),
+]
+
+WORKSHOPS = [
+    ('Проектный', 'Проектирование', 4),
+    ('Расчетный', 'Проектирование', 5),
+    ('Раскроя', 'Обработка', 5),
+    ('Обработки', 'Обработка', 6),
+    ('Сушильный', 'Сушка', 3),
+    ('Покраски', 'Обработка', 5),
+    ('Столярный', 'Обработка', 7),
+    ('Изготовления изделий из искусственного камня и композитных материалов', 'Обработка', 3),
+    ('Изготовления мягкой мебели', 'Обработка', 5),
+    ('Монтажа стеклянных, зеркальных вставок и других изделий', 'Сборка', 2),
+    ('Сборки', 'Сборка', 6),
+    ('Упаковки', 'Сборка', 4),
+]
+
+FINISHES = ('Ольха горная', 'Вишня темная', 'Венге Винтаж', 'Дуб белёный', 'Ясень шимо', 'Орех итальянский',
+            'Сосна', 'Бук', 'Графит', 'Белый глянец', 'Кашемир', 'Сонома')
+
+ARTICLE_RANGE = (1_000_000, 10_000_000)  # семизначные артикулы, как в исходных данных
+
+
+def generate(session, products: int, routes_per_product: int = 4, workshops: int = len(WORKSHOPS),
+             seed: int = 42, batch_size: int = 10000) -> dict:
+    """
+    Заполнить пустую БД синтетическими данными и пересобрать сводку маршрутов
+
+    Args:
+        session: сессия SQLAlchemy (commit делает вызывающий код)
+        products: число продуктов
+        routes_per_product: строк product_workshops на продукт (не больше числа цехов)
+        workshops: число цехов (сверх 12 стандартных добавляются «Цех N»)
+        seed: зерно генератора
+        batch_size: строк в одном INSERT (executemany)
+
+    Returns:
+        dict: количество строк по таблицам
+    """
+    from models import MaterialType, ProductType, Workshop, Product, ProductWorkshop, ProductParameter
+    from services.manufacturing_summary import ManufacturingSummaryService
+
+    if products <= 0:
+        raise ValueError('products должно быть > 0')
+    if not 1 <= routes_per_product <= workshops:
+        raise ValueError('routes_per_product должно быть от 1 до числа цехов')
+    if products > ARTICLE_RANGE[1] - ARTICLE_RANGE[0]:
+        raise ValueError('Слишком много продуктов для семизначных артикулов')
+
+    rng = random.Random(seed)
+
+    def insert(table, rows):
+        for start in range(0, len(rows), batch_size):
+            session.execute(table.insert(), rows[start:start + batch_size])
+
+    insert(MaterialType.__table__, [
+        {'material_type_id': index, 'material_type_name': name, 'raw_material_loss_percent': loss}
+        for index, (name, loss) in enumerate(MATERIAL_TYPES, start=1)
+    ])
+    insert(ProductType.__table__, [
+        {'product_type_id': index, 'product_type_name': name, 'product_type_coefficient': coefficient}
+        for index, (name, coefficient, _) in enumerate(PRODUCT_TYPES, start=1)
+    ])
+    workshop_rows = [
+        {'workshop_id': index, 'workshop_name': name, 'workshop_type': workshop_type, 'staff_count': staff}
+        for index, (name, workshop_type, staff) in enumerate(WORKSHOPS[:workshops], start=1)
+    ]
+    for index in range(len(workshop_rows) + 1, workshops + 1):
+        workshop_rows.append({'workshop_id': index, 'workshop_name': f'Цех {index}',
+                              'workshop_type': 'Обработка', 'staff_count': rng.randint(1, 8)})
+    insert(Workshop.__table__, workshop_rows)
+
+    articles = rng.sample(range(*ARTICLE_RANGE), products)
+    workshop_ids = list(range(1, workshops + 1))
+    product_rows, route_rows, parameter_rows = [], [], []
+    route_id = 0
+    for product_id in range(1, products + 1):
+        type_index = rng.randrange(len(PRODUCT_TYPES))
+        product_rows.append({
+            'product_id': product_id,
+            'product_type_id': type_index + 1,
+            'product_name': f"{rng.choice(PRODUCT_TYPES[type_index][2])} {rng.choice(FINISHES)} {product_id}",
+            'article_number': articles[product_id - 1],
+            'minimum_partner_price': Decimal(rng.randint(500_00, 250_000_00)) / 100,
+            'material_type_id': rng.randint(1, len(MATERIAL_TYPES)),
+        })
+        for workshop_id in sorted(rng.sample(workshop_ids, routes_per_product)):
+            route_id += 1
+            route_rows.append({
+                'product_workshop_id': route_id,
+                'product_id': product_id,
+                'workshop_id': workshop_id,
+                'manufacturing_time_hours': Decimal(rng.randint(1, 50)) / 10,
+            })
+        parameter_rows.append({
+            'product_parameter_id': product_id,
+            'product_id': product_id,
+            'product_type_id': type_index + 1,
+            'parameter1_value': float(rng.randint(40, 260)),
+            'parameter2_value': float(rng.randint(30, 120)),
+        })
+
+        # Пишем по мере генерации, чтобы не держать 1M маршрутов в памяти
+        if len(route_rows) >= batch_size or product_id == products:
+            insert(Product.__table__, product_rows)
+            insert(ProductParameter.__table__, parameter_rows)
+            insert(ProductWorkshop.__table__, route_rows)
+            product_rows, route_rows, parameter_rows = [], [], []
+
+    _sync_sequences(session)
+    summary = ManufacturingSummaryService(session).rebuild()
+
+    return {
+        'material_types': len(MATERIAL_TYPES),
+        'product_types': len(PRODUCT_TYPES),
+        'workshops': workshops,
+        'products': products,
+        'product_workshops': products * routes_per_product,
+        'product_parameters': products,
+        'product_manufacturing_summary': summary['products'],
+    }
+
+
+def _sync_sequences(session):
+    """PostgreSQL: сдвинуть SERIAL-последовательности после вставки с явными id"""
+    from sqlalchemy import text
+
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    for table, column in (('material_types', 'material_type_id'), ('product_types', 'product_type_id'),
+                          ('workshops', 'workshop_id'), ('products', 'product_id'),
+                          ('product_workshops', 'product_workshop_id'),
+                          ('product_parameters', 'product_parameter_id')):
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), COALESCE(MAX({column}), 1)) FROM {table}"
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетические данные каталога (в пустую БД)')
+    parser.add_argument('--database-url', required=True, help='URL пустой БД (таблицы создаются по models)')
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--routes-per-product', type=int, default=10)
+    parser.add_argument('--workshops', type=int, default=len(WORKSHOPS))
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    from config import Config
+    from app import create_app
+    from database import db
+
+    class SyntheticConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+        DB_STARTUP_MODE = 'create_all'
+        METRICS_ENABLED = False
+
+    app = create_app(SyntheticConfig)
+    started = time.perf_counter()
+    with app.app_context():
+        counts = generate(db.session, args.products, args.routes_per_product, args.workshops, args.seed)
+        db.session.commit()
+    print(f"Сгенерировано за {time.perf_counter() - started:.1f} с: {counts}")
+
+
+if __name__ == '__main__':
+    main()
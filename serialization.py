@@ -0,0 +1,88 @@
+"""
+Быстрая JSON-сериализация ответов (orjson) вместо стандартного json
+"""
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # orjson не установлен - работает стандартный провайдер
+    orjson = None
+
+
+def _default(value):
+    """
+    Типы, которые orjson не сериализует сам или сериализует иначе, чем стандартный провайдер:
+    Decimal и UUID - строкой, datetime/date - HTTP-датой ("Wed, 21 Oct 2015 07:28:00 GMT")
+    """
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, date):
+        return http_date(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj, sort_keys=False, indent=False) -> bytes:
+    """
+    JSON в байтах UTF-8 для ответов вне Flask (асинхронный режим):
+    orjson, если установлен, иначе стандартный json с тем же выводом.
+    Что orjson не сериализует (целые больше 64 бит), сериализуется стандартным json.
+    """
+    if orjson is None:
+        return _json_dumps_bytes(obj, sort_keys, indent)
+    # Даты - через _default: собственный формат orjson (ISO 8601) отличается от стандартного
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    try:
+        return orjson.dumps(obj, default=_default, option=option)
+    except orjson.JSONEncodeError:
+        return _json_dumps_bytes(obj, sort_keys, indent)
+
+
+def _json_dumps_bytes(obj, sort_keys, indent) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, indent=2 if indent else None,
+                      separators=None if indent else (',', ':'), default=_default).encode('utf-8')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON-провайдер Flask на orjson.
+
+    Вывод совпадает со стандартным провайдером: UTF-8 без экранирования,
+    Decimal и UUID - строкой, datetime/date - HTTP-датой, целые больше 64 бит -
+    через стандартный json (orjson их не сериализует). Порядок ключей сохраняется
+    (сортировка - только если sort_keys=True). Разбор входящего JSON - стандартный.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs):
+        return self._dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+
+    def _dumps_bytes(self, obj, indent=False):
+        return dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent)
+
+
+def init_json(app):
+    """
+    Выбор JSON-провайдера по JSON_SERIALIZER: orjson (если установлен) или default
+    """
+    if app.config.get('JSON_SERIALIZER', 'orjson') == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+    app.json.sort_keys = app.config.get('JSON_SORT_KEYS', False)
+    app.json.ensure_ascii = app.config.get('JSON_AS_ASCII', False)
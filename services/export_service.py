@@ -0,0 +1,112 @@
+"""
+Потоковая выгрузка продукции и маршрутов производства (NDJSON / CSV)
+"""
+import csv
+import io
+import json
+
+from sqlalchemy import text
+from models import Product
+from services.product_service import ProductService
+
+
+class ExportService:
+    """
+    Выгрузка больших таблиц без накопления результата в памяти.
+
+    Строки читаются из БД пачками (yield_per - серверный курсор на PostgreSQL)
+    и сразу отдаются генератором, поэтому расход памяти не зависит от размера таблицы.
+    """
+
+    FORMATS = ('ndjson', 'csv')
+
+    PRODUCT_FIELDS = [
+        'product_id', 'article_number', 'product_name', 'product_type_id', 'product_type',
+        'material_type_id', 'material_type', 'minimum_partner_price', 'manufacturing_time_hours'
+    ]
+
+    PRODUCT_WORKSHOP_FIELDS = [
+        'product_workshop_id', 'product_id', 'workshop_id', 'manufacturing_time_hours',
+        'product_name', 'workshop_name'
+    ]
+
+    def __init__(self, db_session, batch_size: int = 1000):
+        self.db = db_session
+        self.batch_size = batch_size
+
+    def iter_products(self):
+        """Продукты с временем производства (как в GET /api/products)"""
+        query = (
+            ProductService(self.db).products_listing_query()
+            .order_by(Product.product_id)
+            .execution_options(yield_per=self.batch_size)
+        )
+        for row in query:
+            yield ProductService.listing_row_to_dict(row)
+
+    # Маршруты производства (как в GET /api/product-workshops); async_app читает тот же запрос потоком
+    PRODUCT_WORKSHOPS_QUERY = text("""SELECT pw.product_workshop_id,
+                                             pw.product_id,
+                                             pw.workshop_id,
+                                             pw.manufacturing_time_hours,
+                                             p.product_name,
+                                             w.workshop_name
+                                      FROM product_workshops pw
+                                               JOIN products p ON pw.product_id = p.product_id
+                                               JOIN workshops w ON pw.workshop_id = w.workshop_id
+                                      ORDER BY pw.product_id, pw.workshop_id""")
+
+    def iter_product_workshops(self):
+        """Маршруты производства (как в GET /api/product-workshops)"""
+        result = self.db.execute(self.PRODUCT_WORKSHOPS_QUERY, execution_options={'yield_per': self.batch_size})
+        for row in result:
+            yield self.product_workshop_row(row)
+
+    @staticmethod
+    def product_workshop_row(row):
+        """Строка PRODUCT_WORKSHOPS_QUERY -> словарь для API"""
+        return {
+            'product_workshop_id': row[0],
+            'product_id': row[1],
+            'workshop_id': row[2],
+            'manufacturing_time_hours': float(row[3]),
+            'product_name': row[4],
+            'workshop_name': row[5]
+        }
+
+    def stream(self, rows, fieldnames, fmt):
+        """
+        Генератор тела ответа и MIME-тип для формата выгрузки
+
+        Raises:
+            ValueError: неизвестный формат
+        """
+        if fmt == 'ndjson':
+            return self.to_ndjson(rows), 'application/x-ndjson'
+        if fmt == 'csv':
+            return self.to_csv(rows, fieldnames), 'text/csv'
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}. Допустимо: {', '.join(self.FORMATS)}")
+
+    def to_ndjson(self, rows):
+        """Строки -> NDJSON, куски по batch_size строк"""
+        chunk = []
+        for row in rows:
+            chunk.append(json.dumps(row, ensure_ascii=False))
+            if len(chunk) >= self.batch_size:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+
+    def to_csv(self, rows, fieldnames):
+        """Строки -> CSV с заголовком, куски по batch_size строк"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+        writer.writeheader()
+        for count, row in enumerate(rows, start=1):
+            writer.writerow(row)
+            if count % self.batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
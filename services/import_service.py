@@ -0,0 +1,409 @@
+"""
+Массовая загрузка справочников, продукции и маршрутов из CSV/XLSX
+"""
+import csv
+import io
+import logging
+import os
+import time
+
+from sqlalchemy import func, text
+
+from models import Product, ProductType, MaterialType, Workshop, ProductWorkshop, ProductParameter
+from services.manufacturing_summary import ManufacturingSummaryService
+
+logger = logging.getLogger(__name__)
+
+# Русские заголовки исходных файлов -> имена колонок БД
+COLUMN_ALIASES = {
+    'Тип продукции': 'product_type',
+    'Коэффициент типа продукции': 'product_type_coefficient',
+    'Тип материала': 'material_type_name',
+    'Основной материал': 'material_type',
+    'Процент потерь сырья': 'raw_material_loss_percent',
+    'Наименование продукции': 'product_name',
+    'Артикул': 'article_number',
+    'Минимальная стоимость для партнера': 'minimum_partner_price',
+    'Название цеха': 'workshop_name',
+    'Тип цеха': 'workshop_type',
+    'Количество человек для производства': 'staff_count',
+    'Время изготовления, ч': 'manufacturing_time_hours',
+    'Параметр 1': 'parameter1_value',
+    'Параметр 2': 'parameter2_value',
+    'Длина, см': 'parameter1_value',
+    'Ширина, см': 'parameter2_value',
+}
+
+
+class BulkImportService:
+    """
+    Загрузка файлов пачками: чтение chunk-ами, векторная проверка строк (pandas),
+    запись многострочными INSERT ... ON CONFLICT DO UPDATE
+    (для маршрутов на PostgreSQL - COPY во временную таблицу + один INSERT ... SELECT).
+
+    Порядок загрузки: material_types, product_types, workshops, products, product_workshops,
+    product_parameters - внешние ключи указываются по естественным ключам (названия, артикул) и
+    разрешаются по словарям, прочитанным из БД один раз на файл.
+    """
+
+    ENTITIES = ('material_types', 'product_types', 'workshops', 'products', 'product_workshops',
+                'product_parameters')
+    BATCH_SIZE = 1000  # значений в одном IN (ограничение числа параметров SQLite)
+
+    def __init__(self, db_session, chunk_size: int = 50000, method: str = 'auto'):
+        self.db = db_session
+        self.chunk_size = chunk_size
+        self.dialect = db_session.get_bind().dialect.name
+        if method == 'auto':
+            method = 'copy' if self.dialect == 'postgresql' else 'insert'
+        if method == 'copy' and self.dialect != 'postgresql':
+            raise ValueError("COPY поддерживается только для PostgreSQL")
+        self.method = method
+
+    # ===== ОБЩИЙ ЦИКЛ ЗАГРУЗКИ =====
+
+    def load(self, entity: str, path: str) -> dict:
+        """
+        Загрузить файл в таблицу entity.
+
+        Returns:
+            dict: rows_read, rows_loaded, rows_rejected, errors (первые 20), seconds, rows_per_sec
+        """
+        if entity not in self.ENTITIES:
+            raise ValueError(f"Неизвестная сущность: {entity}")
+
+        prepare = getattr(self, f'_prepare_{entity}')
+        write = getattr(self, f'_write_{entity}')
+        context = self._load_context(entity)
+
+        stats = {'entity': entity, 'file': path, 'rows_read': 0, 'rows_loaded': 0,
+                 'rows_rejected': 0, 'errors': []}
+        started = time.perf_counter()
+
+        for chunk in self._read_chunks(path):
+            offset = stats['rows_read']
+            stats['rows_read'] += len(chunk)
+
+            valid, rejected = prepare(self._normalize_columns(chunk), context)
+            stats['rows_rejected'] += len(rejected)
+            for index, reason in rejected:
+                if len(stats['errors']) < 20:
+                    # +2: нумерация с 1 и строка заголовка
+                    stats['errors'].append({'row': offset + index + 2, 'error': reason})
+
+            if len(valid):
+                write(valid)
+                self.db.commit()
+                stats['rows_loaded'] += len(valid)
+
+            logger.info("%s: прочитано %s, загружено %s", entity, stats['rows_read'], stats['rows_loaded'])
+
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        stats['rows_per_sec'] = round(stats['rows_loaded'] / stats['seconds']) if stats['seconds'] else None
+        return stats
+
+    def _read_chunks(self, path):
+        """DataFrame-ы по chunk_size строк (все значения - строки)"""
+        import pandas as pd
+
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.csv':
+            try:
+                chunks = pd.read_csv(path, chunksize=self.chunk_size, dtype=str, keep_default_na=False)
+            except pd.errors.EmptyDataError:
+                raise ValueError(f"Пустой файл: {path}") from None
+            yield from chunks
+        elif extension in ('.xlsx', '.xlsm'):
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(path, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                first = next(rows, None)
+                if first is None:
+                    raise ValueError(f"Пустой файл: {path}")
+                header = [str(h).strip() if h is not None else '' for h in first]
+                batch = []
+                for row in rows:
+                    batch.append(['' if v is None else str(v) for v in row])
+                    if len(batch) >= self.chunk_size:
+                        yield pd.DataFrame(batch, columns=header)
+                        batch = []
+                if batch:
+                    yield pd.DataFrame(batch, columns=header)
+            finally:
+                workbook.close()
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {path} (нужен .csv или .xlsx)")
+
+    @staticmethod
+    def _normalize_columns(chunk):
+        chunk = chunk.rename(columns=lambda c: COLUMN_ALIASES.get(str(c).strip(), str(c).strip()))
+        chunk = chunk.reset_index(drop=True)  # индекс = номер строки внутри chunk-а
+        return chunk.apply(lambda column: column.str.strip() if column.dtype == object else column)
+
+    def _load_context(self, entity):
+        """Словари естественный ключ -> ID для разрешения внешних ключей"""
+        if entity == 'products':
+            return {
+                'product_types': dict(self.db.query(ProductType.product_type_name, ProductType.product_type_id)),
+                'material_types': dict(self.db.query(MaterialType.material_type_name, MaterialType.material_type_id)),
+            }
+        if entity == 'product_workshops':
+            return {
+                'products': {int(a): i for a, i in self.db.query(Product.article_number, Product.product_id)},
+                'workshops': dict(self.db.query(Workshop.workshop_name, Workshop.workshop_id)),
+            }
+        if entity == 'product_parameters':
+            products = self.db.query(Product.article_number, Product.product_id, Product.product_type_id).all()
+            return {
+                'products': {int(a): i for a, i, _ in products},
+                'product_types': {i: t for _, i, t in products},
+            }
+        return {}
+
+    # ===== ПРОВЕРКА СТРОК =====
+
+    @staticmethod
+    def _numbers(series):
+        """Строки -> числа; поддерживаются запятая как разделитель и знак %"""
+        import pandas as pd
+
+        cleaned = series.astype(str).str.replace('%', '', regex=False) \
+            .str.replace('\u00a0', '', regex=False).str.replace(' ', '', regex=False) \
+            .str.replace(',', '.', regex=False)
+        return pd.to_numeric(cleaned, errors='coerce')
+
+    @staticmethod
+    def _split(chunk, checks, key):
+        """
+        Применить проверки (название, булева маска ошибок) ко всему chunk-у сразу.
+        Дубликаты ключа внутри chunk-а схлопываются (побеждает последняя строка).
+        """
+        import pandas as pd
+
+        bad = pd.Series(False, index=chunk.index)
+        rejected = []
+        for reason, mask in checks:
+            mask = mask & ~bad
+            rejected.extend((int(i), reason) for i in chunk.index[mask])
+            bad |= mask
+        valid = chunk[~bad].drop_duplicates(subset=key, keep='last')
+        return valid, rejected
+
+    @staticmethod
+    def _require(chunk, columns):
+        missing = [c for c in columns if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"В файле нет колонок: {', '.join(missing)}")
+
+    def _prepare_material_types(self, chunk, context):
+        self._require(chunk, ['material_type_name', 'raw_material_loss_percent'])
+        chunk = chunk.assign(raw_material_loss_percent=self._numbers(chunk['raw_material_loss_percent']))
+        return self._split(chunk, [
+            ('empty material_type_name', chunk['material_type_name'] == ''),
+            ('invalid raw_material_loss_percent', ~(chunk['raw_material_loss_percent'] >= 0)),
+        ], ['material_type_name'])
+
+    def _prepare_product_types(self, chunk, context):
+        if 'product_type_name' not in chunk.columns and 'product_type' in chunk.columns:
+            chunk = chunk.rename(columns={'product_type': 'product_type_name'})
+        self._require(chunk, ['product_type_name', 'product_type_coefficient'])
+        chunk = chunk.assign(product_type_coefficient=self._numbers(chunk['product_type_coefficient']))
+        return self._split(chunk, [
+            ('empty product_type_name', chunk['product_type_name'] == ''),
+            ('invalid product_type_coefficient', ~(chunk['product_type_coefficient'] > 0)),
+        ], ['product_type_name'])
+
+    def _prepare_workshops(self, chunk, context):
+        self._require(chunk, ['workshop_name', 'workshop_type', 'staff_count'])
+        chunk = chunk.assign(staff_count=self._numbers(chunk['staff_count']))
+        return self._split(chunk, [
+            ('empty workshop_name', chunk['workshop_name'] == ''),
+            ('empty workshop_type', chunk['workshop_type'] == ''),
+            ('invalid staff_count', ~(chunk['staff_count'] > 0) | (chunk['staff_count'] % 1 != 0)),
+        ], ['workshop_name'])
+
+    def _prepare_products(self, chunk, context):
+        self._require(chunk, ['product_name', 'article_number', 'minimum_partner_price'])
+        chunk = chunk.assign(
+            article_number=self._numbers(chunk['article_number']),
+            minimum_partner_price=self._numbers(chunk['minimum_partner_price']),
+            product_type_id=self._foreign_key(chunk, 'product_type', context['product_types']),
+            material_type_id=self._foreign_key(chunk, 'material_type', context['material_types']),
+        )
+        valid, rejected = self._split(chunk, [
+            ('empty product_name', chunk['product_name'] == ''),
+            ('invalid article_number', ~(chunk['article_number'] > 0) | (chunk['article_number'] % 1 != 0)),
+            ('invalid minimum_partner_price', ~(chunk['minimum_partner_price'] > 0)),
+            ('unknown product_type', chunk['product_type_id'].isna()),
+            ('unknown material_type', chunk['material_type_id'].isna()),
+        ], ['article_number'])
+
+        # product_name уникален: строка, чье наименование уже занято другим артикулом
+        # (в этом же chunk-е или в БД), отклоняется отдельно, а не роняет весь chunk
+        duplicate = valid['product_name'].duplicated(keep='last')
+        rejected.extend((int(i), 'duplicate product_name') for i in valid.index[duplicate])
+        valid = valid[~duplicate]
+
+        owner = valid['product_name'].map(self._product_name_owners(valid['product_name'].tolist()))
+        taken = owner.notna() & (owner != valid['article_number'])
+        rejected.extend((int(i), 'product_name taken by another article_number') for i in valid.index[taken])
+        return valid[~taken], rejected
+
+    def _product_name_owners(self, names):
+        """Наименование -> артикул для наименований, уже существующих в БД"""
+        owners = {}
+        for start in range(0, len(names), self.BATCH_SIZE):
+            batch = names[start:start + self.BATCH_SIZE]
+            owners.update(
+                self.db.query(Product.product_name, Product.article_number)
+                .filter(Product.product_name.in_(batch))
+            )
+        return owners
+
+    def _prepare_product_workshops(self, chunk, context):
+        self._require(chunk, ['manufacturing_time_hours'])
+        chunk = chunk.assign(
+            manufacturing_time_hours=self._numbers(chunk['manufacturing_time_hours']),
+            product_id=self._foreign_key(chunk, 'article_number', context['products'], numeric=True),
+            workshop_id=self._foreign_key(chunk, 'workshop_name', context['workshops']),
+        )
+        return self._split(chunk, [
+            ('unknown product', chunk['product_id'].isna()),
+            ('unknown workshop', chunk['workshop_id'].isna()),
+            ('invalid manufacturing_time_hours', ~(chunk['manufacturing_time_hours'] > 0)),
+        ], ['product_id', 'workshop_id'])
+
+    def _prepare_product_parameters(self, chunk, context):
+        self._require(chunk, ['parameter1_value', 'parameter2_value'])
+        product_id = self._foreign_key(chunk, 'article_number', context['products'], numeric=True)
+        chunk = chunk.assign(
+            parameter1_value=self._numbers(chunk['parameter1_value']),
+            parameter2_value=self._numbers(chunk['parameter2_value']),
+            product_id=product_id,
+            # Тип продукции - всегда тот, что у продукта
+            product_type_id=product_id.map(context['product_types']),
+        )
+        for column, default in (('parameter1_name', 'Длина'), ('parameter2_name', 'Ширина')):
+            if column not in chunk.columns:
+                chunk[column] = default
+            chunk[column] = chunk[column].where(chunk[column] != '', default)
+        return self._split(chunk, [
+            ('unknown product', chunk['product_id'].isna()),
+            ('invalid parameter1_value', ~chunk['parameter1_value'].between(0, float('inf'), inclusive='neither')),
+            ('invalid parameter2_value', ~chunk['parameter2_value'].between(0, float('inf'), inclusive='neither')),
+        ], ['product_id'])
+
+    def _foreign_key(self, chunk, name_column, mapping, numeric=False):
+        """
+        ID по естественному ключу (колонка name_column) или из колонки <сущность>_id.
+        Неизвестные значения -> NaN (строка отбрасывается проверкой).
+        """
+        id_column = {
+            'product_type': 'product_type_id', 'material_type': 'material_type_id',
+            'article_number': 'product_id', 'workshop_name': 'workshop_id',
+        }[name_column]
+        if name_column in chunk.columns:
+            keys = self._numbers(chunk[name_column]) if numeric else chunk[name_column]
+            return keys.map(mapping)
+        if id_column in chunk.columns:
+            ids = self._numbers(chunk[id_column])
+            return ids.where(ids.isin(set(mapping.values())))
+        raise ValueError(f"В файле нет колонок {name_column} или {id_column}")
+
+    # ===== ЗАПИСЬ =====
+
+    def _upsert(self, table, rows, key, update_columns):
+        """Многострочный INSERT ... ON CONFLICT (key) DO UPDATE (executemany пачками)"""
+        if self.dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif self.dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            raise ValueError(f"Upsert не поддерживается для {self.dialect}")
+
+        statement = insert(table)
+        updates = {column: statement.excluded[column] for column in update_columns}
+        if 'updated_at' in table.c:
+            updates['updated_at'] = func.now()
+        statement = statement.on_conflict_do_update(index_elements=key, set_=updates)
+        self.db.execute(statement, rows)
+
+    @staticmethod
+    def _records(frame, columns, casts):
+        return [
+            {column: cast(value) for column, cast, value in zip(columns, casts, values)}
+            for values in frame[columns].itertuples(index=False, name=None)
+        ]
+
+    def _write_material_types(self, frame):
+        columns = ['material_type_name', 'raw_material_loss_percent']
+        self._upsert(MaterialType.__table__, self._records(frame, columns, [str, float]),
+                     ['material_type_name'], ['raw_material_loss_percent'])
+
+    def _write_product_types(self, frame):
+        columns = ['product_type_name', 'product_type_coefficient']
+        self._upsert(ProductType.__table__, self._records(frame, columns, [str, float]),
+                     ['product_type_name'], ['product_type_coefficient'])
+
+    def _write_workshops(self, frame):
+        columns = ['workshop_name', 'workshop_type', 'staff_count']
+        self._upsert(Workshop.__table__, self._records(frame, columns, [str, str, int]),
+                     ['workshop_name'], ['workshop_type', 'staff_count'])
+
+    def _write_products(self, frame):
+        columns = ['product_name', 'article_number', 'minimum_partner_price',
+                   'product_type_id', 'material_type_id']
+        self._upsert(Product.__table__, self._records(frame, columns, [str, int, float, int, int]),
+                     ['article_number'],
+                     ['product_name', 'minimum_partner_price', 'product_type_id', 'material_type_id'])
+
+    def _write_product_workshops(self, frame):
+        columns = ['product_id', 'workshop_id', 'manufacturing_time_hours']
+        if self.method == 'copy':
+            self._copy_product_workshops(frame[columns])
+        else:
+            self._upsert(ProductWorkshop.__table__, self._records(frame, columns, [int, int, float]),
+                         ['product_id', 'workshop_id'], ['manufacturing_time_hours'])
+        # Сводка маршрутов - в той же транзакции, что и chunk
+        ManufacturingSummaryService(self.db).refresh(frame['product_id'].unique())
+
+    def _write_product_parameters(self, frame):
+        columns = ['product_id', 'product_type_id', 'parameter1_name', 'parameter1_value',
+                   'parameter2_name', 'parameter2_value']
+        self._upsert(ProductParameter.__table__, self._records(frame, columns, [int, int, str, float, str, float]),
+                     ['product_id'], columns[1:])
+
+    def _copy_product_workshops(self, frame):
+        """
+        PostgreSQL: COPY chunk-а во временную таблицу и один
+        INSERT ... SELECT ... ON CONFLICT в product_workshops
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for product_id, workshop_id, hours in frame.itertuples(index=False, name=None):
+            writer.writerow((int(product_id), int(workshop_id), hours))
+        buffer.seek(0)
+
+        self.db.execute(text("""
+            CREATE TEMP TABLE IF NOT EXISTS product_workshops_import (
+                product_id INT, workshop_id INT, manufacturing_time_hours DECIMAL(8, 2)
+            ) ON COMMIT DELETE ROWS
+        """))
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY product_workshops_import (product_id, workshop_id, manufacturing_time_hours) "
+                "FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+        self.db.execute(text("""
+            INSERT INTO product_workshops (product_id, workshop_id, manufacturing_time_hours)
+            SELECT product_id, workshop_id, manufacturing_time_hours FROM product_workshops_import
+            ON CONFLICT (product_id, workshop_id) DO UPDATE
+                SET manufacturing_time_hours = EXCLUDED.manufacturing_time_hours,
+                    updated_at = CURRENT_TIMESTAMP
+        """))
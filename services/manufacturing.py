@@ -1,17 +1,46 @@
 """
 Модуль для расчета параметров производства
 """
+import logging
+
+
+from models import ProductManufacturingSummary
+from services.material_service import raw_material_formula
+from services.reference_cache import reference_cache
+
+logger = logging.getLogger(__name__)
 
-from models import ProductWorkshop, ProductType, MaterialType
 
 class ManufacturingService:
     """Сервис для расчета параметров производства"""
 
+    @staticmethod
+    def manufacturing_time_table():
+        """
+        Таблица со суммарным временем производства по продуктам
+        (product_manufacturing_summary: колонки product_id, total_hours).
+
+        Нужна для списков продукции: время берется JOIN-ом по первичному ключу,
+        без агрегации product_workshops на каждый запрос.
+        """
+        return ProductManufacturingSummary.__table__
+
+    @staticmethod
+    def round_manufacturing_time(total_hours) -> int:
+        """
+        Приведение суммы часов к результату calculate_manufacturing_time:
+        целое число часов, -1 если у продукции нет маршрута
+        """
+        if total_hours is None:
+            return -1
+        return int(round(float(total_hours)))
+
     @staticmethod
     def calculate_manufacturing_time(product_id: int, db_session) -> int:
         """
         Расчет времени изготовления продукции
-        Время складывается из времени нахождения в каждом цехе.
+        Время складывается из времени нахождения в каждом цехе;
+        сумма берется из сводки маршрутов (один запрос по первичному ключу).
 
         Args:
             product_id: ID продукции
@@ -22,25 +51,16 @@ class ManufacturingService:
             -1 если продукция не найдена
         """
         try:
-            # Получаем все цехи, в которых производится продукция
-            product_workshops = db_session.query(ProductWorkshop).filter(
-                ProductWorkshop.product_id == product_id
-            ).all()
+            # Суммарное время поддерживается при каждой записи в product_workshops
+            total_time = db_session.query(ProductManufacturingSummary.total_hours).filter(
+                ProductManufacturingSummary.product_id == product_id
+            ).scalar()
 
-            if not product_workshops:
-                return -1
-
-            # Суммируем время во всех цехах
-            total_time = sum(
-                float(pw.manufacturing_time_hours)
-                for pw in product_workshops
-            )  # ✅ ИСПРАВЛЕНО: закрыта скобка
-
-            # Возвращаем целое число часов
-            return int(round(total_time))
+            # Возвращаем целое число часов (-1, если маршрута нет)
+            return ManufacturingService.round_manufacturing_time(total_time)
 
         except Exception as e:
-            print(f"Ошибка при расчете времени производства: {str(e)}")
+            logger.error("Ошибка при расчете времени производства: %s", e)
             return -1
 
     @staticmethod
@@ -73,36 +93,26 @@ class ManufacturingService:
             if quantity <= 0 or param1 <= 0 or param2 <= 0:
                 return -1
 
-            # Получаем тип продукции
-            product_type = db_session.query(ProductType).filter(
-                ProductType.product_type_id == product_type_id
-            ).first()
+            # Получаем коэффициенты из кэша справочников
+            coefficients, losses = reference_cache.get(db_session)
 
-            if not product_type:
+            if product_type_id not in coefficients:
                 return -1
 
-            # Получаем тип материала
-            material_type = db_session.query(MaterialType).filter(
-                MaterialType.material_type_id == material_type_id
-            ).first()
-
-            if not material_type:
+            if material_type_id not in losses:
                 return -1
 
-            # Получаем коэффициенты
-            product_coefficient = float(product_type.product_type_coefficient)
-            loss_percent = float(material_type.raw_material_loss_percent)
-
-            # Расчет необходимого сырья
-            raw_material_per_unit = param1 * param2 * product_coefficient
-            total_raw_material = quantity * raw_material_per_unit
+            product_coefficient = coefficients[product_type_id]
+            loss_percent = losses[material_type_id]
 
-            # Добавляем потери сырья
-            total_raw_material_with_loss = total_raw_material * (1 + loss_percent / 100)
+            # Расчет необходимого сырья с учетом потерь (общая формула с пакетным расчетом)
+            total_raw_material_with_loss = raw_material_formula(
+                param1, param2, product_coefficient, quantity, loss_percent
+            )
 
             # Возвращаем целое число
             return int(round(total_raw_material_with_loss))
 
         except Exception as e:
-            print(f"Ошибка при расчете сырья: {str(e)}")
+            logger.error("Ошибка при расчете сырья: %s", e)
             return -1
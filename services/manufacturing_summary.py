@@ -0,0 +1,118 @@
+"""
+Сводка маршрутов производства по продуктам (product_manufacturing_summary)
+"""
+from sqlalchemy import bindparam, text
+
+# Пересчет строк сводки по данным product_workshops.
+# «Узкое место» - цех с наибольшим временем (при равенстве - с меньшим workshop_id).
+_SUMMARY_SELECT = """
+    SELECT pw.product_id,
+           SUM(pw.manufacturing_time_hours),
+           COUNT(*),
+           (SELECT b.workshop_id FROM product_workshops b
+            WHERE b.product_id = pw.product_id
+            ORDER BY b.manufacturing_time_hours DESC, b.workshop_id
+            LIMIT 1),
+           MAX(pw.manufacturing_time_hours)
+    FROM product_workshops pw
+"""
+
+_SUMMARY_INSERT = """
+    INSERT INTO product_manufacturing_summary
+        (product_id, total_hours, workshop_count, bottleneck_workshop_id, bottleneck_hours)
+"""
+
+# Строка сводки обновляется на месте: без окна, в котором ее нет
+# (DELETE + INSERT давал пустое чтение и конфликт ключа у параллельных транзакций)
+_SUMMARY_UPSERT = """
+    ON CONFLICT (product_id) DO UPDATE
+        SET total_hours            = excluded.total_hours,
+            workshop_count         = excluded.workshop_count,
+            bottleneck_workshop_id = excluded.bottleneck_workshop_id,
+            bottleneck_hours       = excluded.bottleneck_hours,
+            updated_at             = CURRENT_TIMESTAMP
+"""
+
+# Строки сводки продуктов, у которых маршрута больше нет
+_SUMMARY_DELETE_ORPHANS = """
+    DELETE FROM product_manufacturing_summary
+    WHERE NOT EXISTS (SELECT 1 FROM product_workshops pw
+                      WHERE pw.product_id = product_manufacturing_summary.product_id)
+"""
+
+
+class ManufacturingSummaryService:
+    """
+    Поддержка сводки маршрутов: суммарное время, число цехов и «узкое место».
+
+    Вызывается при каждой записи в product_workshops, до commit в той же
+    транзакции, поэтому сводка всегда согласована с маршрутом. Пересчитываются
+    только затронутые продукты (INSERT ... SELECT ... ON CONFLICT DO UPDATE и
+    DELETE строк без маршрута на пачку).
+    Сам сервис commit не делает - транзакцией управляет вызывающий код.
+    """
+
+    BATCH_SIZE = 1000  # product_id в одном IN (ограничение числа параметров SQLite)
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def refresh(self, product_ids) -> int:
+        """
+        Пересчитать сводку для продуктов (после изменения их маршрутов)
+
+        Args:
+            product_ids: ID продуктов, маршруты которых изменились
+
+        Returns:
+            int: количество пересчитанных продуктов
+        """
+        ids = sorted({int(product_id) for product_id in product_ids})
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            batch = ids[start:start + self.BATCH_SIZE]
+            self.db.execute(
+                text(_SUMMARY_INSERT + _SUMMARY_SELECT + """
+                    WHERE pw.product_id IN :ids
+                    GROUP BY pw.product_id""" + _SUMMARY_UPSERT).bindparams(bindparam('ids', expanding=True)),
+                {'ids': batch}
+            )
+            self.db.execute(
+                text(_SUMMARY_DELETE_ORPHANS + " AND product_id IN :ids")
+                .bindparams(bindparam('ids', expanding=True)),
+                {'ids': batch}
+            )
+        return len(ids)
+
+    def rebuild(self) -> dict:
+        """
+        Полная пересборка сводки по всем маршрутам (исправление расхождений)
+
+        Returns:
+            dict: products - строк в сводке после пересборки, drifted - строк, которые отличались
+        """
+        before = self._snapshot()
+        # WHERE TRUE - SQLite требует WHERE в INSERT ... SELECT с ON CONFLICT
+        self.db.execute(text(_SUMMARY_INSERT + _SUMMARY_SELECT + " WHERE TRUE GROUP BY pw.product_id"
+                             + _SUMMARY_UPSERT))
+        self.db.execute(text(_SUMMARY_DELETE_ORPHANS))
+        after = self._snapshot()
+        drifted = sum(1 for product_id in before.keys() | after.keys()
+                      if before.get(product_id) != after.get(product_id))
+        return {'products': len(after), 'drifted': drifted}
+
+    def get(self, product_id: int):
+        """Строка сводки продукта (None, если маршрута нет)"""
+        return self.db.execute(
+            text("""SELECT total_hours, workshop_count, bottleneck_workshop_id, bottleneck_hours
+                    FROM product_manufacturing_summary
+                    WHERE product_id = :id"""),
+            {'id': product_id}
+        ).first()
+
+    def _snapshot(self) -> dict:
+        return {
+            row[0]: tuple(row[1:]) for row in self.db.execute(
+                text("""SELECT product_id, total_hours, workshop_count, bottleneck_workshop_id, bottleneck_hours
+                        FROM product_manufacturing_summary""")
+            )
+        }
@@ -3,10 +3,36 @@
 Сервис для расчета количества сырья при производстве продукции
 ГЛАВНОЕ ДЛЯ ЗАДАНИЯ 4
 """
+import math
+
+from sqlalchemy import bindparam, text
+
+
+def raw_material_formula(parameter1, parameter2, coefficient, quantity, loss_percent):
+    """
+    Формула расчета сырья (общая для одиночного и пакетного расчета).
+    Работает и с числами, и с массивами NumPy - порядок операций одинаковый,
+    поэтому результаты совпадают бит в бит.
+
+    raw_material = параметр1 × параметр2 × коэффициент_типа × количество × (1 + процент_потерь/100)
+    """
+    raw_material_base = parameter1 * parameter2 * coefficient
+    raw_material_for_quantity = raw_material_base * quantity
+    loss_factor = 1.0 + (loss_percent / 100.0)
+    return raw_material_for_quantity * loss_factor
 
 
 class MaterialCalculationService:
     """Сервис расчета необходимого сырья для производства"""
+
+    # Коды ошибок строк пакетного расчета
+    ERROR_INVALID_INPUT = 'invalid_input'
+    ERROR_UNKNOWN_PRODUCT_TYPE = 'unknown_product_type'
+    ERROR_UNKNOWN_MATERIAL_TYPE = 'unknown_material_type'
+
+    MAX_BATCH_SIZE = 100000
+    MAX_INT64 = 2 ** 63 - 1  # id и количество - BIGINT; результат тоже должен помещаться в int64
+    PLAN_QUERY_BATCH = 10000  # product_id в одном IN (ограничение числа параметров SQLite)
     
     @staticmethod
     def calculate_raw_material(
@@ -54,24 +80,12 @@ class MaterialCalculationService:
         
         # ===== ВАЛИДАЦИЯ ВХОДНЫХ ДАННЫХ =====
         
-        # Проверка типов целых чисел (должны быть int и > 0)
-        if not isinstance(product_type_id, int) or product_type_id <= 0:
-            return -1
-        if not isinstance(material_type_id, int) or material_type_id <= 0:
-            return -1
-        if not isinstance(quantity, int) or quantity <= 0:
-            return -1
-        
-        # Проверка преобразования параметров в float
-        try:
-            parameter1 = float(parameter1)
-            parameter2 = float(parameter2)
-        except (TypeError, ValueError):
-            return -1
-        
-        # Проверка положительности параметров
-        if parameter1 <= 0 or parameter2 <= 0:
+        validated = MaterialCalculationService._validate_line(
+            product_type_id, material_type_id, quantity, parameter1, parameter2
+        )
+        if validated is None:
             return -1
+        parameter1, parameter2 = validated
         
         # ===== ПОЛУЧЕНИЕ ДАННЫХ ИЗ БД =====
         
@@ -79,49 +93,251 @@ class MaterialCalculationService:
             return -1
         
         try:
-            # Импортируем модели
-            from models.material import ProductType, MaterialType
-            
-            # Получаем тип продукции по ID
-            product_type = db_session.query(ProductType).filter_by(
-                product_type_id=product_type_id
-            ).first()
-            
-            # Если тип продукции не найден - ошибка
-            if not product_type:
-                return -1
-            
-            # Получаем тип материала по ID
-            material_type = db_session.query(MaterialType).filter_by(
-                material_type_id=material_type_id
-            ).first()
-            
-            # Если тип материала не найден - ошибка
-            if not material_type:
-                return -1
-        
+            coefficients, losses = MaterialCalculationService._load_reference_data(db_session)
         except Exception:
             # Любая ошибка при работе с БД - возвращаем -1
             return -1
         
-        # ===== РАСЧЕТ НЕОБХОДИМОГО СЫРЬЯ =====
-        
-        # Шаг 1: Базовый расчет на одну единицу
-        # raw_material_base = параметр1 × параметр2 × коэффициент_типа
-        raw_material_base = parameter1 * parameter2 * product_type.coefficient
-        
-        # Шаг 2: Умножаем на количество единиц
-        # raw_material_for_quantity = raw_material_base × количество
-        raw_material_for_quantity = raw_material_base * quantity
+        # Если тип продукции или материала не найден - ошибка
+        if product_type_id not in coefficients or material_type_id not in losses:
+            return -1
         
-        # Шаг 3: Учитываем потери материала
-        # loss_factor = 1 + (процент_потерь / 100)
-        loss_factor = 1.0 + (material_type.loss_percentage / 100.0)
+        # ===== РАСЧЕТ НЕОБХОДИМОГО СЫРЬЯ =====
         
-        # Шаг 4: Финальный расчет с учетом потерь
-        # raw_material_total = raw_material_for_quantity × loss_factor
-        raw_material_total = raw_material_for_quantity * loss_factor
+        raw_material_total = raw_material_formula(
+            parameter1, parameter2,
+            coefficients[product_type_id], quantity, losses[material_type_id]
+        )
         
+        # Переполнение на огромных, но конечных параметрах - тоже некорректные данные
+        # (та же граница, что и в пакетном расчете)
+        if not math.isfinite(raw_material_total) or abs(raw_material_total) >= 2.0 ** 63:
+            return -1
+
         # ===== ВОЗВРАЩАЕМ ЦЕЛОЕ ЧИСЛО =====
         # Округляем до целого числа
         return int(round(raw_material_total))
+
+    @staticmethod
+    def calculate_raw_material_batch(lines: list, db_session) -> list:
+        """
+        Пакетный расчет сырья для множества строк плана.
+
+        Коэффициенты типов продукции и проценты потерь берутся один раз
+        (из кэша справочников), затем все строки считаются
+        векторно через NumPy по той же формуле, что и одиночный расчет.
+
+        Args:
+            lines: список словарей с ключами product_type_id, material_type_id,
+                   quantity, parameter1, parameter2
+            db_session: SQLAlchemy сессия
+
+        Returns:
+            list: для каждой строки {'index', 'raw_material_quantity'}
+                  и 'error' с кодом ошибки, если raw_material_quantity == -1
+        """
+        # NumPy нужен только пакетному расчету - не замедляем им старт приложения
+        import numpy as np
+
+        count = len(lines)
+        product_type_ids = np.zeros(count, dtype=np.int64)
+        material_type_ids = np.zeros(count, dtype=np.int64)
+        quantities = np.zeros(count, dtype=np.float64)
+        parameters1 = np.zeros(count, dtype=np.float64)
+        parameters2 = np.zeros(count, dtype=np.float64)
+        errors = [None] * count
+
+        # ===== ВАЛИДАЦИЯ СТРОК =====
+        for i, line in enumerate(lines):
+            if not isinstance(line, dict):
+                errors[i] = MaterialCalculationService.ERROR_INVALID_INPUT
+                continue
+            validated = MaterialCalculationService._validate_line(
+                line.get('product_type_id'), line.get('material_type_id'),
+                line.get('quantity'), line.get('parameter1'), line.get('parameter2')
+            )
+            if validated is None:
+                errors[i] = MaterialCalculationService.ERROR_INVALID_INPUT
+                continue
+            product_type_ids[i] = line['product_type_id']
+            material_type_ids[i] = line['material_type_id']
+            quantities[i] = line['quantity']
+            parameters1[i], parameters2[i] = validated
+
+        valid = np.array([e is None for e in errors], dtype=bool)
+
+        # ===== СПРАВОЧНИКИ (один раз на весь пакет) =====
+        coefficients, losses = MaterialCalculationService._load_reference_data(db_session)
+
+        coefficient_values = np.array(
+            [coefficients.get(int(pt_id), np.nan) for pt_id in product_type_ids], dtype=np.float64
+        ) if count else np.zeros(0)
+        loss_values = np.array(
+            [losses.get(int(mt_id), np.nan) for mt_id in material_type_ids], dtype=np.float64
+        ) if count else np.zeros(0)
+
+        for i in np.flatnonzero(valid & np.isnan(coefficient_values)):
+            errors[i] = MaterialCalculationService.ERROR_UNKNOWN_PRODUCT_TYPE
+        for i in np.flatnonzero(valid & ~np.isnan(coefficient_values) & np.isnan(loss_values)):
+            errors[i] = MaterialCalculationService.ERROR_UNKNOWN_MATERIAL_TYPE
+        valid &= ~np.isnan(coefficient_values) & ~np.isnan(loss_values)
+
+        # ===== ВЕКТОРНЫЙ РАСЧЕТ =====
+        with np.errstate(over='ignore', invalid='ignore'):
+            totals = raw_material_formula(
+                parameters1, parameters2, coefficient_values, quantities, loss_values
+            )
+        # Переполнение (inf или больше int64) не должно попасть в astype(int64)
+        representable = np.isfinite(totals) & (np.abs(totals) < 2.0 ** 63)
+        for i in np.flatnonzero(valid & ~representable):
+            errors[i] = MaterialCalculationService.ERROR_INVALID_INPUT
+        valid &= representable
+        # np.rint, как и round(), округляет половины к четному
+        results = np.where(valid, np.rint(np.where(valid, totals, 0.0)), -1).astype(np.int64)
+
+        output = []
+        for i, value in enumerate(results.tolist()):
+            item = {'index': i, 'raw_material_quantity': value}
+            if errors[i] is not None:
+                item['error'] = errors[i]
+            output.append(item)
+        return output
+
+    @staticmethod
+    def calculate_plan_requirements(plan: dict, db_session) -> dict:
+        """
+        Потребность в сырье по всему плану производства (MRP), по типам материалов.
+
+        Размеры берутся из product_parameters, тип продукции и материал - из products,
+        коэффициенты и потери - из кэша справочников. Все строки плана считаются
+        векторно по той же формуле, что и одиночный расчет, и группируются
+        по материалу (bincount) - без циклов по строкам.
+
+        Args:
+            plan: {product_id: количество}
+
+        Returns:
+            dict: materials (по типам материалов: base, loss, raw_material_quantity, lines),
+                  products_not_found, products_without_parameters,
+                  products_unknown_coefficients (нет коэффициента типа продукции или процента потерь)
+
+        Raises:
+            ValueError: некорректный план
+        """
+        import numpy as np
+
+        if not plan:
+            raise ValueError('План производства пуст')
+        if len(plan) > MaterialCalculationService.MAX_BATCH_SIZE:
+            raise ValueError(f"План не больше {MaterialCalculationService.MAX_BATCH_SIZE} строк")
+        for product_id, quantity in plan.items():
+            if isinstance(quantity, bool) or not isinstance(quantity, int) \
+                    or not 1 <= quantity <= MaterialCalculationService.MAX_INT64:
+                raise ValueError(f"Количество для продукта {product_id} должно быть целым > 0")
+
+        # ===== ПРОДУКТЫ И РАЗМЕРЫ (пачками по PLAN_QUERY_BATCH) =====
+        product_ids = sorted(plan)
+        query = text("""SELECT p.product_id, p.product_type_id, p.material_type_id,
+                               pp.parameter1_value, pp.parameter2_value
+                        FROM products p
+                                 LEFT JOIN product_parameters pp ON pp.product_id = p.product_id
+                        WHERE p.product_id IN :ids""").bindparams(bindparam('ids', expanding=True))
+        rows = []
+        for start in range(0, len(product_ids), MaterialCalculationService.PLAN_QUERY_BATCH):
+            batch = product_ids[start:start + MaterialCalculationService.PLAN_QUERY_BATCH]
+            rows.extend(tuple(row) for row in db_session.execute(query, {'ids': batch}))
+
+        data = np.array(
+            [(r[0], r[1], r[2], np.nan if r[3] is None else r[3], np.nan if r[4] is None else r[4]) for r in rows],
+            dtype=np.float64
+        ).reshape(-1, 5)
+        found_ids = data[:, 0].astype(np.int64)
+        product_type_ids = data[:, 1].astype(np.int64)
+        material_type_ids = data[:, 2].astype(np.int64)
+        parameters1, parameters2 = data[:, 3], data[:, 4]
+        quantities = np.array([plan[product_id] for product_id in found_ids.tolist()], dtype=np.float64)
+
+        # ===== СПРАВОЧНИКИ (один раз на весь план) =====
+        coefficients, losses = MaterialCalculationService._load_reference_data(db_session)
+        coefficient_values = np.array([coefficients.get(t, np.nan) for t in product_type_ids.tolist()],
+                                      dtype=np.float64)
+        loss_values = np.array([losses.get(m, np.nan) for m in material_type_ids.tolist()], dtype=np.float64)
+
+        has_parameters = ~np.isnan(parameters1) & ~np.isnan(parameters2)
+        has_coefficients = ~np.isnan(coefficient_values) & ~np.isnan(loss_values)
+        valid = has_parameters & has_coefficients
+
+        # ===== ВЕКТОРНЫЙ РАСЧЕТ И ГРУППИРОВКА ПО МАТЕРИАЛУ =====
+        base = parameters1[valid] * parameters2[valid] * coefficient_values[valid] * quantities[valid]
+        totals = raw_material_formula(parameters1[valid], parameters2[valid], coefficient_values[valid],
+                                      quantities[valid], loss_values[valid])
+        materials, groups = np.unique(material_type_ids[valid], return_inverse=True)
+        base_sums = np.bincount(groups, weights=base, minlength=len(materials))
+        total_sums = np.bincount(groups, weights=totals, minlength=len(materials))
+        line_counts = np.bincount(groups, minlength=len(materials))
+
+        names = dict(db_session.execute(
+            text("SELECT material_type_id, material_type_name FROM material_types WHERE material_type_id IN :ids")
+            .bindparams(bindparam('ids', expanding=True)),
+            {'ids': materials.tolist()}
+        ).fetchall()) if len(materials) else {}
+
+        found = set(found_ids.tolist())
+        return {
+            'materials': [{
+                'material_type_id': material_type_id,
+                'material_type_name': names.get(material_type_id),
+                'loss_percent': losses[material_type_id],
+                'lines': lines,
+                'raw_material_base': round(base_total, 2),
+                'raw_material_loss': round(total - base_total, 2),
+                'raw_material_quantity': round(total, 2),
+            } for material_type_id, lines, base_total, total in zip(
+                materials.tolist(), line_counts.tolist(), base_sums.tolist(), total_sums.tolist())],
+            'lines': len(plan),
+            'lines_calculated': int(valid.sum()),
+            'products_not_found': [product_id for product_id in product_ids if product_id not in found],
+            'products_without_parameters': found_ids[~has_parameters].tolist(),
+            'products_unknown_coefficients': found_ids[has_parameters & ~has_coefficients].tolist(),
+        }
+
+    @staticmethod
+    def _validate_line(product_type_id, material_type_id, quantity, parameter1, parameter2):
+        """
+        Проверка одной строки расчета.
+
+        Returns:
+            (parameter1, parameter2) приведенные к float или None если данные некорректны
+        """
+        # Проверка типов целых чисел (должны быть int от 1 до MAX_INT64 - до NumPy и float)
+        for value in (product_type_id, material_type_id, quantity):
+            if not isinstance(value, int) or not 1 <= value <= MaterialCalculationService.MAX_INT64:
+                return None
+        
+        # Проверка преобразования параметров в float (OverflowError - целое больше float)
+        try:
+            parameter1 = float(parameter1)
+            parameter2 = float(parameter2)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        
+        # Проверка конечности (NaN, ±inf из JSON или строк "nan"/"inf") и положительности параметров
+        if not math.isfinite(parameter1) or not math.isfinite(parameter2):
+            return None
+        if parameter1 <= 0 or parameter2 <= 0:
+            return None
+        
+        return parameter1, parameter2
+
+    @staticmethod
+    def _load_reference_data(db_session):
+        """
+        Коэффициенты типов продукции и проценты потерь материалов.
+        Берутся из кэша справочников - на прогретом кэше без запросов к БД.
+
+        Returns:
+            ({product_type_id: коэффициент}, {material_type_id: процент_потерь})
+        """
+        from services.reference_cache import reference_cache
+
+        return reference_cache.get(db_session)
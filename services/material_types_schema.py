@@ -0,0 +1,105 @@
+"""
+Схема material_types: колонка потерь и готовые SQL-запросы
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+
+def get_loss_column_name(connection):
+    """
+    🔍 Автоматически определяет название колонки потерь
+    (выполняет интроспекцию БД - при старте и при изменении колонок)
+    """
+    inspector = inspect(connection)
+    columns = inspector.get_columns('material_types')
+
+    column_names = [col['name'] for col in columns]
+    logger.debug("Колонки в material_types: %s", column_names)
+
+    # Пробуем разные варианты названий
+    possible_names = [
+        'raw_material_loss_percent',
+        'loss_percentage',
+        'loss_percent',
+        'material_loss_percent',
+        'losses',
+        'raw_material_losses'
+    ]
+
+    for name in possible_names:
+        if name in column_names:
+            return name
+
+    # Если ничего не найдено - ищем любую колонку которая может быть потерями
+    for col in column_names:
+        if 'loss' in col.lower() or 'percent' in col.lower():
+            return col
+
+    raise Exception(f"❌ Не найдена колонка потерь. Доступные: {column_names}")
+
+
+class MaterialTypesSchema:
+    """
+    Колонка потерь material_types и готовые SQL-запросы.
+
+    Определяется один раз при старте приложения (database.init_db; в режиме
+    DB_STARTUP_MODE=skip - при первом обращении), запросы эндпоинтов
+    интроспекцию не выполняют. Заново колонки сверяются только при перезагрузке
+    кэша справочников (refresh: один SELECT без строк, интроспекция - если
+    колонки изменились). После миграции `flask material_types refresh-schema`
+    сдвигает отметку изменений material_types, и каждый процесс перечитывает
+    справочники и колонку при следующей сверке кэша.
+    Набор запросов заменяется целиком (новый dict), читатели не видят его пустым.
+    """
+
+    def __init__(self):
+        self._statements = None
+
+    def get(self, db_session) -> dict:
+        """Запросы: columns, loss_column, select, select_losses, insert, update_loss"""
+        statements = self._statements
+        if statements is None:
+            statements = self._statements = self._build(db_session, self._read_columns(db_session))
+        return statements
+
+    def refresh(self, db_session) -> dict:
+        """Сверить колонки material_types, при изменении определить колонку потерь заново"""
+        columns = self._read_columns(db_session)
+        statements = self._statements
+        if statements is None or statements['columns'] != columns:
+            statements = self._statements = self._build(db_session, columns)
+        return statements
+
+    def invalidate(self):
+        """Определить колонку заново при следующем обращении"""
+        self._statements = None
+
+    @staticmethod
+    def _read_columns(db_session) -> tuple:
+        return tuple(db_session.execute(text("SELECT * FROM material_types WHERE 1 = 0")).keys())
+
+    @staticmethod
+    def _build(db_session, columns) -> dict:
+        loss_col = get_loss_column_name(db_session.connection())
+        logger.info("material_types: колонка потерь %s", loss_col)
+        return {
+            'columns': columns,
+            'loss_column': loss_col,
+            'select': text(f"""
+            SELECT material_type_id, material_type_name, {loss_col} as loss_percentage
+            FROM material_types
+            ORDER BY material_type_id
+            """),
+            'select_losses': text(f"SELECT material_type_id, {loss_col} FROM material_types"),
+            'insert': text(f"""
+            INSERT INTO material_types (material_type_name, {loss_col})
+            VALUES (:name, :loss)
+            """),
+            'update_loss': f"{loss_col} = :loss",
+        }
+
+
+material_types_schema = MaterialTypesSchema()
@@ -0,0 +1,419 @@
+"""
+Поиск продукции по части названия и префиксу артикула (индекс в памяти процесса)
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, text
+
+from config import Config
+from database import get_change_stamp
+
+logger = logging.getLogger(__name__)
+
+# Классы совпадения по убыванию релевантности
+MATCH_KINDS = ('name_exact', 'article_exact', 'name_prefix', 'article_prefix', 'word_prefix', 'substring')
+_RANK = {kind: rank for rank, kind in enumerate(MATCH_KINDS)}
+
+MIN_QUERY_LENGTH = 2
+MAX_QUERY_LENGTH = 100
+
+# Изменений сверх снимка больше этого - снимок перестраивается целиком
+MAX_PENDING_CHANGES = 5000
+# Запас при дочитывании изменений по updated_at: транзакция могла выставить
+# updated_at раньше, чем зафиксировалась. Все записи (ORM, импорт, SQL) берут
+# updated_at из часов БД (func.now() / CURRENT_TIMESTAMP), а не из часов процесса
+SYNC_OVERLAP = timedelta(minutes=1)
+
+_ID_BITS = 40
+
+
+def normalize(value: str) -> str:
+    """Нормализация для поиска без учета регистра: нижний регистр, ё -> е"""
+    return value.lower().replace('ё', 'е')
+
+
+def normalize_name(name: str) -> str:
+    """normalize() с сохранением длины: символы, меняющие длину в нижнем регистре (İ), остаются как есть"""
+    normalized = normalize(name)
+    if len(normalized) == len(name):
+        return normalized
+    return ''.join(normalize(char) if len(normalize(char)) == 1 else char for char in name)
+
+
+def rank_key(rank, length, product_id):
+    """Ключ сортировки по релевантности: класс совпадения, длина названия (короче - выше), product_id"""
+    return (rank << 56) | (min(length, 0xFFFF) << _ID_BITS) | product_id
+
+
+def match_rank(normalized_name: str, article: str, query: str):
+    """Лучший класс совпадения одного продукта с запросом (или None) - для изменений сверх снимка"""
+    best = None
+    position = normalized_name.find(query)
+    while position >= 0:
+        if position == 0:
+            rank = _RANK['name_exact'] if len(normalized_name) == len(query) else _RANK['name_prefix']
+        elif normalized_name[position].isalnum() and not normalized_name[position - 1].isalnum():
+            rank = _RANK['word_prefix']
+        else:
+            rank = _RANK['substring']
+        best = rank if best is None else min(best, rank)
+        position = normalized_name.find(query, position + 1)
+    if query.isascii() and query.isdigit() and article.startswith(query):
+        rank = _RANK['article_exact'] if article == query else _RANK['article_prefix']
+        best = rank if best is None else min(best, rank)
+    return best
+
+
+class SearchIndex:
+    """
+    Снимок каталога для поиска (массивы NumPy, только чтение), строки - по возрастанию product_id:
+        - названия одной строкой через '\\n', смещения и длины названий;
+        - позиционный индекс триграмм нормализованной строки: для каждой триграммы -
+          отсортированные смещения ее вхождений. Вхождения подстроки = пересечение
+          списков ее триграмм (со сдвигом), без просмотра текста;
+        - артикулы строками, отсортированные, - префикс ищется бинарным поиском.
+    """
+
+    def __init__(self, rows):
+        import numpy as np
+
+        ids, names, articles = [], [], []
+        for product_id, name, article in rows:
+            ids.append(product_id)
+            names.append(name.replace('\n', ' '))
+            articles.append(str(article))
+
+        self.size = len(ids)
+        self.product_ids = np.array(ids, dtype=np.int64)
+        self.articles = articles
+        self.lengths = np.fromiter((len(name) for name in names), dtype=np.int64, count=self.size)
+        self.starts = np.concatenate(([0], np.cumsum(self.lengths + 1)[:-1])).astype(np.int64)
+        # Ключ сортировки без класса совпадения - один на продукт
+        self.base_keys = (np.minimum(self.lengths, 0xFFFF) << _ID_BITS) | self.product_ids
+        # Завершающий '\n' - чтобы у последних двух символов тоже была триграмма
+        self.names = '\n'.join(names) + '\n'
+
+        # Символы -> номера 1..N по алфавиту каталога (0 - символа нет в каталоге)
+        chars = np.frombuffer(normalize_name(self.names).encode('utf-32-le'), dtype=np.uint32)
+        present = np.flatnonzero(np.bincount(chars))
+        lookup = np.zeros(int(present[-1]) + 1, dtype=np.int64)
+        lookup[present] = np.arange(1, len(present) + 1)
+        self.symbols = {chr(code): number for number, code in enumerate(present.tolist(), start=1)}
+        self.base = len(present) + 1
+        symbols = lookup[chars].astype(np.int32 if self.base ** 3 < 2 ** 31 else np.int64)
+
+        # Начала слов: буква/цифра после не буквы - для ранга word_prefix
+        is_word = np.array([False] + [chr(code).isalnum() for code in present.tolist()])
+        word = is_word[symbols]
+        self.word_start = word & np.concatenate(([True], ~word[:-1]))
+
+        codes = (symbols[:-2] * self.base + symbols[1:-1]) * self.base + symbols[2:]
+        del symbols, chars
+        sort_keys = codes
+        if self.base ** 3 <= 1 << 24:
+            # Различных триграмм обычно немного: перенумерованные в uint16, они сортируются
+            # устойчивой поразрядной сортировкой NumPy в несколько раз быстрее
+            seen = np.zeros(self.base ** 3, dtype=bool)
+            seen[codes] = True
+            distinct = np.flatnonzero(seen)
+            if len(distinct) <= 1 << 16:
+                dense = np.zeros(self.base ** 3, dtype=np.uint16)
+                dense[distinct] = np.arange(len(distinct))
+                sort_keys = dense[codes]
+        order = np.argsort(sort_keys, kind='stable')
+        del sort_keys
+        self.postings = order.astype(np.int32) if len(self.names) < 2 ** 31 else order
+        codes = codes[order]
+        del order
+        boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+        self.trigrams = codes[np.concatenate(([0], boundaries))] if len(codes) else codes
+        self.bounds = np.concatenate(([0], boundaries, [len(codes)]))
+
+        article_array = np.array(articles, dtype=str) if articles else np.array([], dtype='<U1')
+        self.article_order = np.argsort(article_array, kind='stable')
+        self.articles_sorted = article_array[self.article_order]
+
+    def name(self, position: int) -> str:
+        start = int(self.starts[position])
+        return self.names[start:start + int(self.lengths[position])]
+
+    def position(self, product_id: int) -> int:
+        return int(self.product_ids.searchsorted(product_id))
+
+    def _code(self, numbers) -> int:
+        return (numbers[0] * self.base + numbers[1]) * self.base + numbers[2]
+
+    def occurrences(self, query: str):
+        """Отсортированные смещения вхождений query (от 2 символов) в нормализованной строке названий"""
+        import numpy as np
+
+        numbers = [self.symbols.get(char) for char in query]
+        if None in numbers or not len(self.trigrams):
+            return np.array([], dtype=np.int64)
+
+        if len(numbers) == 2:
+            # Все триграммы с этим началом лежат в индексе подряд
+            low = np.searchsorted(self.trigrams, self._code(numbers + [0]), side='left')
+            high = np.searchsorted(self.trigrams, self._code(numbers + [self.base - 1]), side='right')
+            return np.sort(self.postings[self.bounds[low]:self.bounds[high]])
+
+        # Триграммы, покрывающие запрос: сдвиги 0, 3, 6, ... и последний
+        lists = []
+        for shift in sorted(set(range(0, len(numbers) - 2, 3)) | {len(numbers) - 3}):
+            code = self._code(numbers[shift:shift + 3])
+            key = np.searchsorted(self.trigrams, code)
+            if key == len(self.trigrams) or self.trigrams[key] != code:
+                return np.array([], dtype=np.int64)
+            lists.append((shift, self.postings[self.bounds[key]:self.bounds[key + 1]]))
+
+        # От самой редкой триграммы: оставляем кандидатов, у которых есть остальные триграммы
+        lists.sort(key=lambda item: len(item[1]))
+        shift, postings = lists[0]
+        candidates = postings.astype(np.int64) - shift
+        for shift, postings in lists[1:]:
+            wanted = candidates + shift
+            found = np.minimum(np.searchsorted(postings, wanted), len(postings) - 1)
+            candidates = candidates[postings[found] == wanted]
+            if not len(candidates):
+                break
+        return candidates
+
+    def match_keys(self, query: str, removed=None):
+        """
+        Ключи релевантности (rank_key) найденных продуктов снимка, по одному на продукт
+
+        Args:
+            removed: маска позиций, исключаемых из результата (удалены или изменены после снимка)
+        """
+        import numpy as np
+
+        found, ranks = [], []
+
+        # Подстрока названия: совпадение всего названия, начала названия, начала слова или внутри слова
+        offsets = self.occurrences(query)
+        if len(offsets):
+            positions = np.searchsorted(self.starts, offsets, side='right') - 1
+            at_start = offsets == self.starts[positions]
+            rank = np.full(len(offsets), _RANK['substring'], dtype=np.int64)
+            rank[self.word_start[offsets]] = _RANK['word_prefix']
+            rank[at_start] = _RANK['name_prefix']
+            rank[at_start & (self.lengths[positions] == len(query))] = _RANK['name_exact']
+            # Смещения отсортированы - вхождения одного продукта идут подряд, берем лучшее
+            groups = np.flatnonzero(np.concatenate(([True], positions[1:] != positions[:-1])))
+            found.append(positions[groups])
+            ranks.append(np.minimum.reduceat(rank, groups))
+
+        # Префикс артикула
+        if query.isascii() and query.isdigit():
+            low = np.searchsorted(self.articles_sorted, query, side='left')
+            high = np.searchsorted(self.articles_sorted, query[:-1] + chr(ord(query[-1]) + 1), side='left')
+            if high > low:
+                rank = np.full(high - low, _RANK['article_prefix'], dtype=np.int64)
+                rank[self.articles_sorted[low:high] == query] = _RANK['article_exact']
+                found.append(self.article_order[low:high])
+                ranks.append(rank)
+
+        if not found:
+            return np.array([], dtype=np.int64)
+        found, rank = np.concatenate(found), np.concatenate(ranks)
+        if len(ranks) > 1:
+            # Продукт найден и по названию, и по артикулу - оставляем лучший ранг
+            order = np.lexsort((rank, found))
+            found, rank = found[order], rank[order]
+            first = np.concatenate(([True], found[1:] != found[:-1]))
+            found, rank = found[first], rank[first]
+        if removed is not None:
+            keep = ~removed[found]
+            found, rank = found[keep], rank[keep]
+        return (rank << 56) | self.base_keys[found]
+
+
+class ProductSearchIndex:
+    """
+    Индекс поиска продукции в памяти процесса.
+
+    Актуальность - как у кэша справочников: отметка изменений products
+    (COUNT(*), MAX(updated_at)) сверяется не чаще раза в check_interval секунд,
+    запись продуктов через API помечает индекс устаревшим (mark_stale) - сверка
+    на следующем поиске. Изменения дочитываются по updated_at поверх снимка
+    (удаления - по расхождению числа строк); полная перестройка - при первом
+    обращении и когда изменений сверх снимка больше MAX_PENDING_CHANGES.
+    Между проверками поиск не обращается к БД; на время перестройки поиск
+    продолжает работать по прежнему состоянию.
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()           # короткий: чтение и подмена состояния
+        self._refresh_lock = threading.Lock()   # сверка и построение - одним запросом за раз
+        self._state = None      # (снимок, маска исключенных позиций, {product_id: (название, артикул, нормализованное)})
+        self._stamp = None
+        self._synced_until = None
+        self._checked_at = 0.0
+        self._generation = 0    # увеличивается в invalidate
+        self._stale_marks = 0   # увеличивается в mark_stale
+
+    def get(self, db_session):
+        """
+        Актуальное состояние индекса: (снимок, маска исключенных позиций, изменения сверх снимка).
+
+        Сверка и перестройка (секунды на большом каталоге) идут вне _lock: пока один запрос
+        строит новое состояние, остальные ищут по прежнему, новое подменяется целиком.
+        Ждать приходится только первого построения.
+        """
+        with self._lock:
+            state = self._state
+            if state is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return state
+
+        if not self._refresh_lock.acquire(blocking=state is None):
+            return state
+        try:
+            with self._lock:
+                if self._state is not None and time.monotonic() - self._checked_at < self.check_interval:
+                    return self._state
+                state, stamp, synced_until = self._state, self._stamp, self._synced_until
+                generation, stale_marks = self._generation, self._stale_marks
+            started = time.monotonic()
+
+            new_stamp = get_change_stamp(db_session, ('products',))
+            if state is None:
+                state, synced_until = self._build(db_session)
+            elif new_stamp != stamp:
+                applied = self._apply_changes(db_session, state, synced_until, new_stamp[0])
+                state, synced_until = applied or self._build(db_session)
+
+            with self._lock:
+                if self._generation != generation:
+                    # invalidate во время построения - результат не используется
+                    return self._state or state
+                self._state, self._stamp, self._synced_until = state, new_stamp, synced_until
+                # mark_stale во время построения - изменения могли не попасть в него, сверить еще раз
+                self._checked_at = started if self._stale_marks == stale_marks else float('-inf')
+                return state
+        finally:
+            self._refresh_lock.release()
+
+    def mark_stale(self):
+        """Продукты изменены: сверить отметку изменений при следующем поиске"""
+        with self._lock:
+            self._checked_at = float('-inf')
+            self._stale_marks += 1
+
+    def invalidate(self):
+        """Сбросить индекс (следующий поиск строит его заново)"""
+        with self._lock:
+            self._state = None
+            self._stamp = None
+            self._synced_until = None
+            self._generation += 1
+
+    def _build(self, db_session):
+        """Полное построение: (состояние, отметка updated_at, до которой прочитаны изменения)"""
+        import numpy as np
+
+        started = time.perf_counter()
+        synced_until = self._max_updated_at(db_session)
+        rows = db_session.execute(text(
+            "SELECT product_id, product_name, article_number FROM products ORDER BY product_id"
+        )).fetchall()
+        index = SearchIndex(rows)
+        logger.info("Индекс поиска продукции построен: %d продуктов за %.2f с",
+                    index.size, time.perf_counter() - started)
+        return (index, np.zeros(index.size, dtype=bool), {}), synced_until
+
+    def _apply_changes(self, db_session, state, synced_until, count):
+        """
+        Дочитать изменения после снимка: (новое состояние, отметка updated_at)
+        или None - изменений слишком много, нужна перестройка
+        """
+        import numpy as np
+        from models.product import Product
+
+        index, removed, changed = state
+        removed, changed = removed.copy(), dict(changed)
+        new_synced_until = self._max_updated_at(db_session)
+        if synced_until is not None:
+            rows = db_session.query(
+                Product.product_id, Product.product_name, Product.article_number
+            ).filter(Product.updated_at >= synced_until - SYNC_OVERLAP).limit(MAX_PENDING_CHANGES + 1).all()
+            if len(rows) > MAX_PENDING_CHANGES:
+                return None
+            for product_id, name, article in rows:
+                name = name.replace('\n', ' ')
+                changed[product_id] = (name, str(article), normalize_name(name))
+                position = index.position(product_id)
+                if position < index.size and index.product_ids[position] == product_id:
+                    removed[position] = True
+
+        if int((~removed).sum()) + len(changed) != count:
+            # Строки удалены (или вставлены без updated_at) - сверяем список product_id
+            ids = np.array([row[0] for row in db_session.execute(text("SELECT product_id FROM products"))],
+                           dtype=np.int64)
+            removed |= ~np.isin(index.product_ids, ids)
+            existing = set(ids.tolist())
+            changed = {product_id: row for product_id, row in changed.items() if product_id in existing}
+            if int((~removed).sum()) + len(changed) != len(ids):
+                return None
+
+        if len(changed) + int(removed.sum()) > MAX_PENDING_CHANGES:
+            return None
+        return (index, removed, changed), new_synced_until or synced_until
+
+    @staticmethod
+    def _max_updated_at(db_session):
+        from models.product import Product
+        return db_session.query(func.max(Product.updated_at)).scalar()
+
+    def search(self, db_session, query: str, limit: int, offset: int) -> dict:
+        """
+        Поиск продукции: подстрока названия (без учета регистра, ё = е) и префикс артикула
+
+        Returns:
+            dict: items (product_id, product_name, article_number, match), total, limit, offset
+
+        Raises:
+            ValueError: слишком короткий или длинный запрос
+        """
+        import numpy as np
+
+        query = normalize(' '.join((query or '').split()))
+        if len(query) < MIN_QUERY_LENGTH:
+            raise ValueError(f'Запрос должен содержать не меньше {MIN_QUERY_LENGTH} символов')
+        if len(query) > MAX_QUERY_LENGTH:
+            raise ValueError(f'Запрос длиннее {MAX_QUERY_LENGTH} символов')
+
+        index, removed, changed = self.get(db_session)
+        keys = index.match_keys(query, removed if changed or removed.any() else None)
+        extra = []
+        for product_id, (name, article, normalized) in changed.items():
+            rank = match_rank(normalized, article, query)
+            if rank is not None:
+                extra.append(rank_key(rank, len(name), product_id))
+        if extra:
+            keys = np.concatenate((keys, np.array(extra, dtype=np.int64)))
+
+        # Страница: частичная сортировка - упорядочиваются только offset + limit лучших ключей
+        end = offset + limit
+        top = keys[np.argpartition(keys, end - 1)[:end]] if end < len(keys) else keys
+        items = []
+        for key in np.sort(top)[offset:end].tolist():
+            product_id = key & ((1 << _ID_BITS) - 1)
+            if product_id in changed:
+                name, article, _ = changed[product_id]
+            else:
+                position = index.position(product_id)
+                name, article = index.name(position), index.articles[position]
+            items.append({
+                'product_id': product_id,
+                'product_name': name,
+                'article_number': int(article),
+                'match': MATCH_KINDS[key >> 56],
+            })
+        return {'items': items, 'total': int(len(keys)), 'limit': limit, 'offset': offset}
+
+
+product_search_index = ProductSearchIndex(Config.PRODUCT_SEARCH_CHECK_INTERVAL)
@@ -1,8 +1,13 @@
 """
 Бизнес-логика для работы с продукцией
 """
-from datetime import datetime
-from models import Product, ProductType, MaterialType
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import and_, func, or_, tuple_
+from models import Product, ProductType, MaterialType, ProductWorkshop
+from services.manufacturing import ManufacturingService
+from services.manufacturing_summary import ManufacturingSummaryService
 
 class ProductService:
     """Сервис для работы с продукцией"""
@@ -23,26 +28,333 @@ class ProductService:
             'minimum_partner_price': float(p.minimum_partner_price)
         } for p in products]
 
-    def get_product_by_id(self, product_id: int):
-        """Получить продукт по ID"""
-        product = self.db.query(Product).filter(
-            Product.product_id == product_id
-        ).first()
+    def products_listing_query(self, time_subq=None):
+        """
+        Запрос списка продукции с названиями типов и временем производства.
+        Типы подтягиваются JOIN-ами, время - из сводки маршрутов,
+        поэтому весь список строится одним запросом к БД.
+        """
+        if time_subq is None:
+            time_subq = ManufacturingService.manufacturing_time_table()
+        return (
+            self.db.query(
+                Product.product_id,
+                Product.article_number,
+                Product.product_name,
+                Product.product_type_id,
+                ProductType.product_type_name,
+                Product.material_type_id,
+                MaterialType.material_type_name,
+                Product.minimum_partner_price,
+                time_subq.c.total_hours
+            )
+            .join(ProductType, ProductType.product_type_id == Product.product_type_id)
+            .join(MaterialType, MaterialType.material_type_id == Product.material_type_id)
+            .outerjoin(time_subq, time_subq.c.product_id == Product.product_id)
+        )
+
+    @staticmethod
+    def listing_row_to_dict(row):
+        """Строка из products_listing_query -> словарь для API"""
+        return {
+            'product_id': row.product_id,
+            'article_number': int(row.article_number),
+            'product_name': row.product_name,
+            'product_type_id': row.product_type_id,
+            'product_type': row.product_type_name,
+            'material_type_id': row.material_type_id,
+            'material_type': row.material_type_name,
+            'minimum_partner_price': float(row.minimum_partner_price),
+            'manufacturing_time_hours': ManufacturingService.round_manufacturing_time(row.total_hours)
+        }
+
+    def get_all_products_with_time(self):
+        """Получить все продукты вместе со временем производства (один запрос)"""
+        products, _ = self.get_products_page({})
+        return products
+
+    # Допустимые поля сортировки списка (значение параметра sort -> колонка)
+    SORT_FIELDS = ('name', 'article', 'price', 'time')
+    MAX_PAGE_SIZE = 500
+
+    def get_products_page(self, filters: dict, sort: str = None, order: str = 'asc',
+                          limit: int = None, after: str = None):
+        """
+        Список продукции с серверной фильтрацией, сортировкой и keyset-пагинацией.
+
+        Страница выбирается условием (sort_col, product_id) > (значение, id) из курсора,
+        а не OFFSET, поэтому страница N стоит столько же, сколько первая.
+
+        Args:
+            filters: product_type_id, material_type_id, min_price, max_price, min_time, max_time
+            sort: name | article | price | time (по умолчанию - product_id)
+            order: asc | desc
+            limit: размер страницы (None - весь список)
+            after: курсор из next_cursor предыдущей страницы
+
+        Returns:
+            (список словарей, next_cursor или None)
+
+        Raises:
+            ValueError: некорректные параметры или курсор
+        """
+        if sort is not None and sort not in self.SORT_FIELDS:
+            raise ValueError(f"Недопустимое поле сортировки: {sort}")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f"Недопустимое направление сортировки: {order}")
+        if limit is not None and not 0 < limit <= self.MAX_PAGE_SIZE:
+            raise ValueError(f"limit должен быть от 1 до {self.MAX_PAGE_SIZE}")
+
+        time_subq = ManufacturingService.manufacturing_time_table()
+        query = self.products_listing_query(time_subq)
+        total_hours = time_subq.c.total_hours
+
+        # ===== ФИЛЬТРЫ =====
+        if filters.get('product_type_id') is not None:
+            query = query.filter(Product.product_type_id == filters['product_type_id'])
+        if filters.get('material_type_id') is not None:
+            query = query.filter(Product.material_type_id == filters['material_type_id'])
+        if filters.get('min_price') is not None:
+            query = query.filter(Product.minimum_partner_price >= filters['min_price'])
+        if filters.get('max_price') is not None:
+            query = query.filter(Product.minimum_partner_price <= filters['max_price'])
+        if filters.get('min_time') is not None:
+            query = query.filter(total_hours >= filters['min_time'])
+        if filters.get('max_time') is not None:
+            query = query.filter(total_hours <= filters['max_time'])
+
+        # ===== СОРТИРОВКА =====
+        sort_column = {
+            'name': Product.product_name,
+            'article': Product.article_number,
+            'price': Product.minimum_partner_price,
+            'time': total_hours,
+            None: None,
+        }[sort]
+        key_columns = [Product.product_id] if sort_column is None else [sort_column, Product.product_id]
+        descending = order == 'desc'
+
+        # ===== КУРСОР =====
+        if after:
+            cursor_values = self._decode_cursor(after, sort)
+            if len(cursor_values) != len(key_columns):
+                raise ValueError("Курсор не соответствует сортировке")
+            if sort == 'time':
+                query = query.filter(self._time_cursor_condition(total_hours, *cursor_values, descending))
+            else:
+                key = tuple_(*key_columns)
+                values = tuple_(*cursor_values)
+                query = query.filter(key < values if descending else key > values)
+
+        if sort == 'time':
+            # Продукты без маршрута (NULL) - первыми по возрастанию и последними по убыванию;
+            # порядок задан явно, чтобы использовался индекс (total_hours, product_id) сводки
+            query = query.order_by(
+                total_hours.desc().nulls_last() if descending else total_hours.asc().nulls_first(),
+                Product.product_id.desc() if descending else Product.product_id.asc()
+            )
+        else:
+            query = query.order_by(*[c.desc() if descending else c.asc() for c in key_columns])
+
+        if limit is None:
+            return [self.listing_row_to_dict(row) for row in query.all()], None
+
+        # Берем на одну строку больше, чтобы понять, есть ли следующая страница
+        rows = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = self._encode_cursor(rows[-1], sort)
+
+        return [self.listing_row_to_dict(row) for row in rows], next_cursor
+
+    @staticmethod
+    def _time_cursor_condition(total_hours, hours, product_id, descending):
+        """
+        Условие keyset-пагинации по времени производства с NULL (нет маршрута):
+        NULL идут первыми по возрастанию и последними по убыванию
+        """
+        if hours is None:
+            if descending:
+                return and_(total_hours.is_(None), Product.product_id < product_id)
+            return or_(total_hours.isnot(None), and_(total_hours.is_(None), Product.product_id > product_id))
+        if descending:
+            return or_(total_hours < hours, and_(total_hours == hours, Product.product_id < product_id),
+                       total_hours.is_(None))
+        return or_(total_hours > hours, and_(total_hours == hours, Product.product_id > product_id))
+
+    @staticmethod
+    def _encode_cursor(row, sort):
+        """Курсор = base64(JSON [значение сортировки, product_id])"""
+        sort_value = {
+            'name': lambda r: r.product_name,
+            'article': lambda r: int(r.article_number),
+            'price': lambda r: str(r.minimum_partner_price),
+            'time': lambda r: str(r.total_hours) if r.total_hours is not None else None,
+        }.get(sort)
+        values = [row.product_id] if sort_value is None else [sort_value(row), row.product_id]
+        raw = json.dumps(values, ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor, sort):
+        """Разбор курсора в значения ключа сортировки"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            if not isinstance(values, list) or not values:
+                raise ValueError
+            values[-1] = int(values[-1])
+            if sort == 'article':
+                values[0] = int(values[0])
+            elif sort == 'time':
+                # null (и -1 в курсорах прежних версий) - продукт без маршрута
+                values[0] = None if values[0] is None or Decimal(values[0]) < 0 else Decimal(values[0])
+            elif sort == 'price':
+                values[0] = Decimal(values[0])
+            elif sort == 'name' and not isinstance(values[0], str):
+                raise ValueError
+        except (ValueError, TypeError, InvalidOperation, UnicodeError):
+            raise ValueError("Некорректный курсор")
+        return values
+
+    @staticmethod
+    def listing_params(args) -> dict:
+        """
+        Query-параметры списка продукции -> аргументы get_products_page
+
+        Args:
+            args: словарь query-параметров (request.args и т.п.)
+
+        Raises:
+            ValueError: некорректное значение параметра
+        """
+        def arg(name, convert):
+            value = args.get(name)
+            if value is None or value == '':
+                return None
+            try:
+                return convert(value)
+            except (ValueError, InvalidOperation):
+                raise ValueError(f"Некорректное значение параметра {name}: {value}")
+
+        return {
+            'filters': {
+                'product_type_id': arg('product_type_id', int),
+                'material_type_id': arg('material_type_id', int),
+                'min_price': arg('min_price', Decimal),
+                'max_price': arg('max_price', Decimal),
+                'min_time': arg('min_time', Decimal),
+                'max_time': arg('max_time', Decimal),
+            },
+            'limit': arg('limit', int),
+            'sort': args.get('sort') or None,
+            'order': args.get('order', 'asc'),
+            'after': args.get('after') or None,
+        }
+
+    # Наибольшее число ключей в одном пакетном запросе (ids / article_numbers)
+    MAX_LOOKUP_SIZE = 5000
+    MAX_LOOKUP_KEY = 2 ** 63 - 1    # BIGINT
+
+    @classmethod
+    def lookup_keys(cls, values, name: str) -> list:
+        """
+        Ключи пакетного поиска -> список целых без повторов (порядок сохраняется)
+
+        Args:
+            values: список чисел или строк из цифр
+            name: имя параметра для сообщения об ошибке
+
+        Raises:
+            ValueError: не список, пустой список, слишком много ключей, нечисловой ключ,
+                ключ вне диапазона 1..MAX_LOOKUP_KEY
+        """
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"{name}: ожидается непустой список")
+        if len(values) > cls.MAX_LOOKUP_SIZE:
+            raise ValueError(f"{name}: не больше {cls.MAX_LOOKUP_SIZE} значений за запрос")
+        keys = []
+        for value in values:
+            if isinstance(value, bool) or not isinstance(value, (int, str)):
+                raise ValueError(f"{name}: некорректное значение {value!r}")
+            try:
+                key = int(value)
+            except ValueError:
+                raise ValueError(f"{name}: некорректное значение {value!r}")
+            if not 1 <= key <= cls.MAX_LOOKUP_KEY:
+                raise ValueError(f"{name}: значение {value!r} вне диапазона 1..{cls.MAX_LOOKUP_KEY}")
+            keys.append(key)
+        return list(dict.fromkeys(keys))
+
+    def get_products_by_ids(self, product_ids: list) -> dict:
+        """
+        Продукты по списку product_id - одним запросом (IN по первичному ключу)
 
+        Returns:
+            dict: items (в порядке запроса, формат списка продукции), missing (не найденные id)
+        """
+        return self._lookup(Product.product_id, 'product_id', product_ids)
+
+    def get_products_by_article_numbers(self, article_numbers: list) -> dict:
+        """
+        Продукты по списку артикулов - одним запросом (IN по idx_products_article_number)
+
+        Returns:
+            dict: items (в порядке запроса, формат списка продукции), missing (не найденные артикулы)
+        """
+        return self._lookup(Product.article_number, 'article_number', article_numbers)
+
+    def _lookup(self, column, field: str, keys: list) -> dict:
+        # Типы и время производства приходят JOIN-ами того же запроса, что и у списка
+        rows = self.products_listing_query().filter(column.in_(keys)).all()
+        found = {int(getattr(row, field)): row for row in rows}
+        return {
+            'items': [self.listing_row_to_dict(found[key]) for key in keys if key in found],
+            'missing': [key for key in keys if key not in found],
+        }
+
+    def get_product_route(self, product_id: int):
+        """
+        Маршрут производства продукта: цеха с временем и итоги из сводки маршрутов
+
+        Returns:
+            dict или None, если продукт не найден
+        """
+        product = self.db.query(Product).filter(Product.product_id == product_id).first()
         if not product:
             return None
 
+        workshops = self.db.query(ProductWorkshop).filter(
+            ProductWorkshop.product_id == product_id
+        ).all()
+
+        result = [{
+            'product_workshop_id': pw.product_workshop_id,
+            'workshop_id': pw.workshop_id,
+            'workshop_name': pw.workshop.workshop_name,
+            'staff_count': pw.workshop.staff_count,
+            'manufacturing_time_hours': float(pw.manufacturing_time_hours)
+        } for pw in workshops]
+
+        # Итоги маршрута - из сводки (поддерживается при записи маршрутов)
+        summary = ManufacturingSummaryService(self.db).get(product_id)
+
         return {
-            'product_id': product.product_id,
-            'article_number': int(product.article_number),
+            'product_id': product_id,
             'product_name': product.product_name,
-            'product_type_id': product.product_type_id,
-            'product_type': product.product_type.product_type_name,
-            'material_type_id': product.material_type_id,
-            'material_type': product.material_type.material_type_name,
-            'minimum_partner_price': float(product.minimum_partner_price)
+            'workshops': result,
+            'total_manufacturing_time_hours': int(round(float(summary.total_hours))) if summary else 0,
+            'bottleneck_workshop_id': summary.bottleneck_workshop_id if summary else None
         }
 
+    def get_product_by_id(self, product_id: int):
+        """
+        Получить продукт по ID вместе с названиями типов и временем производства
+        (один запрос, как и строка списка)
+        """
+        row = self.products_listing_query().filter(Product.product_id == product_id).first()
+        return self.listing_row_to_dict(row) if row else None
+
     def create_product(self, data: dict):
         """Создать новый продукт"""
         try:
@@ -74,7 +386,7 @@ class ProductService:
                 if hasattr(product, key):
                     setattr(product, key, value)
 
-            product.updated_at = datetime.utcnow()
+            product.updated_at = func.now()
             self.db.commit()
             return self.get_product_by_id(product_id)
         except Exception as e:
@@ -0,0 +1,35 @@
+"""
+Разбор производственного плана (product_id -> количество) из запроса
+"""
+
+# product_id и количества - BIGINT / int64 (дальше план идет в массивы NumPy)
+MAX_INT64 = 2 ** 63 - 1
+
+
+def parse_plan(data):
+    """
+    План производства -> {product_id: количество}
+    Строка "1:10,2:5", объект {"1": 10, "2": 5} или [{"product_id": 1, "quantity": 10}, ...]
+    """
+    if data is None:
+        return None
+    plan = {}
+    try:
+        if isinstance(data, str):
+            items = [part.split(':') for part in data.split(',') if part.strip()]
+            pairs = [(int(product_id), int(quantity)) for product_id, quantity in items]
+        elif isinstance(data, dict):
+            pairs = [(int(product_id), quantity) for product_id, quantity in data.items()]
+        elif isinstance(data, list):
+            pairs = [(item['product_id'], item['quantity']) for item in data]
+        else:
+            raise ValueError
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Некорректный план производства')
+    for product_id, quantity in pairs:
+        if isinstance(product_id, bool) or not isinstance(product_id, int) or not 1 <= product_id <= MAX_INT64:
+            raise ValueError(f"Некорректный product_id в плане: {product_id}")
+        if product_id in plan:
+            raise ValueError(f"Продукт {product_id} повторяется в плане")
+        plan[product_id] = quantity
+    return plan
@@ -0,0 +1,140 @@
+"""
+Кэш справочных данных для расчетов:
+коэффициенты типов продукции и проценты потерь материалов
+"""
+import threading
+import time
+
+from config import Config
+from database import get_change_stamp
+
+
+class ReferenceDataCache:
+    """
+    Кэш справочников product_types / material_types в памяти процесса.
+
+    Актуальность проверяется по отметке изменений в БД (количество строк и
+    MAX(updated_at) обеих таблиц) не чаще чем раз в check_interval секунд,
+    поэтому изменения, сделанные другими процессами, подхватываются с задержкой
+    не больше интервала. Запись через API сбрасывает кэш сразу (invalidate).
+    Между проверками расчет не обращается к БД.
+
+    Сверка и загрузка идут вне _lock: пока один поток обращается к БД, остальные
+    получают прежний снимок, новый подменяется целиком. Ждать приходится только
+    первой загрузки (и загрузки после invalidate).
+    """
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()           # короткий: чтение и подмена снимка, счетчики
+        self._refresh_lock = threading.Lock()   # сверка и загрузка - одним потоком за раз
+        self._data = None       # (коэффициенты, проценты потерь)
+        self._stamp = None
+        self._checked_at = 0.0
+        self._generation = 0    # увеличивается в invalidate
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.stamp_checks = 0
+
+    def get_product_type_coefficients(self, db_session) -> dict:
+        """{product_type_id: коэффициент типа продукции}"""
+        return self._fresh(db_session)[0]
+
+    def get_material_loss_percents(self, db_session) -> dict:
+        """{material_type_id: процент потерь сырья}"""
+        return self._fresh(db_session)[1]
+
+    def get(self, db_session):
+        """Оба справочника одним вызовом: (коэффициенты, проценты потерь)"""
+        return self._fresh(db_session)
+
+    def invalidate(self):
+        """Сбросить кэш (вызывается после записи в справочники)"""
+        with self._lock:
+            self._data = None
+            self._stamp = None
+            self._generation += 1
+            self.version += 1
+
+    def stats(self) -> dict:
+        """Счетчики попаданий/промахов и состояние кэша"""
+        with self._lock:
+            coefficients, losses = self._data or ({}, {})
+            return {
+                'version': self.version,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stamp_checks': self.stamp_checks,
+                'loaded': self._data is not None,
+                'product_types': len(coefficients),
+                'material_types': len(losses),
+                'check_interval': self.check_interval,
+            }
+
+    def _fresh(self, db_session):
+        with self._lock:
+            data = self._data
+            if data is not None and time.monotonic() - self._checked_at < self.check_interval:
+                self.hits += 1
+                return data
+
+        # Сверку уже выполняет другой поток - отдаем прежний снимок
+        if not self._refresh_lock.acquire(blocking=data is None):
+            with self._lock:
+                self.hits += 1
+            return data
+        try:
+            with self._lock:
+                data, stamp, generation = self._data, self._stamp, self._generation
+                if data is not None and time.monotonic() - self._checked_at < self.check_interval:
+                    self.hits += 1
+                    return data
+            started = time.monotonic()
+
+            # Интервал истек - сверяем отметку изменений с БД
+            new_stamp = self._read_stamp(db_session)
+            reloaded = data is None or new_stamp != stamp
+            if reloaded:
+                data = self._load(db_session)
+
+            with self._lock:
+                if stamp is not None:
+                    self.stamp_checks += 1
+                if reloaded:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                if self._generation == generation:
+                    if reloaded and stamp is not None:
+                        self.version += 1
+                    self._data, self._stamp, self._checked_at = data, new_stamp, started
+                # invalidate во время загрузки - снимок мог не застать запись, не сохраняем
+                return data
+        finally:
+            self._refresh_lock.release()
+
+    def _load(self, db_session):
+        """(коэффициенты, проценты потерь) из БД; колонка потерь - как у эндпоинтов material_types"""
+        from models.product import ProductType
+        from services.material_types_schema import material_types_schema
+
+        # Справочники изменились (или refresh-schema после миграции) - сверить и колонки material_types
+        statements = material_types_schema.refresh(db_session)
+        coefficients = {
+            row.product_type_id: float(row.product_type_coefficient)
+            for row in db_session.query(
+                ProductType.product_type_id, ProductType.product_type_coefficient
+            )
+        }
+        losses = {
+            material_type_id: float(loss_percent)
+            for material_type_id, loss_percent in db_session.execute(statements['select_losses'])
+        }
+        return coefficients, losses
+
+    def _read_stamp(self, db_session):
+        return get_change_stamp(db_session, ('product_types', 'material_types'))
+
+
+reference_cache = ReferenceDataCache(Config.REFERENCE_CACHE_CHECK_INTERVAL)
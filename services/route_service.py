@@ -0,0 +1,206 @@
+"""
+Бизнес-логика для замены маршрутов производства (product_workshops)
+"""
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import bindparam, text
+from services.manufacturing_summary import ManufacturingSummaryService
+
+
+class RouteService:
+    """
+    Сервис замены маршрутов производства целиком.
+
+    Новый маршрут сравнивается с текущими строками product_workshops,
+    и применяется только разница (удаление, обновление, вставка) пачечными
+    запросами в одной транзакции - маршрут не бывает в промежуточном состоянии.
+    Строки продуктов блокируются (SELECT ... FOR UPDATE) до чтения текущего маршрута,
+    так что параллельные замены маршрута одного продукта выполняются по очереди.
+    В той же транзакции пересчитывается сводка маршрутов (product_manufacturing_summary).
+    """
+
+    HOURS_PRECISION = Decimal('0.01')  # manufacturing_time_hours DECIMAL(8, 2)
+    MAX_HOURS = Decimal('999999.99')
+    BATCH_SIZE = ManufacturingSummaryService.BATCH_SIZE  # ID в одном IN
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def replace_route(self, product_id: int, steps: list) -> dict:
+        """
+        Заменить маршрут одного продукта
+
+        Args:
+            product_id: ID продукта
+            steps: [{"workshop_id": 1, "manufacturing_time_hours": 1.5}, ...]
+
+        Returns:
+            dict: счетчики inserted / updated / deleted / unchanged
+
+        Raises:
+            ValueError: некорректные данные
+            LookupError: продукт или цех не найден
+            IntegrityError: конфликт с параллельным изменением (например, цех удален)
+        """
+        return self.replace_routes({product_id: steps})
+
+    def replace_routes(self, routes: dict) -> dict:
+        """
+        Заменить маршруты нескольких продуктов в одной транзакции
+        (например, перенос работ при закрытии цеха)
+
+        Args:
+            routes: {product_id: [{"workshop_id": ..., "manufacturing_time_hours": ...}, ...]}
+        """
+        desired = {product_id: self._parse_steps(product_id, steps) for product_id, steps in routes.items()}
+        if not desired:
+            raise ValueError('Нет маршрутов для замены')
+
+        # Сортировка - одинаковый порядок блокировок во всех транзакциях (без взаимоблокировок)
+        product_ids = sorted(desired)
+        workshop_ids = sorted({w for steps in desired.values() for w in steps})
+        try:
+            self._check_exist('products', 'product_id', product_ids, 'Продукт', lock=True)
+            self._check_exist('workshops', 'workshop_id', workshop_ids, 'Цех')
+
+            existing = [
+                row for batch in self._batches(product_ids)
+                for row in self.db.execute(
+                    text("""SELECT product_workshop_id, product_id, workshop_id, manufacturing_time_hours
+                            FROM product_workshops
+                            WHERE product_id IN :product_ids""")
+                    .bindparams(bindparam('product_ids', expanding=True)),
+                    {'product_ids': batch}
+                )
+            ]
+        except Exception:
+            self.db.rollback()
+            raise
+
+        to_delete, to_update = [], []
+        current = set()
+        for row_id, product_id, workshop_id, hours in existing:
+            current.add((product_id, workshop_id))
+            new_hours = desired[product_id].get(workshop_id)
+            if new_hours is None:
+                to_delete.append(row_id)
+            elif self._hours(hours) != new_hours:
+                to_update.append({'id': row_id, 'time': float(new_hours)})
+
+        to_insert = [
+            {'p_id': product_id, 'w_id': workshop_id, 'time': float(hours)}
+            for product_id, steps in desired.items()
+            for workshop_id, hours in steps.items()
+            if (product_id, workshop_id) not in current
+        ]
+
+        try:
+            for batch in self._batches(to_delete):
+                self.db.execute(
+                    text("DELETE FROM product_workshops WHERE product_workshop_id IN :ids")
+                    .bindparams(bindparam('ids', expanding=True)),
+                    {'ids': batch}
+                )
+            if to_update:
+                self.db.execute(
+                    text("""UPDATE product_workshops
+                            SET manufacturing_time_hours = :time,
+                                updated_at               = CURRENT_TIMESTAMP
+                            WHERE product_workshop_id = :id"""),
+                    to_update
+                )
+            if to_insert:
+                self.db.execute(
+                    text("""INSERT INTO product_workshops (product_id, workshop_id, manufacturing_time_hours)
+                            VALUES (:p_id, :w_id, :time)"""),
+                    to_insert
+                )
+            if to_delete or to_update or to_insert:
+                ManufacturingSummaryService(self.db).refresh(product_ids)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            'products': len(product_ids),
+            'inserted': len(to_insert),
+            'updated': len(to_update),
+            'deleted': len(to_delete),
+            'unchanged': len(existing) - len(to_delete) - len(to_update),
+        }
+
+    def _parse_steps(self, product_id, steps) -> dict:
+        """Шаги маршрута -> {workshop_id: часы}"""
+        if not isinstance(product_id, int) or isinstance(product_id, bool) or product_id <= 0:
+            raise ValueError(f'Некорректный product_id: {product_id}')
+        if not isinstance(steps, list):
+            raise ValueError(f'Маршрут продукта {product_id} должен быть списком')
+
+        parsed = {}
+        for step in steps:
+            if not isinstance(step, dict):
+                raise ValueError(f'Некорректный шаг маршрута продукта {product_id}: {step}')
+            workshop_id = step.get('workshop_id')
+            if not isinstance(workshop_id, int) or workshop_id <= 0:
+                raise ValueError(f'Некорректный workshop_id в маршруте продукта {product_id}: {workshop_id}')
+            if workshop_id in parsed:
+                raise ValueError(f'Цех {workshop_id} повторяется в маршруте продукта {product_id}')
+            hours = self._hours(step.get('manufacturing_time_hours'))
+            if hours is None or hours <= 0:
+                raise ValueError(f'Время в цехе {workshop_id} для продукта {product_id} должно быть > 0')
+            if hours > self.MAX_HOURS:
+                raise ValueError(
+                    f'Время в цехе {workshop_id} для продукта {product_id} должно быть не больше {self.MAX_HOURS}'
+                )
+            parsed[workshop_id] = hours
+        return parsed
+
+    def _hours(self, value):
+        """Часы -> Decimal с точностью колонки (None если не число)"""
+        if isinstance(value, bool) or value is None:
+            return None
+        try:
+            hours = Decimal(str(value))
+            # quantize больших значений (1e30) выходит за точность контекста - InvalidOperation
+            return hours.quantize(self.HOURS_PRECISION) if hours.is_finite() else None
+        except (InvalidOperation, ValueError):
+            return None
+
+    def _batches(self, ids):
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            yield ids[start:start + self.BATCH_SIZE]
+
+    def lock_products(self, product_ids):
+        """
+        Заблокировать строки продуктов до конца транзакции (в порядке product_id, как replace_routes).
+        Для изменений маршрута по одной строке: пересчет сводки продукта после блокировки
+        видит все параллельные изменения его маршрута.
+
+        Raises:
+            LookupError: продукт не найден
+        """
+        self._check_exist('products', 'product_id', sorted(set(product_ids)), 'Продукт', lock=True)
+
+    def _check_exist(self, table, column, ids, label, lock=False):
+        """
+        Проверка существования всех ID (по запросу на BATCH_SIZE ID).
+        lock=True - найденные строки блокируются до конца транзакции
+        (FOR UPDATE; SQLite блокирует БД целиком при записи и его не поддерживает)
+        """
+        if not ids:
+            return
+        locking = lock and self.db.get_bind().dialect.name == 'postgresql'
+        for_update = f" ORDER BY {column} FOR UPDATE" if locking else ''
+        found = {
+            row[0]
+            for batch in self._batches(ids)
+            for row in self.db.execute(
+                text(f"SELECT {column} FROM {table} WHERE {column} IN :ids{for_update}")
+                .bindparams(bindparam('ids', expanding=True)),
+                {'ids': batch}
+            )
+        }
+        missing = [i for i in ids if i not in found]
+        if missing:
+            raise LookupError(f"{label} не найден: {', '.join(map(str, missing))}")
@@ -0,0 +1,189 @@
+"""
+Подготовка данных и результат планирования производства
+"""
+import math
+from datetime import date, timedelta
+
+from models import Workshop
+from services.production_plan import MAX_INT64
+from services.scheduler import FlowShopScheduler, Job
+from services.workshop_load import route_matrix_cache
+
+
+class SchedulePlan:
+    """
+    Входные данные планировщика, собранные из БД в потоке запроса:
+    заказы (Job), этапы (workshop_id по порядку) и число сотрудников.
+    Дальше расчет идет без обращений к БД (в фоновом потоке).
+    """
+
+    def __init__(self, jobs, stage_workshops, stage_capacities, orders, start_date, hours_per_day,
+                 products_without_route):
+        self.jobs = jobs
+        self.stage_workshops = stage_workshops
+        self.stage_capacities = stage_capacities
+        self.orders = orders
+        self.start_date = start_date
+        self.hours_per_day = hours_per_day
+        self.products_without_route = products_without_route
+
+
+class ScheduleService:
+    """
+    Сервис планирования: книга заказов -> расписание по цехам.
+
+    Порядок прохождения цехов - по workshop_id (цеха заведены в порядке
+    технологического процесса). Время планирования - рабочие часы от начала
+    периода; в сутках shifts_per_day * shift_hours рабочих часов,
+    срок заказа - конец рабочего дня due_date.
+    """
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def prepare(self, orders, start_date: date, hours_per_day: float, max_orders: int) -> SchedulePlan:
+        """
+        Проверить книгу заказов и собрать маршруты заказанных продуктов
+
+        Args:
+            orders: [{"product_id": 1, "quantity": 10, "due_date": "2025-06-30"}, ...]
+
+        Raises:
+            ValueError: некорректная книга заказов
+        """
+        import numpy as np
+
+        if not isinstance(orders, list) or not orders:
+            raise ValueError('Книга заказов должна быть непустым списком')
+        if len(orders) > max_orders:
+            raise ValueError(f"Не больше {max_orders} заказов за один расчет")
+
+        parsed = [self._parse_order(position, order) for position, order in enumerate(orders)]
+
+        matrix = route_matrix_cache.get(self.db)
+        product_ids = np.array(sorted({order['product_id'] for order in parsed}), dtype=np.int64)
+        mask = np.isin(matrix.product_ids, product_ids)
+        routes = {}
+        for product_id, workshop_position, hours in zip(
+                matrix.product_ids[mask].tolist(), matrix.workshop_index[mask].tolist(), matrix.hours[mask].tolist()):
+            routes.setdefault(product_id, []).append((workshop_position, hours))
+
+        # Этапы - цеха, встречающиеся в маршрутах заказанных продуктов, по workshop_id
+        used = sorted({matrix.workshop_ids[position] for steps in routes.values() for position, _ in steps})
+        stage_of = {int(workshop_id): stage for stage, workshop_id in enumerate(used)}
+        staff = dict(self.db.query(Workshop.workshop_id, Workshop.staff_count).filter(
+            Workshop.workshop_id.in_(list(stage_of))
+        ).all()) if stage_of else {}
+
+        jobs, without_route = [], set()
+        for index, order in enumerate(parsed):
+            steps = routes.get(order['product_id'])
+            if not steps:
+                without_route.add(order['product_id'])
+                continue
+            operations = sorted(
+                (stage_of[int(matrix.workshop_ids[position])], hours * order['quantity'])
+                for position, hours in steps
+            )
+            due_days = (order['due_date'] - start_date).days + 1
+            jobs.append(Job(index, order['product_id'], order['quantity'], due_days * hours_per_day, operations))
+
+        idle = [int(workshop_id) for workshop_id in used if not staff.get(int(workshop_id))]
+        if idle:
+            raise ValueError(f"В цехах маршрута нет сотрудников: {', '.join(map(str, idle))}")
+
+        return SchedulePlan(
+            jobs=jobs,
+            stage_workshops=[int(workshop_id) for workshop_id in used],
+            stage_capacities=[staff.get(int(workshop_id), 0) for workshop_id in used],
+            orders=parsed,
+            start_date=start_date,
+            hours_per_day=hours_per_day,
+            products_without_route=sorted(without_route),
+        )
+
+    @staticmethod
+    def run(plan: SchedulePlan, time_budget: float, rules=None, objective='makespan',
+            include_operations=False) -> dict:
+        """Построить расписание по подготовленному плану (без обращений к БД)"""
+        if not plan.jobs:
+            raise ValueError('Ни у одного заказанного продукта нет маршрута производства')
+
+        scheduler = FlowShopScheduler(plan.stage_capacities, time_budget)
+        result = scheduler.schedule(plan.jobs, rules, objective, include_operations)
+        return ScheduleService.format_result(plan, result)
+
+    @staticmethod
+    def format_result(plan: SchedulePlan, result: dict) -> dict:
+        """Результат планировщика -> ответ API (часы и календарные даты)"""
+        makespan = result['makespan']
+        completion = result['completion']
+
+        def to_date(hours):
+            # Последний рабочий день, в котором заканчивается работа
+            return (plan.start_date + timedelta(days=max(math.ceil(hours / plan.hours_per_day) - 1, 0))).isoformat()
+
+        orders = []
+        late = 0
+        for job in plan.jobs:
+            finished = completion[job.index]
+            tardiness = max(0.0, finished - job.due_hours)
+            late += tardiness > 0
+            order = plan.orders[job.index]
+            orders.append({
+                'order_index': job.index,
+                'product_id': job.product_id,
+                'quantity': job.quantity,
+                'due_date': order['due_date'].isoformat(),
+                'completion_hours': round(finished, 2),
+                'completion_date': to_date(finished),
+                'tardiness_hours': round(tardiness, 2),
+            })
+
+        workshops = [{
+            'workshop_id': workshop_id,
+            'staff_count': capacity,
+            'busy_hours': round(busy, 2),
+            'utilization': round(busy / (capacity * makespan), 4) if makespan else None,
+        } for workshop_id, capacity, busy in zip(plan.stage_workshops, plan.stage_capacities, result['stage_busy'])]
+
+        response = {
+            'rule': result['rule'],
+            'objective': result['objective'],
+            'rules_tried': result['rules_tried'],
+            'timed_out': result['timed_out'],
+            'start_date': plan.start_date.isoformat(),
+            'hours_per_day': plan.hours_per_day,
+            'makespan_hours': round(makespan, 2),
+            'makespan_date': to_date(makespan),
+            'total_tardiness_hours': round(result['total_tardiness'], 2),
+            'late_orders': late,
+            'products_without_route': plan.products_without_route,
+            'workshops': workshops,
+            'orders': orders,
+        }
+        if result['operations'] is not None:
+            response['operations'] = [{
+                'order_index': job_index,
+                'workshop_id': plan.stage_workshops[stage],
+                'worker': worker,
+                'start_hours': round(start, 2),
+                'end_hours': round(end, 2),
+            } for job_index, stage, worker, start, end in result['operations']]
+        return response
+
+    @staticmethod
+    def _parse_order(position, order):
+        if not isinstance(order, dict):
+            raise ValueError(f"Заказ {position}: ожидается объект")
+        product_id = order.get('product_id')
+        quantity = order.get('quantity')
+        if isinstance(product_id, bool) or not isinstance(product_id, int) or not 1 <= product_id <= MAX_INT64:
+            raise ValueError(f"Заказ {position}: некорректный product_id")
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or not 1 <= quantity <= MAX_INT64:
+            raise ValueError(f"Заказ {position}: количество должно быть целым от 1 до {MAX_INT64}")
+        try:
+            due_date = date.fromisoformat(str(order.get('due_date')))
+        except ValueError:
+            raise ValueError(f"Заказ {position}: due_date должна быть датой YYYY-MM-DD")
+        return {'product_id': product_id, 'quantity': quantity, 'due_date': due_date}
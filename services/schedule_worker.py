@@ -0,0 +1,178 @@
+"""
+Фоновое выполнение расчетов расписания
+"""
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sqlalchemy import create_engine, delete, select, update
+
+from config import Config
+from models import ScheduleTask
+from serialization import dumps_bytes
+
+logger = logging.getLogger(__name__)
+
+_tasks = ScheduleTask.__table__
+_unfinished = _tasks.c.status.in_(('queued', 'running'))
+
+# Engine-ы процесса расчета (по URL БД): создаются при первой задаче и живут вместе с процессом
+_engines = {}
+
+
+class ScheduleWorker:
+    """
+    Очередь расчетов расписания.
+
+    Задачи и результаты хранятся в таблице schedule_tasks, поэтому опрос
+    GET /api/schedule/<task_id> работает при любом числе процессов-воркеров
+    веб-сервера. Сам расчет (CPU-bound, чистый Python) идет в пуле отдельных
+    процессов, а не в потоках веб-процесса, и не конкурирует с запросами за GIL.
+    Процесс расчета сам отмечает задачу running / done / failed через
+    свое подключение к БД.
+
+    Пул создается при первой задаче методом spawn: дочерние процессы не
+    наследуют подключения и потоки веб-процесса.
+
+    Задача не остается в queued / running навсегда: если расчет не записал
+    результат (процесс пула упал, пул сломан, очередь отменена при остановке),
+    веб-процесс отмечает ее failed сам; задачи убитого процесса веб-сервера
+    отмечаются failed по возрасту (task_timeout).
+    """
+
+    def __init__(self, max_workers: int, max_results: int, task_timeout: float):
+        self.max_workers = max_workers
+        self.max_results = max_results
+        self.task_timeout = task_timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, db_session, fn, *args, **kwargs) -> str:
+        """
+        Записать задачу в schedule_tasks и поставить расчет в очередь пула процессов.
+        fn и аргументы передаются в другой процесс (pickle): fn - функция уровня модуля
+        или статический метод.
+
+        Returns:
+            str: id задачи
+        """
+        task_id = uuid.uuid4().hex
+        db_session.execute(_tasks.insert().values(task_id=task_id, status='queued', submitted_at=time.time()))
+        self._expire(db_session)
+        self._trim(db_session)
+        db_session.commit()
+
+        engine = db_session.get_bind()
+        url = engine.url.render_as_string(hide_password=False)
+        try:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+                executor = self._executor
+                future = executor.submit(_run, url, task_id, fn, args, kwargs)
+            future.add_done_callback(lambda done: self._on_done(engine, executor, task_id, done))
+        except Exception as e:
+            # Пул сломан (процесс расчета упал) - следующая задача создаст новый
+            logger.exception("Не удалось поставить расчет расписания %s в очередь", task_id)
+            self.shutdown(wait=False)
+            db_session.execute(_update_statement(task_id, status='failed', error=str(e), finished_at=time.time()))
+            db_session.commit()
+        return task_id
+
+    def get(self, db_session, task_id: str):
+        """Состояние задачи (None, если не найдена)"""
+        row = db_session.execute(select(_tasks).where(_tasks.c.task_id == task_id)).mappings().first()
+        if row is None:
+            return None
+        task = {key: value for key, value in row.items() if value is not None}
+        if task['status'] in ('queued', 'running') and task['submitted_at'] < time.time() - self.task_timeout:
+            self._expire(db_session)
+            db_session.commit()
+            return self.get(db_session, task_id)
+        if 'result' in task:
+            task['result'] = json.loads(task['result'])
+        return task
+
+    def shutdown(self, wait: bool = True):
+        """Остановить пул: задачи из очереди отменяются, текущие расчеты дожидаются (wait=True)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _on_done(self, engine, executor, task_id, future):
+        """
+        Расчет завершился, не записав результат (процесс пула упал, пул сломан,
+        задача отменена при остановке) - отметить задачу failed из веб-процесса
+        """
+        if future.cancelled():
+            error = 'Расчет отменен: процесс веб-сервера остановлен'
+        else:
+            exception = future.exception()
+            if exception is None:
+                return
+            error = f'Расчет прерван: {exception}'
+            if isinstance(exception, BrokenProcessPool):
+                # Следующая задача создаст новый пул
+                with self._lock:
+                    if self._executor is executor:
+                        self._executor = None
+        try:
+            with engine.begin() as connection:
+                connection.execute(_update_statement(task_id, status='failed', error=error,
+                                                     finished_at=time.time()).where(_unfinished))
+        except Exception:
+            logger.exception("Не удалось отметить задачу расписания %s как failed", task_id)
+
+    def _expire(self, db_session):
+        """Задачи в queued / running дольше task_timeout (процесс, который их вел, убит) - failed"""
+        now = time.time()
+        db_session.execute(
+            _update_statement(None, status='failed', error='Расчет потерян: превышено время ожидания',
+                              finished_at=now)
+            .where(_unfinished, _tasks.c.submitted_at < now - self.task_timeout)
+        )
+
+    def _trim(self, db_session):
+        """Удалить самые старые завершенные задачи сверх max_results"""
+        finished = _tasks.c.status.in_(('done', 'failed'))
+        keep = select(_tasks.c.task_id).where(finished) \
+            .order_by(_tasks.c.finished_at.desc()).limit(self.max_results)
+        db_session.execute(delete(_tasks).where(finished, _tasks.c.task_id.not_in(keep)))
+
+
+def _update_statement(task_id, **fields):
+    """UPDATE задачи task_id (None - без условия по task_id)"""
+    statement = update(_tasks).values(**fields)
+    return statement if task_id is None else statement.where(_tasks.c.task_id == task_id)
+
+
+def _run(url, task_id, fn, args, kwargs):
+    """Расчет в процессе пула: статус и результат пишутся в schedule_tasks"""
+    engine = _engines.get(url)
+    if engine is None:
+        engine = _engines[url] = create_engine(url, pool_pre_ping=True)
+
+    with engine.begin() as connection:
+        connection.execute(_update_statement(task_id, status='running', started_at=time.time()))
+    try:
+        result = fn(*args, **kwargs)
+    except ValueError as e:
+        fields = {'status': 'failed', 'error': str(e)}
+    except Exception as e:
+        logger.exception("Ошибка расчета расписания %s", task_id)
+        fields = {'status': 'failed', 'error': str(e)}
+    else:
+        fields = {'status': 'done', 'result': dumps_bytes(result).decode('utf-8')}
+    with engine.begin() as connection:
+        connection.execute(_update_statement(task_id, finished_at=time.time(), **fields))
+
+
+schedule_worker = ScheduleWorker(Config.SCHEDULER_WORKERS, Config.SCHEDULER_MAX_RESULTS, Config.SCHEDULER_TASK_TIMEOUT)
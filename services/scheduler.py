@@ -0,0 +1,172 @@
+"""
+Планирование производства по цехам (эвристики flow-shop / list scheduling)
+"""
+import heapq
+import time
+
+
+class Job:
+    """
+    Заказ для планирования: продукт, количество, срок и операции по цехам.
+
+    operations - [(индекс этапа, часы)] в порядке прохождения цехов;
+    часы операции = количество * время на единицу в цехе.
+    """
+
+    __slots__ = ('index', 'product_id', 'quantity', 'due_hours', 'operations', 'total_hours')
+
+    def __init__(self, index, product_id, quantity, due_hours, operations):
+        self.index = index
+        self.product_id = product_id
+        self.quantity = quantity
+        self.due_hours = due_hours
+        self.operations = operations
+        self.total_hours = sum(hours for _, hours in operations)
+
+
+class FlowShopScheduler:
+    """
+    Эвристический планировщик «гибридного flow-shop»:
+    цеха проходятся в фиксированном порядке (этапы), в цехе работают
+    staff_count сотрудников параллельно, операция заказа занимает одного сотрудника.
+
+    Для каждого правила приоритета заказов (EDD, SPT, LPT, Johnson/CDS) строится
+    расписание list scheduling: на каждом этапе заказы берутся по времени готовности
+    (окончанию предыдущей операции), при равенстве - по приоритету, и отдаются
+    сотруднику, который освободится раньше всех. Правила перебираются, пока
+    не исчерпан бюджет времени; первое правило выполняется всегда.
+    Выбирается расписание с лучшей целевой функцией.
+    """
+
+    RULES = ('edd', 'spt', 'lpt', 'johnson')
+    OBJECTIVES = ('makespan', 'tardiness')
+
+    def __init__(self, stage_capacities, time_budget: float):
+        """
+        Args:
+            stage_capacities: число сотрудников на каждом этапе (в порядке этапов)
+            time_budget: бюджет времени на перебор правил, сек.
+        """
+        if any(capacity <= 0 for capacity in stage_capacities):
+            raise ValueError('В цехе маршрута нет сотрудников (staff_count = 0)')
+        self.stage_capacities = list(stage_capacities)
+        self.time_budget = time_budget
+
+    def schedule(self, jobs, rules=None, objective='makespan', include_operations=False) -> dict:
+        """
+        Построить расписание
+
+        Returns:
+            dict: rule, makespan, total_tardiness, completion (по индексу заказа),
+                  stage_busy (часы работы по этапам), rules_tried, timed_out, operations
+        """
+        rules = self.check_options(rules, objective)
+
+        started = time.perf_counter()
+        best, tried, timed_out = None, [], False
+        for rule in rules:
+            elapsed = time.perf_counter() - started
+            # Следующее правило займет примерно столько же, сколько предыдущее
+            if tried and elapsed + tried[-1]['seconds'] > self.time_budget:
+                timed_out = True
+                break
+            rule_started = time.perf_counter()
+            result = self._simulate(jobs, self._sequence(jobs, rule), include_operations)
+            result['rule'] = rule
+            tried.append({
+                'rule': rule,
+                'makespan': result['makespan'],
+                'total_tardiness': result['total_tardiness'],
+                'seconds': time.perf_counter() - rule_started,
+            })
+            if best is None or self._score(result, objective) < self._score(best, objective):
+                best = result
+
+        best['rules_tried'] = [
+            {'rule': t['rule'], 'makespan': round(t['makespan'], 2),
+             'total_tardiness': round(t['total_tardiness'], 2), 'ms': round(t['seconds'] * 1000, 1)}
+            for t in tried
+        ]
+        best['timed_out'] = timed_out
+        best['objective'] = objective
+        return best
+
+    @classmethod
+    def check_options(cls, rules, objective) -> list:
+        """
+        Проверить правила и цель (до постановки расчета в очередь)
+
+        Raises:
+            ValueError: неизвестное правило или цель
+        """
+        if rules is not None and (not isinstance(rules, list) or not rules):
+            raise ValueError('rules должен быть непустым списком')
+        rules = list(rules or cls.RULES)
+        unknown = [str(rule) for rule in rules if rule not in cls.RULES]
+        if unknown:
+            raise ValueError(f"Неизвестное правило: {', '.join(unknown)}. Допустимо: {', '.join(cls.RULES)}")
+        if objective not in cls.OBJECTIVES:
+            raise ValueError(f"Неизвестная цель: {objective}. Допустимо: {', '.join(cls.OBJECTIVES)}")
+        return rules
+
+    @staticmethod
+    def _score(result, objective):
+        if objective == 'tardiness':
+            return result['total_tardiness'], result['makespan']
+        return result['makespan'], result['total_tardiness']
+
+    def _sequence(self, jobs, rule):
+        """Порядок приоритета заказов по правилу"""
+        if rule == 'edd':
+            return sorted(jobs, key=lambda job: (job.due_hours, job.total_hours, job.index))
+        if rule == 'spt':
+            return sorted(jobs, key=lambda job: (job.total_hours, job.index))
+        if rule == 'lpt':
+            return sorted(jobs, key=lambda job: (-job.total_hours, job.index))
+
+        # Johnson для m этапов (эвристика CDS): первая половина этапов против второй
+        middle = len(self.stage_capacities) / 2
+        first, second = [], []
+        for job in jobs:
+            head = sum(hours for stage, hours in job.operations if stage < middle)
+            tail = job.total_hours - head
+            (first if head < tail else second).append((head, tail, job))
+        first.sort(key=lambda item: (item[0], item[2].index))
+        second.sort(key=lambda item: (-item[1], item[2].index))
+        return [item[2] for item in first + second]
+
+    def _simulate(self, jobs, sequence, include_operations):
+        """List scheduling по этапам для заданного приоритета"""
+        rank = {job.index: position for position, job in enumerate(sequence)}
+        ready = {job.index: 0.0 for job in jobs}
+
+        stage_jobs = [[] for _ in self.stage_capacities]
+        for job in sequence:
+            for stage, hours in job.operations:
+                stage_jobs[stage].append((job.index, hours))
+
+        stage_busy = [0.0] * len(self.stage_capacities)
+        operations = [] if include_operations else None
+        for stage, queue in enumerate(stage_jobs):
+            if not queue:
+                continue
+            queue.sort(key=lambda item: (ready[item[0]], rank[item[0]]))
+            workers = [(0.0, worker) for worker in range(self.stage_capacities[stage])]
+            for job_index, hours in queue:
+                free_at, worker = heapq.heappop(workers)
+                start = max(ready[job_index], free_at)
+                end = start + hours
+                heapq.heappush(workers, (end, worker))
+                ready[job_index] = end
+                stage_busy[stage] += hours
+                if include_operations:
+                    operations.append((job_index, stage, worker, start, end))
+
+        total_tardiness = sum(max(0.0, ready[job.index] - job.due_hours) for job in jobs)
+        return {
+            'makespan': max(ready.values(), default=0.0),
+            'total_tardiness': total_tardiness,
+            'completion': ready,
+            'stage_busy': stage_busy,
+            'operations': operations,
+        }
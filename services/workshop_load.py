@@ -0,0 +1,161 @@
+"""
+Загрузка цехов по производственному плану (векторный расчет на NumPy)
+"""
+import math
+import threading
+
+from sqlalchemy import text
+
+from models import Workshop
+from services.production_plan import MAX_INT64
+
+
+class RouteMatrix:
+    """
+    Матрица маршрутов product_workshops в виде массивов NumPy
+    (product_id, индекс цеха, часы на единицу), отсортированных по product_id.
+    """
+
+    def __init__(self, rows):
+        import numpy as np
+
+        data = np.array([tuple(row) for row in rows], dtype=np.float64).reshape(-1, 3)
+        order = np.argsort(data[:, 0], kind='stable')
+        data = data[order]
+        self.product_ids = data[:, 0].astype(np.int64)
+        self.workshop_ids, self.workshop_index = np.unique(data[:, 1].astype(np.int64), return_inverse=True)
+        self.hours = data[:, 2]
+
+
+class RouteMatrixCache:
+    """
+    Матрица маршрутов в памяти процесса.
+
+    Перечитывается целиком, только если изменилась отметка сводки маршрутов
+    (product_manufacturing_summary обновляется при каждой записи маршрута):
+    COUNT(*), MAX(updated_at) и SUM(total_hours) - один запрос по небольшой таблице.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._stamp = None
+        self.loads = 0
+
+    def get(self, db_session) -> RouteMatrix:
+        stamp = tuple(db_session.execute(text(
+            "SELECT COUNT(*), MAX(updated_at), SUM(total_hours) FROM product_manufacturing_summary"
+        )).first())
+        with self._lock:
+            if self._matrix is None or stamp != self._stamp:
+                rows = db_session.execute(text(
+                    "SELECT product_id, workshop_id, CAST(manufacturing_time_hours AS FLOAT) FROM product_workshops"
+                )).fetchall()
+                self._matrix = RouteMatrix(rows)
+                self._stamp = stamp
+                self.loads += 1
+            return self._matrix
+
+    def invalidate(self):
+        with self._lock:
+            self._matrix = None
+            self._stamp = None
+
+
+route_matrix_cache = RouteMatrixCache()
+
+
+class WorkshopLoadService:
+    """
+    Расчет загрузки цехов: часы по плану, часы на сотрудника и
+    загрузка относительно фонда времени по календарю смен.
+
+    План умножается на матрицу маршрутов целиком (searchsorted + bincount),
+    без циклов по строкам product_workshops.
+    """
+
+    MAX_PLAN_SIZE = 100000
+
+    def __init__(self, db_session):
+        self.db = db_session
+
+    def calculate(self, plan, days: int, shifts_per_day: int, shift_hours: float) -> dict:
+        """
+        Загрузка цехов по плану
+
+        Args:
+            plan: {product_id: количество}; None - по одной единице каждого продукта с маршрутом
+            days, shifts_per_day, shift_hours: календарь смен на период
+
+        Returns:
+            dict: calendar, total_hours, products_without_route, workshops
+                  (total_hours, hours_per_staff, capacity_hours, utilization по каждому цеху)
+
+        Raises:
+            ValueError: некорректный план или календарь
+        """
+        import numpy as np
+
+        if days <= 0 or shifts_per_day <= 0 or not math.isfinite(shift_hours) or shift_hours <= 0:
+            raise ValueError('Параметры календаря (days, shifts_per_day, shift_hours) должны быть > 0')
+        if plan is not None:
+            if len(plan) > self.MAX_PLAN_SIZE:
+                raise ValueError(f"План не больше {self.MAX_PLAN_SIZE} продуктов")
+            for product_id, quantity in plan.items():
+                if not isinstance(product_id, int) or not 1 <= product_id <= MAX_INT64:
+                    raise ValueError(f"Некорректный product_id в плане: {product_id}")
+                if isinstance(quantity, bool) or not isinstance(quantity, int) or not 0 <= quantity <= MAX_INT64:
+                    raise ValueError(f"Количество для продукта {product_id} должно быть целым от 0 до {MAX_INT64}")
+
+        matrix = route_matrix_cache.get(self.db)
+
+        products_without_route = []
+        if plan is None:
+            weights = matrix.hours
+        elif not plan:
+            weights = np.zeros_like(matrix.hours)
+        else:
+            plan_ids = np.fromiter(plan.keys(), dtype=np.int64, count=len(plan))
+            quantities = np.fromiter(plan.values(), dtype=np.float64, count=len(plan))
+            order = np.argsort(plan_ids)
+            plan_ids, quantities = plan_ids[order], quantities[order]
+
+            # Количество по плану для каждой строки маршрута (0 - продукта нет в плане)
+            position = np.minimum(np.searchsorted(plan_ids, matrix.product_ids), len(plan_ids) - 1)
+            matched = plan_ids[position] == matrix.product_ids
+            weights = np.where(matched, quantities[position], 0.0) * matrix.hours
+
+            products_without_route = plan_ids[~np.isin(plan_ids, matrix.product_ids)].tolist()
+
+        totals = np.bincount(matrix.workshop_index, weights=weights, minlength=len(matrix.workshop_ids))
+        hours_by_workshop = dict(zip(matrix.workshop_ids.tolist(), totals.tolist()))
+
+        hours_per_staff_capacity = days * shifts_per_day * shift_hours
+        workshops = []
+        for workshop in self.db.query(
+                Workshop.workshop_id, Workshop.workshop_name, Workshop.workshop_type, Workshop.staff_count
+        ).order_by(Workshop.workshop_id):
+            total = hours_by_workshop.get(workshop.workshop_id, 0.0)
+            capacity = workshop.staff_count * hours_per_staff_capacity
+            workshops.append({
+                'workshop_id': workshop.workshop_id,
+                'workshop_name': workshop.workshop_name,
+                'workshop_type': workshop.workshop_type,
+                'staff_count': workshop.staff_count,
+                'total_hours': round(total, 2),
+                'hours_per_staff': round(total / workshop.staff_count, 2) if workshop.staff_count else None,
+                'capacity_hours': round(capacity, 2),
+                'utilization': round(total / capacity, 4) if capacity else None,
+            })
+
+        return {
+            'calendar': {
+                'days': days,
+                'shifts_per_day': shifts_per_day,
+                'shift_hours': shift_hours,
+                'hours_per_staff': hours_per_staff_capacity,
+            },
+            'total_hours': round(float(totals.sum()), 2),
+            'products_without_route': products_without_route,
+            'workshops': workshops,
+        }
@@ -0,0 +1,95 @@
+"""
+Общие настройки тестов: корень проекта и scripts/ в sys.path
+(тесты запускаются из корня: python -m pytest)
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'scripts'))
+
+def _reset_process_caches():
+    """Кэши процесса не должны переживать тест: у каждого теста своя БД"""
+    from services.material_types_schema import material_types_schema
+    from services.product_search import product_search_index
+    from services.reference_cache import reference_cache
+    from services.workshop_load import route_matrix_cache
+
+    for cache in (reference_cache, route_matrix_cache, product_search_index, material_types_schema):
+        cache.invalidate()
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Приложение на пустой SQLite-БД (таблицы создаются create_all)"""
+    from app import create_app
+    from config import Config
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'furniture.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        DB_STARTUP_MODE = 'create_all'
+        TESTING = True
+
+    _reset_process_caches()
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+    _reset_process_caches()
+
+
+@pytest.fixture
+def session(app):
+    from database import db
+    yield db.session
+    db.session.remove()
+
+
+@pytest.fixture
+def catalog(session):
+    """Справочники, 3 цеха и 10 продуктов без маршрутов"""
+    from models import MaterialType, Product, ProductType, Workshop
+
+    session.add_all([
+        ProductType(product_type_id=1, product_type_name='Кресла', product_type_coefficient=1.95),
+        MaterialType(material_type_id=1, material_type_name='Мебельный щит', raw_material_loss_percent=0.8),
+    ])
+    session.add_all([
+        Workshop(workshop_id=i, workshop_name=f'Цех {i}', workshop_type='Сборка', staff_count=5)
+        for i in range(1, 4)
+    ])
+    session.add_all([
+        Product(product_id=i, product_name=f'Продукт {i}', article_number=1000 + i, minimum_partner_price=100 * i,
+                product_type_id=1, material_type_id=1)
+        for i in range(1, 11)
+    ])
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def count_statements(app):
+    """Контекстный менеджер: список SQL-запросов, выполненных внутри блока"""
+    from contextlib import contextmanager
+
+    from sqlalchemy import event
+
+    from database import db
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def on_execute(connection, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', on_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', on_execute)
+
+    return counter
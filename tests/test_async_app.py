@@ -0,0 +1,94 @@
+"""
+Асинхронный режим (async_app) на aiosqlite: вызовы ASGI-приложения напрямую, без HTTP-клиента
+"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiosqlite')
+
+from async_app import create_async_app  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _call(app, path, headers=()):
+    """GET path -> (статус, заголовки, тело) через ASGI-интерфейс"""
+    messages = []
+    requested = []
+    finished = asyncio.Event()
+
+    async def receive():
+        # Тело запроса - один раз, дальше (потоковый ответ ждет отключения) - disconnect после ответа
+        if not requested:
+            requested.append(True)
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await finished.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        if message['type'] == 'http.response.body' and not message.get('more_body'):
+            finished.set()
+
+    async def run():
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'headers': [(k.lower().encode(), v.encode()) for k, v in headers], 'http_version': '1.1',
+            'scheme': 'http', 'server': ('test', 80), 'client': ('test', 1), 'root_path': '',
+        }
+        async with app.router.lifespan_context(app):
+            await app(scope, receive, send)
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], {k.decode().lower(): v.decode() for k, v in start['headers']}, body
+
+
+@pytest.fixture
+def async_app(app, catalog):
+    class AsyncConfig(Config):
+        SQLALCHEMY_DATABASE_URI = app.config['SQLALCHEMY_DATABASE_URI']
+        SQLALCHEMY_ENGINE_OPTIONS = {}
+        ASYNC_DATABASE_URL = None
+        COMPRESS_ENABLED = False
+        EXPORT_BATCH_SIZE = 3
+    return create_async_app(AsyncConfig)
+
+
+def test_reference_endpoints_conditional_get(app, async_app):
+    status, headers, body = _call(async_app, '/api/workshops')
+    assert status == 200
+    assert headers['cache-control'] == 'no-cache'
+
+    # Тот же ETag, что и у Flask-приложения
+    flask_response = app.test_client().get('/api/workshops')
+    assert headers['etag'] == flask_response.headers['ETag']
+    assert json.loads(body) == flask_response.get_json()
+
+    status, headers, body = _call(async_app, '/api/workshops', [('If-None-Match', headers['etag'])])
+    assert status == 304
+    assert body == b''
+
+    status, _, _ = _call(async_app, '/api/product-types', [('If-None-Match', '"other"')])
+    assert status == 200
+
+
+def test_product_workshops_streamed(app, async_app, catalog):
+    from models import ProductWorkshop
+
+    catalog.add_all([ProductWorkshop(product_id=p, workshop_id=w, manufacturing_time_hours=1.5)
+                     for p in range(1, 4) for w in range(1, 3)])
+    catalog.commit()
+
+    status, headers, body = _call(async_app, '/api/product-workshops')
+    assert status == 200
+    assert json.loads(body) == app.test_client().get('/api/product-workshops').get_json()
+    assert len(json.loads(body)) == 6
+
+
+def test_product_workshops_empty(async_app):
+    status, _, body = _call(async_app, '/api/product-workshops')
+    assert status == 200
+    assert json.loads(body) == []
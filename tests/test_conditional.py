@@ -0,0 +1,48 @@
+"""
+Условные GET справочников вместе со сжатием ответов
+"""
+import gzip
+
+
+def test_gzip_etag_revalidates_to_304(app, catalog):
+    app.config['COMPRESS_MIN_SIZE'] = 0
+    client = app.test_client()
+
+    first = client.get('/api/workshops', headers={'Accept-Encoding': 'gzip'})
+    assert first.status_code == 200
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+    assert gzip.decompress(first.get_data())
+
+    second = client.get('/api/workshops', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag'],
+    })
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert 'Accept-Encoding' in second.headers['Vary']
+
+
+def test_plain_etag_revalidates_to_304(app, catalog):
+    client = app.test_client()
+
+    first = client.get('/api/workshops')
+    assert first.status_code == 200
+    assert 'Content-Encoding' not in first.headers
+
+    second = client.get('/api/workshops', headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_changed_table_returns_200(app, catalog):
+    from models import Workshop
+
+    client = app.test_client()
+    etag = client.get('/api/workshops').headers['ETag']
+
+    catalog.add(Workshop(workshop_name='Цех 9', workshop_type='Покраска', staff_count=2))
+    catalog.commit()
+
+    response = client.get('/api/workshops', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
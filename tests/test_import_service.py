@@ -0,0 +1,92 @@
+"""
+Загрузка файлов BulkImportService: пустые файлы и конфликты наименований продукции
+"""
+import pytest
+from openpyxl import Workbook
+
+from models import MaterialType, Product, ProductType
+from services.import_service import BulkImportService
+
+HEADER = 'Наименование продукции,Артикул,Минимальная стоимость для партнера,Тип продукции,Основной материал\n'
+
+
+@pytest.fixture
+def service(session):
+    session.add_all([
+        ProductType(product_type_name='Кресла', product_type_coefficient=1.95),
+        MaterialType(material_type_name='Мебельный щит', raw_material_loss_percent=0.8),
+    ])
+    session.commit()
+    return BulkImportService(session)
+
+
+def test_empty_xlsx_reported(service, tmp_path):
+    path = tmp_path / 'empty.xlsx'
+    workbook = Workbook()
+    workbook.active.delete_rows(1)
+    workbook.save(path)
+
+    with pytest.raises(ValueError, match='Пустой файл'):
+        service.load('products', str(path))
+
+
+def test_empty_csv_reported(service, tmp_path):
+    path = tmp_path / 'empty.csv'
+    path.write_text('')
+
+    with pytest.raises(ValueError, match='Пустой файл'):
+        service.load('products', str(path))
+
+
+def test_product_name_conflicts_rejected_per_row(service, session, tmp_path):
+    session.add(Product(product_name='Кресло А', article_number=100, minimum_partner_price=10,
+                        product_type_id=1, material_type_id=1))
+    session.commit()
+
+    path = tmp_path / 'products.csv'
+    path.write_text(HEADER + '\n'.join([
+        'Кресло А,200,10,Кресла,Мебельный щит',   # наименование занято артикулом 100
+        'Кресло Б,300,10,Кресла,Мебельный щит',   # дубликат наименования в файле
+        'Кресло Б,301,10,Кресла,Мебельный щит',
+        'Кресло В,400,10,Кресла,Мебельный щит',
+    ]) + '\n', encoding='utf-8')
+
+    stats = service.load('products', str(path))
+
+    assert stats['rows_loaded'] == 2
+    assert sorted((e['row'], e['error']) for e in stats['errors']) == [
+        (2, 'product_name taken by another article_number'),
+        (3, 'duplicate product_name'),
+    ]
+    names = dict(session.query(Product.article_number, Product.product_name))
+    assert names == {100: 'Кресло А', 301: 'Кресло Б', 400: 'Кресло В'}
+
+
+def test_product_parameters_loaded_by_article(service, session, tmp_path):
+    from models import ProductParameter
+
+    session.add(Product(product_name='Кресло А', article_number=100, minimum_partner_price=10,
+                        product_type_id=1, material_type_id=1))
+    session.commit()
+
+    path = tmp_path / 'parameters.csv'
+    path.write_text('\n'.join([
+        'Артикул,"Длина, см","Ширина, см"',
+        '100,120,"60,5"',
+        '999,10,10',
+        '100,0,10',
+    ]) + '\n', encoding='utf-8')
+
+    stats = service.load('product_parameters', str(path))
+
+    assert stats['rows_loaded'] == 1
+    assert [e['error'] for e in stats['errors']] == ['unknown product', 'invalid parameter1_value']
+    parameters = session.query(ProductParameter).one()
+    assert (parameters.product_type_id, parameters.parameter1_value, parameters.parameter2_value) == (1, 120, 60.5)
+    assert parameters.parameter1_name == 'Длина'
+
+    # Повторная загрузка обновляет строку по product_id
+    path.write_text('article_number,parameter1_value,parameter2_value\n100,130,70\n', encoding='utf-8')
+    assert service.load('product_parameters', str(path))['rows_loaded'] == 1
+    session.expire_all()
+    assert session.query(ProductParameter).one().parameter1_value == 130
@@ -0,0 +1,54 @@
+"""
+Сводка маршрутов: пересчет на месте и чтение продукта одним запросом
+"""
+from models import ProductManufacturingSummary, ProductWorkshop
+from services.manufacturing_summary import ManufacturingSummaryService
+from services.product_service import ProductService
+
+
+def _summary(session):
+    return {
+        row.product_id: (float(row.total_hours), row.workshop_count, row.bottleneck_workshop_id)
+        for row in session.query(ProductManufacturingSummary)
+    }
+
+
+def test_refresh_updates_in_place_and_drops_empty_routes(catalog):
+    catalog.add_all([
+        ProductWorkshop(product_id=1, workshop_id=1, manufacturing_time_hours=1.5),
+        ProductWorkshop(product_id=1, workshop_id=2, manufacturing_time_hours=2.5),
+        ProductWorkshop(product_id=2, workshop_id=3, manufacturing_time_hours=4),
+    ])
+    service = ManufacturingSummaryService(catalog)
+    assert service.refresh([1, 2, 3]) == 3
+    assert _summary(catalog) == {1: (4.0, 2, 2), 2: (4.0, 1, 3)}
+
+    catalog.query(ProductWorkshop).filter_by(product_id=1, workshop_id=2).delete()
+    catalog.query(ProductWorkshop).filter_by(product_id=2).delete()
+    service.refresh([1, 2])
+    assert _summary(catalog) == {1: (1.5, 1, 1)}
+
+
+def test_rebuild_fixes_drift(catalog):
+    catalog.add(ProductWorkshop(product_id=3, workshop_id=1, manufacturing_time_hours=2))
+    catalog.add(ProductManufacturingSummary(product_id=4, total_hours=9, workshop_count=1,
+                                            bottleneck_workshop_id=1, bottleneck_hours=9))
+    catalog.flush()
+
+    assert ManufacturingSummaryService(catalog).rebuild() == {'products': 1, 'drifted': 2}
+    assert _summary(catalog) == {3: (2.0, 1, 1)}
+
+
+def test_get_product_by_id_single_query(catalog, count_statements):
+    catalog.add(ProductWorkshop(product_id=5, workshop_id=1, manufacturing_time_hours=2.6))
+    ManufacturingSummaryService(catalog).refresh([5])
+    catalog.commit()
+
+    with count_statements() as statements:
+        product = ProductService(catalog).get_product_by_id(5)
+
+    assert len(statements) == 1
+    assert product['product_type'] == 'Кресла'
+    assert product['material_type'] == 'Мебельный щит'
+    assert product['manufacturing_time_hours'] == 3
+    assert ProductService(catalog).get_product_by_id(999) is None
@@ -0,0 +1,61 @@
+"""
+Расчет сырья: целые вне int64 отклоняются одинаково в одиночном и пакетном расчете;
+потребность по плану: строки без размеров и без коэффициентов видны в ответе
+"""
+import json
+
+import pytest
+
+from models import Product, ProductParameter, ProductType
+from services.material_service import MaterialCalculationService
+
+
+def test_plan_requirements_reports_skipped_products(catalog, monkeypatch):
+    catalog.add(ProductType(product_type_id=2, product_type_name='Столы', product_type_coefficient=2))
+    catalog.query(Product).filter_by(product_id=2).update({'product_type_id': 2})
+    catalog.add_all([
+        ProductParameter(product_id=1, product_type_id=1, parameter1_value=2, parameter2_value=3),
+        ProductParameter(product_id=2, product_type_id=2, parameter1_value=2, parameter2_value=3),
+    ])
+    catalog.commit()
+    # Коэффициента типа 2 нет в справочнике (например, кэш справочников еще не обновился)
+    monkeypatch.setattr(MaterialCalculationService, '_load_reference_data',
+                        staticmethod(lambda session: ({1: 1.95}, {1: 0.8})))
+
+    result = MaterialCalculationService.calculate_plan_requirements({1: 10, 2: 5, 3: 1, 99: 1}, catalog)
+
+    assert result['lines_calculated'] == 1
+    assert result['products_not_found'] == [99]
+    assert result['products_without_parameters'] == [3]
+    assert result['products_unknown_coefficients'] == [2]
+    assert [m['lines'] for m in result['materials']] == [1]
+
+
+LINE = {'product_type_id': 1, 'material_type_id': 1, 'quantity': 10, 'parameter1': 2.5, 'parameter2': 3.0}
+HUGE_VALUES = [
+    ('product_type_id', 10 ** 30),
+    ('material_type_id', 2 ** 63),
+    ('quantity', 10 ** 30),
+    ('quantity', 10 ** 400),
+    ('parameter1', 10 ** 400),
+]
+
+
+def _post(client, url, body):
+    # Стандартный json: тело с целыми больше 64 бит
+    return client.post(url, data=json.dumps(body), content_type='application/json')
+
+
+@pytest.mark.parametrize('key, value', HUGE_VALUES)
+def test_huge_integers_rejected_in_single_and_batch(app, catalog, key, value):
+    client = app.test_client()
+
+    response = _post(client, '/api/material/calculate-raw-material', {**LINE, key: value})
+    assert response.status_code == 400
+    assert response.get_json()['raw_material_quantity'] == -1
+
+    response = _post(client, '/api/material/calculate-raw-material/batch', [LINE, {**LINE, key: value}])
+    assert response.status_code == 200
+    first, second = response.get_json()['results']
+    assert 'error' not in first and first['raw_material_quantity'] > 0
+    assert second == {'index': 1, 'raw_material_quantity': -1, 'error': 'invalid_input'}
@@ -0,0 +1,31 @@
+"""
+Колонка потерь material_types: определяется при старте, запросы эндпоинтов без интроспекции,
+refresh-schema сдвигает отметку изменений для остальных процессов
+"""
+from database import get_change_stamp
+from services.material_types_schema import material_types_schema
+
+
+def test_loss_column_resolved_at_startup(app, catalog, count_statements):
+    assert material_types_schema._statements['loss_column'] == 'raw_material_loss_percent'
+
+    client = app.test_client()
+    with count_statements() as statements:
+        for _ in range(3):
+            assert client.get('/api/material-types').status_code == 200
+        assert client.put('/api/material-types/1', json={'loss_percentage': 0.5}).status_code == 200
+
+    assert not [statement for statement in statements
+                if 'WHERE 1 = 0' in statement or 'PRAGMA' in statement.upper()]
+    assert client.get('/api/material-types').get_json()[0]['loss_percentage'] == 0.5
+
+
+def test_refresh_schema_bumps_change_stamp(app, catalog):
+    before = get_change_stamp(catalog, ('material_types',))
+    catalog.commit()
+
+    result = app.test_cli_runner().invoke(args=['material_types', 'refresh-schema'])
+
+    assert result.exit_code == 0, result.output
+    assert 'raw_material_loss_percent' in result.output
+    assert get_change_stamp(catalog, ('material_types',)) != before
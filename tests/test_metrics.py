@@ -0,0 +1,23 @@
+"""
+Метрики SQL: время запроса считается от его собственного старта
+"""
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from metrics import Metrics
+
+
+def test_failed_statement_leaves_no_start_time():
+    engine = create_engine('sqlite://')
+    collector = Metrics()
+    collector.register_engine(engine, slow_query_seconds=10)
+
+    with engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                connection.execute(text('SELECT * FROM missing_table'))
+        connection.execute(text('SELECT 1'))
+        assert 'metrics_query_start' not in connection.info
+
+    assert collector.sql_statements_total == 1
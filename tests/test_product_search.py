@@ -0,0 +1,81 @@
+"""
+Поиск продукции: результаты, изменения через импорт и API, перестройка индекса без блокировки поиска
+"""
+import threading
+
+from models import Product
+from services.import_service import BulkImportService
+from services.product_search import ProductSearchIndex
+
+HEADER = 'Наименование продукции,Артикул,Минимальная стоимость для партнера,Тип продукции,Основной материал\n'
+
+
+def test_search_by_name_and_article(catalog):
+    index = ProductSearchIndex(check_interval=60)
+    result = index.search(catalog, 'продукт 1', 20, 0)
+    assert [item['product_id'] for item in result['items']] == [1, 10]
+
+    result = index.search(catalog, '100', 20, 0)
+    assert {item['product_id'] for item in result['items']} == set(range(1, 10))
+    assert {item['match'] for item in result['items']} == {'article_prefix'}
+
+
+def test_search_served_from_old_state_during_refresh(app, catalog, monkeypatch):
+    from database import db
+
+    index = ProductSearchIndex(check_interval=0)
+    old_state = index.get(catalog)
+
+    catalog.get(Product, 3).product_name = 'Шкаф угловой'
+    catalog.commit()
+
+    entered, release = threading.Event(), threading.Event()
+    apply_changes = index._apply_changes
+
+    def slow_apply_changes(*args):
+        entered.set()
+        assert release.wait(10)
+        return apply_changes(*args)
+
+    monkeypatch.setattr(index, '_apply_changes', slow_apply_changes)
+
+    def refresh():
+        with app.app_context():
+            index.get(db.session)
+            db.session.remove()
+
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    try:
+        assert entered.wait(10)
+        # Сверка идет в другом потоке - поиск не ждет ее и отвечает по прежнему состоянию
+        assert index.get(catalog) is old_state
+        assert index.search(catalog, 'шкаф', 20, 0)['items'] == []
+    finally:
+        release.set()
+        thread.join(10)
+
+    assert [item['product_id'] for item in index.search(catalog, 'шкаф', 20, 0)['items']] == [3]
+
+
+def test_changes_from_import_and_api_both_seen(app, catalog, count_statements, tmp_path):
+    # Импорт пишет updated_at в SQL, API - через ORM: отметки должны идти по одним часам (БД)
+    index = ProductSearchIndex(check_interval=0)
+    assert index.search(catalog, 'шкаф', 20, 0)['items'] == []
+
+    path = tmp_path / 'products.csv'
+    path.write_text(HEADER + 'Шкаф импортный,1001,100,Кресла,Мебельный щит\n', encoding='utf-8')
+    BulkImportService(catalog).load('products', str(path))
+    catalog.commit()
+    assert [item['product_id'] for item in index.search(catalog, 'шкаф', 20, 0)['items']] == [1]
+
+    with count_statements() as statements:
+        response = app.test_client().put('/api/products/2', json={'product_name': 'Шкаф из API'})
+    assert response.status_code == 200
+    update = [statement for statement in statements if statement.startswith('UPDATE products')]
+    assert update and 'updated_at=STRFTIME' in update[0].replace(' ', '')
+    catalog.commit()
+
+    assert {item['product_id'] for item in index.search(catalog, 'шкаф', 20, 0)['items']} == {1, 2}
+    imported, updated = (catalog.get(Product, product_id).updated_at for product_id in (1, 2))
+    assert updated >= imported
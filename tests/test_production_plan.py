@@ -0,0 +1,35 @@
+"""
+План производства и книга заказов: product_id и количества вне int64 - 400, а не 500
+"""
+import json
+
+import pytest
+
+TOO_BIG = 2 ** 63
+
+
+def _post(client, url, body):
+    # Стандартный json: тело с целыми больше 64 бит
+    return client.post(url, data=json.dumps(body), content_type='application/json')
+
+
+@pytest.mark.parametrize('plan', [{str(TOO_BIG): 1}, {'1': TOO_BIG}, [{'product_id': 10 ** 30, 'quantity': 1}]])
+def test_plan_outside_int64_rejected(app, catalog, plan):
+    client = app.test_client()
+    assert _post(client, '/api/workshops/load', {'plan': plan}).status_code == 400
+    assert _post(client, '/api/material/plan-requirements', {'plan': plan}).status_code == 400
+
+
+def test_plan_string_outside_int64_rejected(app, catalog):
+    client = app.test_client()
+    assert client.get(f'/api/workshops/load?plan={TOO_BIG}:1').status_code == 400
+
+    response = client.get(f'/api/workshops/load?plan={TOO_BIG - 1}:1')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('order', [{'product_id': TOO_BIG, 'quantity': 1}, {'product_id': 1, 'quantity': TOO_BIG}])
+def test_schedule_orders_outside_int64_rejected(app, catalog, order):
+    response = _post(app.test_client(), '/api/schedule', {'orders': [{**order, 'due_date': '2030-01-31'}]})
+    assert response.status_code == 400
+    assert 'Заказ 0' in response.get_json()['error']
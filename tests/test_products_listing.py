@@ -0,0 +1,72 @@
+"""
+GET /api/products строится одним запросом независимо от размера каталога (без N+1)
+"""
+from models import Product, ProductWorkshop
+from services.manufacturing_summary import ManufacturingSummaryService
+
+
+def _get_products(client, count_statements):
+    with count_statements() as statements:
+        response = client.get('/api/products')
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+def _add_products(session, first, count):
+    ids = range(first, first + count)
+    session.add_all([
+        Product(product_id=i, product_name=f'Продукт {i}', article_number=1000 + i, minimum_partner_price=10,
+                product_type_id=1, material_type_id=1)
+        for i in ids
+    ])
+    session.add_all([
+        ProductWorkshop(product_id=i, workshop_id=w, manufacturing_time_hours=1.25)
+        for i in ids for w in (1, 2, 3)
+    ])
+    ManufacturingSummaryService(session).refresh(ids)
+    session.commit()
+
+
+def test_statement_count_constant_as_catalog_grows(app, catalog, count_statements):
+    client = app.test_client()
+    _add_products(catalog, 11, 10)
+    small, small_count = _get_products(client, count_statements)
+
+    _add_products(catalog, 21, 300)
+    large, large_count = _get_products(client, count_statements)
+
+    assert len(small) == 20 and len(large) == 320
+    assert small_count == large_count == 1
+
+
+def test_listing_fields(app, catalog, count_statements):
+    _add_products(catalog, 11, 1)
+    products, _ = _get_products(app.test_client(), count_statements)
+    by_id = {product['product_id']: product for product in products}
+
+    assert by_id[11]['manufacturing_time_hours'] == 4  # 3 * 1.25 = 3.75 -> 4
+    assert by_id[11]['product_type'] == 'Кресла'
+    assert by_id[11]['material_type'] == 'Мебельный щит'
+    assert by_id[1]['manufacturing_time_hours'] == -1  # без маршрута
+
+
+def test_lookup_by_ids(app, catalog):
+    client = app.test_client()
+    response = client.get('/api/products?ids=3,1,3,42')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['product_id'] for item in body['items']] == [3, 1]
+    assert body['missing'] == [42]
+
+
+def test_lookup_keys_outside_bigint_rejected(app, catalog):
+    client = app.test_client()
+    for ids in ('99999999999999999999999', str(2 ** 63), '0', '-5'):
+        response = client.get(f'/api/products?ids=1,{ids}')
+        assert response.status_code == 400, ids
+        assert 'вне диапазона' in response.get_json()['error']
+
+    response = client.post('/api/products/lookup', data=f'{{"article_numbers": [1001, {2 ** 64}]}}',
+                           content_type='application/json')
+    assert response.status_code == 400
+    assert client.get(f'/api/products?ids={2 ** 63 - 1}').get_json()['missing'] == [2 ** 63 - 1]
@@ -0,0 +1,30 @@
+"""
+Профилирование запросов по токену: только заголовок X-Profile, токен не попадает в профиль
+"""
+import json
+
+import pytest
+
+from profiling import init_profiling
+
+
+@pytest.fixture
+def profiler(app, tmp_path):
+    app.config.update(PROFILE_TOKEN='secret', PROFILE_DIR=str(tmp_path / 'profiles'))
+    return init_profiling(app)
+
+
+def test_header_enables_profile(app, catalog, profiler, tmp_path):
+    response = app.test_client().get('/api/workshops?_profile=secret&x=1', headers={'X-Profile': 'secret'})
+    profile_id = response.headers['X-Profile-Id']
+
+    with open(tmp_path / 'profiles' / f'{profile_id}.json', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert saved['path'] == '/api/workshops?x=1'
+    assert saved['sql_count'] >= 1
+
+
+def test_query_arg_does_not_enable_profile(app, catalog, profiler):
+    client = app.test_client()
+    assert 'X-Profile-Id' not in client.get('/api/workshops?_profile=secret').headers
+    assert 'X-Profile-Id' not in client.get('/api/workshops', headers={'X-Profile': 'wrong'}).headers
@@ -0,0 +1,16 @@
+"""
+Бюджеты SQL-запросов по эндпоинтам (scripts/check_query_budgets.py) как часть тестов:
+превышение бюджета, рост числа запросов с данными или эндпоинт без бюджета - падение теста
+"""
+from check_query_budgets import DEFAULT_SIZES, check
+
+
+def test_query_budgets():
+    result = check(DEFAULT_SIZES)
+    assert result['violations'] == []
+
+
+def test_query_budgets_with_compression():
+    # Сжатие ответов не должно добавлять запросов и ломать эндпоинты
+    result = check(DEFAULT_SIZES[:1], compress=True)
+    assert result['violations'] == []
@@ -0,0 +1,60 @@
+"""
+Кэш справочников: колонка потерь - та же, что у эндпоинтов material_types;
+сверка с БД не блокирует остальные потоки
+"""
+import threading
+
+from sqlalchemy import text
+
+from services.material_types_schema import material_types_schema
+from services.reference_cache import ReferenceDataCache
+
+
+def test_losses_follow_renamed_loss_column(catalog):
+    cache = ReferenceDataCache(check_interval=0)
+    assert cache.get(catalog) == ({1: 1.95}, {1: 0.8})
+
+    # Миграция в другом процессе: колонка переименована, отметка изменений сдвинута (refresh-schema)
+    catalog.execute(text("ALTER TABLE material_types RENAME COLUMN raw_material_loss_percent TO loss_percentage"))
+    catalog.execute(text("UPDATE material_types SET loss_percentage = 0.6, updated_at = '2100-01-01 00:00:00'"))
+    catalog.commit()
+
+    assert cache.get(catalog) == ({1: 1.95}, {1: 0.6})
+    assert material_types_schema.get(catalog)['loss_column'] == 'loss_percentage'
+
+
+def test_old_snapshot_served_during_reload(app, catalog, monkeypatch):
+    from database import db
+
+    cache = ReferenceDataCache(check_interval=0)
+    old = cache.get(catalog)
+    catalog.execute(text("UPDATE product_types SET product_type_coefficient = 2.5, updated_at = '2100-01-01'"))
+    catalog.commit()
+
+    entered, release = threading.Event(), threading.Event()
+    load = cache._load
+
+    def slow_load(db_session):
+        entered.set()
+        assert release.wait(10)
+        return load(db_session)
+
+    monkeypatch.setattr(cache, '_load', slow_load)
+
+    def reload():
+        with app.app_context():
+            cache.get(db.session)
+            db.session.remove()
+
+    thread = threading.Thread(target=reload)
+    thread.start()
+    try:
+        assert entered.wait(10)
+        # Загрузка идет в другом потоке - расчет не ждет ее и получает прежний снимок
+        assert cache.get(catalog) is old
+    finally:
+        release.set()
+        thread.join(10)
+
+    assert cache.get(catalog)[0] == {1: 2.5}
+    assert cache.stats()['misses'] == 2
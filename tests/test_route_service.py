@@ -0,0 +1,113 @@
+"""
+Замена маршрутов RouteService: разница с текущим маршрутом, пачки ID, ошибки;
+изменения маршрута по одной строке блокируют продукты до пересчета сводки
+"""
+import pytest
+
+from models import ProductManufacturingSummary, ProductWorkshop
+from services.route_service import RouteService
+
+
+@pytest.fixture
+def service(catalog, monkeypatch):
+    # Маленькие пачки: запросы с IN разбиваются на несколько
+    monkeypatch.setattr(RouteService, 'BATCH_SIZE', 3)
+    return RouteService(catalog)
+
+
+def test_replace_routes_applies_diff_in_batches(service, session):
+    first = service.replace_routes({i: [{'workshop_id': 1, 'manufacturing_time_hours': 2}] for i in range(1, 11)})
+    assert first == {'products': 10, 'inserted': 10, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+
+    second = service.replace_routes({
+        i: [{'workshop_id': 2, 'manufacturing_time_hours': 1.5}] if i % 2 else
+           [{'workshop_id': 1, 'manufacturing_time_hours': 3}]
+        for i in range(1, 11)
+    })
+    assert second == {'products': 10, 'inserted': 5, 'updated': 5, 'deleted': 5, 'unchanged': 0}
+
+    routes = {(r.product_id, r.workshop_id): float(r.manufacturing_time_hours)
+              for r in session.query(ProductWorkshop)}
+    assert routes == {(i, 2 if i % 2 else 1): 1.5 if i % 2 else 3.0 for i in range(1, 11)}
+    assert session.query(ProductManufacturingSummary).count() == 10
+
+
+def test_unknown_product_and_workshop(service):
+    with pytest.raises(LookupError, match='Продукт не найден: 99'):
+        service.replace_routes({1: [], 99: []})
+    with pytest.raises(LookupError, match='Цех не найден: 7'):
+        service.replace_route(1, [{'workshop_id': 7, 'manufacturing_time_hours': 1}])
+
+
+def test_invalid_steps_rejected(service):
+    with pytest.raises(ValueError):
+        service.replace_route(1, [{'workshop_id': 1, 'manufacturing_time_hours': 0}])
+    with pytest.raises(ValueError):
+        service.replace_route(1, [{'workshop_id': 1, 'manufacturing_time_hours': 1}] * 2)
+
+
+@pytest.mark.parametrize('hours', [1e30, '1e30', 10 ** 6])
+def test_hours_out_of_range_rejected(service, hours):
+    with pytest.raises(ValueError):
+        service.replace_route(1, [{'workshop_id': 1, 'manufacturing_time_hours': hours}])
+
+
+@pytest.mark.parametrize('routes', [
+    [{'product_id': [1], 'workshops': []}],
+    [{'product_id': 1, 'workshops': [{'workshop_id': 1, 'manufacturing_time_hours': 1e30}]}],
+])
+def test_bulk_routes_bad_input_is_400(app, catalog, routes):
+    response = app.test_client().put('/api/products/routes', json=routes)
+    assert response.status_code == 400, response.get_json()
+
+
+def _summary_hours(session):
+    session.expire_all()
+    return {row.product_id: float(row.total_hours) for row in session.query(ProductManufacturingSummary)}
+
+
+def test_single_row_changes_lock_products(app, catalog, monkeypatch):
+    locked = []
+    lock_products = RouteService.lock_products
+
+    def record(self, product_ids):
+        locked.append(sorted(product_ids))
+        return lock_products(self, product_ids)
+
+    monkeypatch.setattr(RouteService, 'lock_products', record)
+    client = app.test_client()
+
+    response = client.post('/api/product-workshops',
+                           json={'product_id': 1, 'workshop_id': 1, 'manufacturing_time_hours': 2})
+    assert response.status_code == 201
+    route_id = catalog.query(ProductWorkshop.product_workshop_id).scalar()
+
+    response = client.put(f'/api/product-workshops/{route_id}',
+                          json={'product_id': 2, 'workshop_id': 1, 'manufacturing_time_hours': 3})
+    assert response.status_code == 200
+    assert _summary_hours(catalog) == {2: 3.0}
+
+    assert client.delete(f'/api/product-workshops/{route_id}').status_code == 200
+    assert _summary_hours(catalog) == {}
+    assert locked == [[1], [1, 2], [2]]
+
+    response = client.post('/api/product-workshops',
+                           json={'product_id': 99, 'workshop_id': 1, 'manufacturing_time_hours': 2})
+    assert response.status_code == 404
+
+
+def test_route_moved_while_locking_is_conflict(app, catalog, monkeypatch):
+    catalog.add(ProductWorkshop(product_id=1, workshop_id=1, manufacturing_time_hours=2))
+    catalog.commit()
+    route_id = catalog.query(ProductWorkshop.product_workshop_id).scalar()
+    lock_products = RouteService.lock_products
+
+    def move_route(self, product_ids):
+        # Параллельный запрос перенес строку к другому продукту до нашей блокировки
+        self.db.query(ProductWorkshop).filter_by(product_workshop_id=route_id).update({'product_id': 3})
+        return lock_products(self, product_ids)
+
+    monkeypatch.setattr(RouteService, 'lock_products', move_route)
+    response = app.test_client().delete(f'/api/product-workshops/{route_id}')
+    assert response.status_code == 409
+    assert catalog.query(ProductWorkshop).count() == 1
@@ -0,0 +1,123 @@
+"""
+Расчет расписания: задача в schedule_tasks, расчет в отдельном процессе
+"""
+import os
+import time
+
+import pytest
+
+from models import ProductWorkshop, ScheduleTask
+from services.manufacturing_summary import ManufacturingSummaryService
+from services.schedule_worker import ScheduleWorker, schedule_worker
+
+
+@pytest.fixture
+def routes(catalog):
+    catalog.add_all([
+        ProductWorkshop(product_id=product_id, workshop_id=workshop_id, manufacturing_time_hours=1 + workshop_id)
+        for product_id in (1, 2) for workshop_id in (1, 2)
+    ])
+    ManufacturingSummaryService(catalog).refresh([1, 2])
+    catalog.commit()
+    yield catalog
+    schedule_worker.shutdown(wait=True)
+
+
+def _wait(client, status_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        task = client.get(status_url).get_json()
+        if task['status'] in ('done', 'failed'):
+            return task
+        time.sleep(0.1)
+    raise AssertionError(f'Задача не завершилась за {timeout} c: {task}')
+
+
+def test_schedule_computed_in_worker_process(app, routes):
+    client = app.test_client()
+    response = client.post('/api/schedule', json={
+        'orders': [{'product_id': 1, 'quantity': 2, 'due_date': '2030-01-31'},
+                   {'product_id': 2, 'quantity': 1, 'due_date': '2030-01-15'}],
+        'start_date': '2030-01-01',
+        'time_budget_ms': 200,
+    })
+    assert response.status_code == 202
+
+    task = _wait(client, response.get_json()['status_url'])
+    assert task['status'] == 'done', task
+    assert task['started_at'] >= task['submitted_at']
+    assert [order['product_id'] for order in task['result']['orders']] == [1, 2]
+    # Состояние - в БД, а не в памяти процесса: его видит и другой экземпляр воркера
+    assert ScheduleWorker(1, 20, 3600).get(routes, task['task_id'])['status'] == 'done'
+
+
+def test_unknown_task_404(app, routes):
+    assert app.test_client().get('/api/schedule/nope').status_code == 404
+
+
+def test_old_results_trimmed(routes):
+    routes.add_all([
+        ScheduleTask(task_id=f'old{i}', status='done', submitted_at=i, finished_at=i) for i in range(5)
+    ] + [ScheduleTask(task_id='queued', status='queued', submitted_at=9)])
+    routes.commit()
+
+    worker = ScheduleWorker(1, 2, 3600)
+    worker._trim(routes)
+    routes.commit()
+
+    assert {task_id for task_id, in routes.query(ScheduleTask.task_id)} == {'old3', 'old4', 'queued'}
+
+
+def _status(db_session, task_id):
+    db_session.expire_all()
+    return db_session.get(ScheduleTask, task_id)
+
+
+def test_broken_pool_marks_task_failed(routes):
+    # Процесс пула падает, не записав результат - задача failed, следующая идет в новый пул
+    worker = ScheduleWorker(1, 20, 3600)
+    try:
+        task_id = worker.submit(routes, os._exit, 1)
+        deadline = time.monotonic() + 60
+        while _status(routes, task_id).status not in ('done', 'failed') and time.monotonic() < deadline:
+            time.sleep(0.1)
+        task = _status(routes, task_id)
+        assert task.status == 'failed' and task.finished_at is not None, task.error
+
+        next_id = worker.submit(routes, time.sleep, 0)
+        deadline = time.monotonic() + 60
+        while _status(routes, next_id).status != 'done' and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert _status(routes, next_id).status == 'done'
+    finally:
+        worker.shutdown(wait=True)
+
+
+def test_cancelled_tasks_marked_failed(routes):
+    # Остановка воркера отменяет очередь - отмененные задачи не остаются в queued
+    worker = ScheduleWorker(1, 20, 3600)
+    task_ids = [worker.submit(routes, time.sleep, 0.5) for _ in range(4)]
+    worker.shutdown(wait=True)
+
+    statuses = {_status(routes, task_id).status for task_id in task_ids}
+    assert statuses <= {'done', 'failed'} and 'failed' in statuses
+
+
+def test_lost_task_expired(app, routes):
+    routes.add(ScheduleTask(task_id='lost', status='running', submitted_at=time.time() - 7200, started_at=1))
+    routes.commit()
+
+    task = app.test_client().get('/api/schedule/lost').get_json()
+    assert task['status'] == 'failed' and 'error' in task
+
+
+def test_submit_error_returns_500(app, routes, monkeypatch):
+    def broken_submit(*args, **kwargs):
+        raise OSError('не удалось запустить процесс')
+
+    monkeypatch.setattr(schedule_worker, 'submit', broken_submit)
+    response = app.test_client().post('/api/schedule', json={
+        'orders': [{'product_id': 1, 'quantity': 1, 'due_date': '2030-01-31'}],
+    })
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'не удалось запустить процесс'}
@@ -0,0 +1,44 @@
+"""
+JSON-провайдер на orjson дает тот же вывод, что и стандартный провайдер Flask
+"""
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from serialization import dumps_bytes, init_json, orjson
+
+SAMPLE = {
+    'created_at': datetime(2024, 5, 6, 7, 8, 9),
+    'day': date(2024, 1, 2),
+    'price': Decimal('1.50'),
+    'id': uuid.UUID(int=5),
+    'name': 'Кресло',
+    'values': [1, 2.5, None, True],
+}
+
+
+def _response_bytes(serializer, obj=SAMPLE):
+    app = Flask(__name__)
+    app.config['JSON_SERIALIZER'] = serializer
+    init_json(app)
+    with app.app_context():
+        return app.json.response(obj).get_data()
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson не установлен')
+def test_orjson_matches_default_provider():
+    assert _response_bytes('orjson') == _response_bytes('default')
+
+
+def test_dates_serialized_as_http_date():
+    assert dumps_bytes({'day': date(2024, 1, 2)}) == b'{"day":"Tue, 02 Jan 2024 00:00:00 GMT"}'
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson не установлен')
+def test_integers_beyond_64_bits_fall_back_to_json():
+    body = {'missing': [2 ** 64, -2 ** 70], 'name': 'Кресло'}
+    assert _response_bytes('orjson', body) == _response_bytes('default', body)
+    assert dumps_bytes(body) == '{"missing":[18446744073709551616,-1180591620717411303424],"name":"Кресло"}'.encode()
@@ -0,0 +1,83 @@
+"""
+Старт приложения: DB_STARTUP_MODE=skip не подключается к БД,
+check не стартует без таблицы schema_version и с другой версией схемы
+"""
+import os
+import sqlite3
+
+import pytest
+
+import database
+from app import create_app
+from config import Config
+
+
+def _make_config(url, mode):
+    class StartupConfig(Config):
+        SQLALCHEMY_DATABASE_URI = url
+        DB_STARTUP_MODE = mode
+    return StartupConfig
+
+
+def test_skip_mode_makes_no_connections(tmp_path):
+    # Любое подключение к этому URL завершилось бы ошибкой: каталога не существует
+    url = f"sqlite:///{os.path.join(tmp_path, 'missing', 'furniture.db')}"
+    connects = database._pool_stats['connects']
+
+    app = create_app(_make_config(url, 'skip'))
+
+    assert database._pool_stats['connects'] == connects
+    assert 'products.get_products' in app.view_functions
+
+
+def test_create_all_mode_connects(tmp_path):
+    # Контрольный случай: счетчик подключений действительно срабатывает на старте
+    url = f"sqlite:///{os.path.join(tmp_path, 'furniture.db')}"
+    connects = database._pool_stats['connects']
+
+    create_app(_make_config(url, 'create_all'))
+
+    assert database._pool_stats['connects'] > connects
+
+
+def _sqlite_db(tmp_path, script):
+    path = os.path.join(tmp_path, 'furniture.db')
+    with sqlite3.connect(path) as connection:
+        connection.executescript(script)
+    connection.close()
+    return f"sqlite:///{path}"
+
+
+def _first_migration():
+    with open(os.path.join(os.path.dirname(database.__file__), 'migrations', '001_schema_version.sql'),
+              encoding='utf-8') as f:
+        return f.read()
+
+
+def test_check_mode_requires_schema_version(tmp_path):
+    # Исходная схема без таблицы версии
+    url = _sqlite_db(tmp_path, "CREATE TABLE products (product_id INTEGER PRIMARY KEY);")
+    with pytest.raises(RuntimeError, match='schema_version'):
+        create_app(_make_config(url, 'check'))
+
+
+def test_first_migration_records_version_1(tmp_path):
+    url = _sqlite_db(tmp_path, _first_migration() + _first_migration())
+    with sqlite3.connect(url[len('sqlite:///'):]) as connection:
+        assert connection.execute("SELECT version FROM schema_version").fetchall() == [(1,)]
+    connection.close()
+
+    with pytest.raises(RuntimeError, match=f'Версия схемы БД 1 не совпадает с ожидаемой {Config.SCHEMA_VERSION}'):
+        create_app(_make_config(url, 'check'))
+
+
+def test_check_mode_accepts_expected_version(tmp_path):
+    url = _sqlite_db(tmp_path, _first_migration() +
+                     f"INSERT INTO schema_version (version) VALUES ({Config.SCHEMA_VERSION});")
+    assert 'products.get_products' in create_app(_make_config(url, 'check')).view_functions
+
+
+def test_unknown_mode_rejected(tmp_path):
+    url = f"sqlite:///{os.path.join(tmp_path, 'furniture.db')}"
+    with pytest.raises(ValueError):
+        create_app(_make_config(url, 'migrate'))
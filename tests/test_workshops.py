@@ -0,0 +1,21 @@
+"""
+Список цехов не читает маршруты (без JOIN product_workshops)
+"""
+from models import ProductWorkshop
+
+
+def test_workshops_list_does_not_join_routes(app, catalog, count_statements):
+    catalog.add_all([
+        ProductWorkshop(product_id=product_id, workshop_id=workshop_id, manufacturing_time_hours=1)
+        for product_id in range(1, 11) for workshop_id in (1, 2, 3)
+    ])
+    catalog.commit()
+    catalog.expunge_all()
+
+    client = app.test_client()
+    with count_statements() as statements:
+        response = client.get('/api/workshops')
+        single = client.get('/api/workshops/1')
+    assert response.status_code == 200 and single.status_code == 200
+    assert [workshop['workshop_id'] for workshop in response.get_json()] == [1, 2, 3]
+    assert statements and not [statement for statement in statements if 'product_workshops' in statement]
@@ -0,0 +1,9 @@
+"""
+Точка входа для WSGI-сервера.
+Продакшен (несколько воркеров, preload, корректное завершение по SIGTERM):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app, warm_up
+
+app = create_app()
+warm_up(app)